@@ -1,7 +1,6 @@
 # ai_engine.py
 import os
 import json
-import requests
 import time
 import threading
 import shutil
@@ -9,6 +8,9 @@ import datetime
 import random
 from collections import defaultdict, Counter
 
+from data_version import DATASET_CACHE, naikkan_versi, atur_jadwal_refresh
+from metrics import get_metrik
+
 # --- Directory Paths ---
 DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
 CACHE_DIR = os.path.join(os.path.dirname(__file__), 'cache')
@@ -17,6 +19,8 @@ SAMPAH_DIR = os.path.join(os.path.dirname(__file__), 'sampahku') # Folder untuk
 # --- Cache Update Variables ---
 _last_update_times = {}
 UPDATE_INTERVAL = 3600 
+BATCH_SLEEP_SECONDS = 60
+FULL_PASS_SLEEP_SECONDS = 21600
 
 # --- Rate Limiting Variables (Ditingkatkan) ---
 _request_timestamps = defaultdict(list)
@@ -91,6 +95,9 @@ def fetch_with_retry(url, adm4=None, retries=5, initial_delay=1):
     """
     Fetches data from a URL with retries and applies rate limiting based on adm4.
     """
+    # Diimpor saat fetch pertama: hanya proses leader yang mengambil data dari BMKG
+    import requests
+
     headers = {'User-Agent': get_random_user_agent()}
 
     # --- Rate Limiting Logic ---
@@ -150,6 +157,96 @@ def fetch_with_retry(url, adm4=None, retries=5, initial_delay=1):
             break
     return None
 
+def _proses_batch(batch, now):
+    """Fetch & simpan cache satu batch link; mengembalikan (jumlah tersimpan, jumlah fetch gagal)."""
+    tersimpan_batch = 0
+    gagal_batch = 0
+
+    for item_link in batch:
+        adm4 = item_link.get('adm4')
+        url = item_link.get('url')
+        if not adm4 or not url:
+            print(f"⚠️ Item link tidak lengkap (adm4: {adm4}, url: {url}), dilewati.")
+            continue
+
+        last_update = _last_update_times.get(adm4, 0)
+        if now - last_update < 43200:  # skip jika sudah update <12 jam lalu
+            continue
+
+        print(f"📥 Fetching data baru untuk: {adm4} dari {url}")
+        fetched_raw_data = fetch_with_retry(url, adm4=adm4)
+        cache_file = os.path.join(CACHE_DIR, f"{adm4}.json")
+
+        data_to_save = None
+        flat_weather_data = []
+
+        if fetched_raw_data:
+            if isinstance(fetched_raw_data, list) and fetched_raw_data:
+                first_entry = fetched_raw_data[0]
+                if isinstance(first_entry, dict) and 'lokasi' in first_entry and 'cuaca' in first_entry:
+                    lokasi = first_entry['lokasi']
+                    cuaca_nested = first_entry.get('cuaca', [])
+                    for sublist in cuaca_nested:
+                        if isinstance(sublist, list):
+                            flat_weather_data.extend(sublist)
+                        elif isinstance(sublist, dict):
+                            flat_weather_data.append(sublist)
+                    analysis_date = flat_weather_data[0].get('analysis_date') if flat_weather_data else None
+                    data_to_save = {
+                        "lokasi": lokasi,
+                        "data": flat_weather_data,
+                        "analysis_date": analysis_date or datetime.datetime.now().isoformat() + 'Z'
+                    }
+                else:
+                    print(f"⚠️ Respon API (list) tidak punya 'lokasi'/'cuaca'. Kosongkan data.")
+                    data_to_save = {
+                        "lokasi": {},
+                        "data": [],
+                        "analysis_date": datetime.datetime.now().isoformat() + 'Z'
+                    }
+            elif isinstance(fetched_raw_data, dict) and 'lokasi' in fetched_raw_data:
+                lokasi = fetched_raw_data['lokasi']
+                flat_weather_data = fetched_raw_data.get('data', [])
+                if not isinstance(flat_weather_data, list):
+                    flat_weather_data = []
+                analysis_date = fetched_raw_data.get('analysis_date') or (flat_weather_data[0].get('analysis_date') if flat_weather_data else None)
+                data_to_save = {
+                    "lokasi": lokasi,
+                    "data": flat_weather_data,
+                    "analysis_date": analysis_date or datetime.datetime.now().isoformat() + 'Z'
+                }
+            else:
+                print(f"⚠️ Respon API bukan format dikenal. Kosongkan data.")
+                data_to_save = {
+                    "lokasi": {},
+                    "data": [],
+                    "analysis_date": datetime.datetime.now().isoformat() + 'Z'
+                }
+        else:
+            print(f"❌ Gagal ambil data dari {url}. Kosongkan data.")
+            gagal_batch += 1
+            data_to_save = {
+                "lokasi": {},
+                "data": [],
+                "analysis_date": datetime.datetime.now().isoformat() + 'Z'
+            }
+
+        if os.path.exists(cache_file):
+            try:
+                timestamp_str = datetime.datetime.now().strftime('%Y%m%d%H%M%S')
+                shutil.move(cache_file, os.path.join(SAMPAH_DIR, f"{adm4}_{timestamp_str}.json"))
+                print(f"🗑️ Pindahkan cache lama: {adm4}.json")
+            except Exception as e:
+                print(f"⚠️ Gagal pindah cache lama: {e}")
+
+        save_cache(adm4, data_to_save)
+        _last_update_times[adm4] = now
+        tersimpan_batch += 1
+        print(f"✅ Cache baru disimpan: {adm4}.json")
+
+        time.sleep(random.uniform(0.2, 0.5))  # delay antar request
+    return tersimpan_batch, gagal_batch
+
 def auto_cache_worker():
     """Worker thread to periodically fetch and cache weather data.
     Versi hemat & selalu update seluruh kelurahan/desa, TANPA dummy."""
@@ -171,94 +268,31 @@ def auto_cache_worker():
             end = min(start + batch_size, total)
             batch = links[start:end]
             print(f"⚙️ Memproses batch {start}-{end-1} dari total {total} lokasi...")
-
-            for item_link in batch:
-                adm4 = item_link.get('adm4')
-                url = item_link.get('url')
-                if not adm4 or not url:
-                    print(f"⚠️ Item link tidak lengkap (adm4: {adm4}, url: {url}), dilewati.")
-                    continue
-
-                last_update = _last_update_times.get(adm4, 0)
-                if now - last_update < 43200:  # skip jika sudah update <12 jam lalu
-                    continue
-
-                print(f"📥 Fetching data baru untuk: {adm4} dari {url}")
-                fetched_raw_data = fetch_with_retry(url, adm4=adm4)
-                cache_file = os.path.join(CACHE_DIR, f"{adm4}.json")
-
-                data_to_save = None
-                flat_weather_data = []
-
-                if fetched_raw_data:
-                    if isinstance(fetched_raw_data, list) and fetched_raw_data:
-                        first_entry = fetched_raw_data[0]
-                        if isinstance(first_entry, dict) and 'lokasi' in first_entry and 'cuaca' in first_entry:
-                            lokasi = first_entry['lokasi']
-                            cuaca_nested = first_entry.get('cuaca', [])
-                            for sublist in cuaca_nested:
-                                if isinstance(sublist, list):
-                                    flat_weather_data.extend(sublist)
-                                elif isinstance(sublist, dict):
-                                    flat_weather_data.append(sublist)
-                            analysis_date = flat_weather_data[0].get('analysis_date') if flat_weather_data else None
-                            data_to_save = {
-                                "lokasi": lokasi,
-                                "data": flat_weather_data,
-                                "analysis_date": analysis_date or datetime.datetime.now().isoformat() + 'Z'
-                            }
-                        else:
-                            print(f"⚠️ Respon API (list) tidak punya 'lokasi'/'cuaca'. Kosongkan data.")
-                            data_to_save = {
-                                "lokasi": {},
-                                "data": [],
-                                "analysis_date": datetime.datetime.now().isoformat() + 'Z'
-                            }
-                    elif isinstance(fetched_raw_data, dict) and 'lokasi' in fetched_raw_data:
-                        lokasi = fetched_raw_data['lokasi']
-                        flat_weather_data = fetched_raw_data.get('data', [])
-                        if not isinstance(flat_weather_data, list):
-                            flat_weather_data = []
-                        analysis_date = fetched_raw_data.get('analysis_date') or (flat_weather_data[0].get('analysis_date') if flat_weather_data else None)
-                        data_to_save = {
-                            "lokasi": lokasi,
-                            "data": flat_weather_data,
-                            "analysis_date": analysis_date or datetime.datetime.now().isoformat() + 'Z'
-                        }
-                    else:
-                        print(f"⚠️ Respon API bukan format dikenal. Kosongkan data.")
-                        data_to_save = {
-                            "lokasi": {},
-                            "data": [],
-                            "analysis_date": datetime.datetime.now().isoformat() + 'Z'
-                        }
-                else:
-                    print(f"❌ Gagal ambil data dari {url}. Kosongkan data.")
-                    data_to_save = {
-                        "lokasi": {},
-                        "data": [],
-                        "analysis_date": datetime.datetime.now().isoformat() + 'Z'
-                    }
-
-                if os.path.exists(cache_file):
-                    try:
-                        timestamp_str = datetime.datetime.now().strftime('%Y%m%d%H%M%S')
-                        shutil.move(cache_file, os.path.join(SAMPAH_DIR, f"{adm4}_{timestamp_str}.json"))
-                        print(f"🗑️ Pindahkan cache lama: {adm4}.json")
-                    except Exception as e:
-                        print(f"⚠️ Gagal pindah cache lama: {e}")
-
-                save_cache(adm4, data_to_save)
-                _last_update_times[adm4] = now
-                print(f"✅ Cache baru disimpan: {adm4}.json")
-
-                time.sleep(random.uniform(0.2, 0.5))  # delay antar request
+            try:
+                tersimpan_batch, gagal_batch = _proses_batch(batch, now)
+            except Exception as e:
+                get_metrik().catat_tugas('auto_cache', False)
+                print(f"❌ Error memproses batch {start}-{end-1}: {e}")
+                time.sleep(BATCH_SLEEP_SECONDS)
+                continue
+
+            # Refresh berikutnya: batch selanjutnya, atau putaran baru jika ini batch terakhir
+            jeda_refresh = BATCH_SLEEP_SECONDS if end < total else BATCH_SLEEP_SECONDS + FULL_PASS_SLEEP_SECONDS
+            if tersimpan_batch:
+                naikkan_versi(DATASET_CACHE, jeda_refresh)
+            else:
+                atur_jadwal_refresh(DATASET_CACHE, jeda_refresh)
+            # Fetch gagal tetap disimpan sebagai cache kosong; batch gagal = semua fetch-nya gagal
+            # (loop refresh rusak, mis. API/jaringan mati), bukan satu-dua fetch yang gagal
+            if gagal_batch:
+                print(f"⚠️ {gagal_batch} fetch gagal di batch {start}-{end-1}.")
+            get_metrik().catat_tugas('auto_cache', not gagal_batch or gagal_batch < tersimpan_batch)
 
             print("⏳ Selesai 1 batch, tidur 60 detik untuk jaga limit...")
-            time.sleep(60)  # total <60 req/menit
+            time.sleep(BATCH_SLEEP_SECONDS)  # total <60 req/menit
 
         print("😴 Semua lokasi selesai update. Tidur 6 jam sebelum ulang...")
-        time.sleep(21600)  # update ≈2–3x sehari
+        time.sleep(FULL_PASS_SLEEP_SECONDS)  # update ≈2–3x sehari
 
 
 def start_auto_cache():
@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, make_response, g
 from flask_cors import CORS
 import os
 import json
@@ -6,13 +6,22 @@ from datetime import datetime
 import subprocess
 import threading
 import time
-import math
 
 from ai_engine import start_auto_cache 
 from data_filter_engine import DataFilterEngine 
-from chatbot_engine import ChatbotEngine 
-from recommendation_module import smart_rekomendasi 
-from laporan_handler import simpan_laporan
+from forecast_index import get_forecast_index
+from laporan_handler import simpan_laporan, simpan_laporan_banyak, lengkapi_adm4_laporan
+from laporan_store import get_laporan_store, HALAMAN_MAX
+from katalog import get_katalog
+from spatial_index import get_indeks_spasial
+from viewport_index import get_indeks_viewport
+from leader_election import LeaderElection
+from filtered_store import get_filtered_store
+from geocoder import get_geocoder
+import shared_data
+from metrics import get_metrik
+from data_version import (DATASET_CACHE, DATASET_FILTERED, info_cache, versi,
+                          naikkan_versi, atur_jadwal_refresh)
 
 app = Flask(__name__)
 
@@ -20,18 +29,34 @@ app = Flask(__name__)
 CORS(app, resources={r"/api/*": {"origins": "https://frontendnie.vercel.app"}})
 
 
-# Direktori penyimpanan laporan
-LAPORAN_DIR = os.path.join(os.path.dirname(__file__), 'laporan')
-os.makedirs(LAPORAN_DIR, exist_ok=True)
-
 # Konstanta
 DEFAULT_LAT = -2.0
 DEFAULT_LON = 118.0
 DATA_FILTER_INTERVAL = 7200  # 2 jam
+FOLLOWER_POLL_SECONDS = 30
 
 # Inisialisasi instance
 data_filter_instance = DataFilterEngine()
-chatbot_instance = ChatbotEngine()
+
+# Modul berat (ChatbotEngine + indeksnya, recommendation_module + pytz) tidak diimpor saat import app:
+# pemanasan data di thread latar (status di /ready) yang pertama memuatnya, atau request pertama.
+_chatbot = None
+_chatbot_lock = threading.Lock()
+
+def get_chatbot():
+    """ChatbotEngine bersama untuk proses ini (chatbot_engine diimpor saat pertama dipakai)."""
+    global _chatbot
+    if _chatbot is None:
+        with _chatbot_lock:
+            if _chatbot is None:
+                from chatbot_engine import ChatbotEngine
+                _chatbot = ChatbotEngine()
+    return _chatbot
+
+def _rekomendasi():
+    """recommendation_module, diimpor saat pertama dipakai."""
+    import recommendation_module
+    return recommendation_module
 
 # ✅ Jalankan hanya jika bukan di server hosting
 def is_running_on_localhost():
@@ -43,19 +68,100 @@ def scheduled_data_filter_task():
     while True:
         try:
             print("🚀 Memulai proses filter data terjadwal...")
-            data_filter_instance.run_filter_process()
-            print("🔄 Memuat ulang data yang difilter ke dalam ChatbotEngine...")
-            chatbot_instance.load_filtered_data()
+            tersimpan = data_filter_instance.run_filter_process()
+            if tersimpan:
+                naikkan_versi(DATASET_FILTERED, DATA_FILTER_INTERVAL)
+            else:
+                atur_jadwal_refresh(DATASET_FILTERED, DATA_FILTER_INTERVAL)
+            # Mode SHARED_DATA: pemuatan ulang dilakukan pemantau master (shared_data.pantau)
+            if not shared_data.aktif():
+                print("🔄 Memuat ulang data yang difilter ke dalam ChatbotEngine...")
+                get_chatbot().load_filtered_data()
+            get_metrik().catat_tugas('filter_data', True)
         except Exception as e:
+            get_metrik().catat_tugas('filter_data', False)
             print(f"❌ Error: {e}")
         time.sleep(DATA_FILTER_INTERVAL)
 
-# Startup tasks
-print("Starting AI Engine auto-caching...")
-start_auto_cache()
+def mulai_scheduler():
+    print("Starting AI Engine auto-caching...")
+    start_auto_cache()
+
+    print("Starting background data filtering...")
+    threading.Thread(target=scheduled_data_filter_task, daemon=True).start()
+
+# Follower: data dibuat oleh leader; cukup muat ulang ChatbotEngine saat versi 'filtered' naik
+def pantau_data_filtered():
+    versi_id = versi(DATASET_FILTERED).get('id')
+    while not pemilihan_leader.is_leader:
+        time.sleep(FOLLOWER_POLL_SECONDS)
+        versi_baru = versi(DATASET_FILTERED).get('id')
+        if versi_baru != versi_id and not pemilihan_leader.is_leader:
+            versi_id = versi_baru
+            print("🔄 Data filter baru dari leader, memuat ulang ChatbotEngine...")
+            try:
+                get_chatbot().load_filtered_data()
+            except Exception as e:
+                print(f"❌ Error: {e}")
+
+# Semua data serving (store, indeks turunan, prakiraan, katalog, chatbot) untuk generasi saat ini
+def muat_data_serving():
+    get_filtered_store().refresh()
+    get_indeks_spasial()
+    get_indeks_viewport()
+    get_geocoder()
+    get_forecast_index().refresh()
+    get_katalog().hewan
+    _rekomendasi()
+    try:
+        get_chatbot().load_filtered_data()
+    except Exception as e:
+        print(f"❌ Error memuat ChatbotEngine: {e}")
 
-print("Starting background data filtering...")
-threading.Thread(target=scheduled_data_filter_task, daemon=True).start()
+# Status pemanasan data untuk /ready
+status_pemanasan = {"selesai": False, "durasi_detik": None, "error": None}
+
+def pemanasan_data():
+    mulai = time.perf_counter()
+    try:
+        muat_data_serving()
+    except Exception as e:
+        status_pemanasan["error"] = str(e)
+        print(f"❌ Error pemanasan data: {e}")
+    status_pemanasan["durasi_detik"] = round(time.perf_counter() - mulai, 3)
+    status_pemanasan["selesai"] = True
+    print(f"✅ Data serving siap dalam {status_pemanasan['durasi_detik']}s")
+
+# Laporan lama (impor folder) baru bisa dikaitkan ke adm4 setelah indeks spasial siap.
+# Selalu di worker, tidak pernah di master SHARED_DATA: koneksi SQLite tidak boleh terbawa fork.
+def lengkapi_adm4_latar():
+    try:
+        lengkapi_adm4_laporan()
+    except Exception as e:
+        print(f"❌ Error melengkapi adm4 laporan: {e}")
+
+def pemanasan_worker():
+    pemanasan_data()
+    lengkapi_adm4_latar()
+
+# Startup tasks: dengan beberapa worker (gunicorn -w N) hanya satu yang menjalankan scheduler.
+# Mode SHARED_DATA (gunicorn --preload, lihat shared_data.py): kode ini berjalan di master,
+# data dimuat sekali di sini dan worker hasil fork berbagi memorinya.
+# Mode biasa: data dimuat di thread latar agar worker langsung menerima koneksi (/health, /ready);
+# request data yang datang lebih dulu menunggu lock store yang sama, bukan memuat dua kali.
+pemilihan_leader = LeaderElection(mulai_scheduler)
+if shared_data.aktif():
+    shared_data.muat(pemanasan_data)
+    shared_data.pantau(muat_data_serving)
+    # Scheduler berjalan di master (leader); worker tidak mewarisi status leader maupun fd lock-nya
+    shared_data.saat_fork(pemilihan_leader.setelah_fork)
+    shared_data.saat_fork(lambda: threading.Thread(target=lengkapi_adm4_latar, daemon=True).start())
+else:
+    threading.Thread(target=pemanasan_worker, daemon=True).start()
+if os.environ.get("SCHEDULER_ENABLED", "1") == "0":
+    print("🟡 Scheduler dinonaktifkan (SCHEDULER_ENABLED=0)")
+elif not pemilihan_leader.mulai() and not shared_data.aktif():
+    threading.Thread(target=pantau_data_filtered, daemon=True).start()
 
 # ✅ Jangan jalankan file mover jika di server Linux (PythonAnywhere)
 if os.name == 'nt':
@@ -72,19 +178,139 @@ if os.name == 'nt':
 else:
     print("🟡 Lewati Recycle Bin file mover (bukan Windows)")
 
+# --- Conditional GET (ETag / 304 / Cache-Control) ---
+
+def _respon_bercache(datasets, kunci, buat_body, pakai_bucket_waktu=False):
+    """
+    Membungkus endpoint baca: ETag dari versi data + query, 304 tanpa menghitung ulang
+    jika If-None-Match cocok, dan max-age sampai refresh terjadwal berikutnya (hanya GET/HEAD).
+    buat_body: callable yang mengembalikan dict untuk jsonify (hanya dipanggil jika perlu),
+    atau tuple (dict, status) untuk respons error yang tidak boleh di-cache.
+    """
+    # POST (mis. /api/search) tidak di-cache: tanpa ETag/304/Cache-Control public
+    bisa_cache = request.method in ('GET', 'HEAD')
+    if bisa_cache:
+        etag, max_age = info_cache(datasets, f"{request.path}?{kunci}", pakai_bucket_waktu, ekstra=get_katalog().versi)
+    if bisa_cache and request.if_none_match.contains_weak(etag):
+        response = make_response('', 304)
+    else:
+        hasil = buat_body()
+        if isinstance(hasil, tuple):
+            return jsonify(hasil[0]), hasil[1]
+        response = make_response(jsonify(hasil))
+    if bisa_cache:
+        response.set_etag(etag)
+        response.cache_control.max_age = max_age
+        response.cache_control.public = True
+    return response
+
 # --- Flask Endpoints ---
 
+def _koordinat(nilai):
+    try:
+        return float(nilai) if nilai is not None else None
+    except (ValueError, TypeError):
+        return None
+
+# --- Metrik (Prometheus) ---
+
+@app.before_request
+def _mulai_timer():
+    g.mulai_request = time.perf_counter()
+
+@app.after_request
+def _catat_metrik(response):
+    mulai = g.pop('mulai_request', None)
+    if mulai is not None:
+        # Label route = pola URL (mis. /api/laporan), bukan path mentah: kardinalitas tetap kecil
+        route = request.url_rule.rule if request.url_rule else 'tidak_dikenal'
+        ukuran = None if response.direct_passthrough else response.calculate_content_length()
+        get_metrik().catat_request(route, request.method, response.status_code,
+                                   time.perf_counter() - mulai, ukuran)
+    return response
+
+def _umur_data():
+    now = time.time()
+    hasil = []
+    for dataset in (DATASET_CACHE, DATASET_FILTERED):
+        diperbarui = versi(dataset).get('diperbarui')
+        hasil.append(({"dataset": dataset}, now - diperbarui if diperbarui else None))
+    return hasil
+
+def _jumlah_lokasi():
+    return [({"sumber": "filtered"}, get_filtered_store().status()['jumlah_lokasi']),
+            ({"sumber": "cache"}, get_forecast_index().status()['jumlah_lokasi']),
+            ({"sumber": "chatbot"}, len(_chatbot.lokasi_data) if _chatbot else 0)]
+
+metrik = get_metrik()
+metrik.gauge("data_umur_detik", "Detik sejak dataset terakhir diperbarui (data_version.json).", _umur_data)
+metrik.gauge("data_generasi", "Generasi dataset (data_version.json).",
+             lambda: [({"dataset": d}, versi(d).get('generasi', 0)) for d in (DATASET_CACHE, DATASET_FILTERED)])
+metrik.gauge("lokasi_jumlah", "Jumlah lokasi yang dimuat di proses ini.", _jumlah_lokasi)
+metrik.gauge("pemanasan_selesai", "1 jika data serving selesai dimuat (lihat /ready).",
+             lambda: status_pemanasan["selesai"])
+metrik.gauge("scheduler_leader", "1 jika proses ini menjalankan scheduler (leader).",
+             lambda: pemilihan_leader.is_leader)
+metrik.gauge("chatbot_dimuat", "1 jika ChatbotEngine sudah memuat data.",
+             lambda: _chatbot is not None and _chatbot.loaded)
+metrik.gauge("chatbot_cache_jawaban", "Cache jawaban chatbot: hit & miss kumulatif, jumlah entri.",
+             lambda: [({"jenis": k}, v) for k, v in (_chatbot.cache_jawaban.status() if _chatbot else {}).items()
+                      if k in ("hit", "miss", "ukuran")])
+
+@app.route('/metrics')
+def metrics():
+    resp = make_response(metrik.render())
+    resp.headers['Content-Type'] = 'text/plain; version=0.0.4; charset=utf-8'
+    return resp
+
+# --- Liveness & readiness ---
+
+@app.route('/health')
+def health():
+    """Liveness: proses hidup dan bisa melayani request (tidak menyentuh data)."""
+    return jsonify({"status": "ok"})
+
+def _status_chatbot():
+    """Status ChatbotEngine untuk /ready, tanpa mengimpor chatbot_engine jika belum dipakai."""
+    if _chatbot is None:
+        return {"dimuat": False, "generasi": 0, "jumlah_lokasi": 0, "durasi_muat_detik": {}, "cache_jawaban": {}}
+    return {"dimuat": _chatbot.loaded, "generasi": _chatbot.generasi,
+            "jumlah_lokasi": len(_chatbot.lokasi_data),
+            "durasi_muat_detik": {tahap: round(detik, 3) for tahap, detik in _chatbot.durasi_muat.items()},
+            "cache_jawaban": _chatbot.cache_jawaban.status()}
+
+@app.route('/ready')
+def ready():
+    """Readiness: 200 setelah data serving selesai dimuat, 503 selama pemanasan. Tidak memicu pemuatan."""
+    body = {
+        "ready": status_pemanasan["selesai"],
+        "pemanasan": status_pemanasan,
+        "datasets": {
+            DATASET_FILTERED: get_filtered_store().status(),
+            DATASET_CACHE: get_forecast_index().status(),
+            "katalog": get_katalog().status(),
+            "chatbot": _status_chatbot(),
+        },
+    }
+    return jsonify(body), 200 if body["ready"] else 503
+
 @app.route('/api/laporan', methods=['POST'])
 def api_laporan():
     data = request.json
-    if 'waktu' not in data:
-        data['waktu'] = datetime.now().isoformat()
-    try:
-        data['lat'] = float(data.get('lat', DEFAULT_LAT))
-        data['lon'] = float(data.get('lon', DEFAULT_LON))
-    except (ValueError, TypeError):
-        data['lat'], data['lon'] = DEFAULT_LAT, DEFAULT_LON
+    # Body berupa list = impor banyak laporan sekaligus (geocoding batch, satu transaksi)
+    laporan_list = data if isinstance(data, list) else [data]
+    if not all(isinstance(laporan, dict) for laporan in laporan_list):
+        return jsonify({"status": "error", "message": "Format laporan tidak valid."}), 400
+    for laporan in laporan_list:
+        if 'waktu' not in laporan:
+            laporan['waktu'] = datetime.now().isoformat()
+        # lat/lon kosong atau tidak valid dibiarkan None: di-geocode dari 'lokasi', lalu fallback ke default
+        laporan['lat'] = _koordinat(laporan.get('lat'))
+        laporan['lon'] = _koordinat(laporan.get('lon'))
     try:
+        if isinstance(data, list):
+            jumlah = simpan_laporan_banyak(laporan_list)
+            return jsonify({"status": "ok", "message": f"{jumlah} laporan berhasil disimpan."}), 201
         simpan_laporan(data)
         return jsonify({"status": "ok", "message": "Laporan berhasil disimpan."}), 201
     except Exception as e:
@@ -92,42 +318,140 @@ def api_laporan():
 
 @app.route('/api/all_laporan', methods=['GET'])
 def api_all_laporan():
-    files = [f for f in os.listdir(LAPORAN_DIR) if f.endswith('.json')]
-    data = []
-    for file in files:
-        try:
-            with open(os.path.join(LAPORAN_DIR, file), 'r', encoding='utf-8') as f:
-                data.append(json.load(f))
-        except Exception as e:
-            print(f"Error reading file {file}: {e}")
-    return jsonify({"laporan": data})
-
-@app.route('/api/search', methods=['POST'])
+    """
+    Daftar laporan (terbaru dulu). Tanpa parameter: semua laporan seperti sebelumnya.
+    Opsional: limit + cursor (paginasi), kategori, adm4, sejak/sampai (ISO), bbox=west,south,east,north.
+    """
+    try:
+        limit = request.args.get('limit')
+        limit = max(1, min(int(limit), HALAMAN_MAX)) if limit else None
+        bbox = request.args.get('bbox')
+        if bbox:
+            west, south, east, north = (float(v) for v in bbox.split(','))
+            bbox = (south, west, north, east)
+        laporan, next_cursor = get_laporan_store().daftar(
+            limit=limit,
+            cursor=request.args.get('cursor'),
+            kategori=request.args.get('kategori'),
+            adm4=request.args.get('adm4'),
+            sejak=request.args.get('sejak'),
+            sampai=request.args.get('sampai'),
+            bbox=bbox,
+        )
+    except ValueError:
+        return jsonify({"error": "Invalid limit/cursor/bbox"}), 400
+
+    hasil = {"laporan": laporan}
+    if limit is not None:
+        hasil["next_cursor"] = next_cursor
+    return jsonify(hasil)
+
+def _format_alasan(nilai):
+    """format=kode mengaktifkan alasan ringkas; nilai lain kembali ke teks lengkap."""
+    rekomendasi = _rekomendasi()
+    return rekomendasi.FORMAT_KODE if (nilai or '').lower().strip() == rekomendasi.FORMAT_KODE else rekomendasi.FORMAT_TEKS
+
+@app.route('/api/search', methods=['GET', 'POST'])
 def search():
-    keyword = request.json.get('keyword', '').lower().strip()
-    results = smart_rekomendasi(keyword)
-    return jsonify({"keyword": keyword, "rekomendasi": results})
+    # GET ?keyword= bisa di-cache browser (ETag/304); POST tetap didukung untuk frontend lama
+    body = (request.get_json(silent=True) or {}) if request.method == 'POST' else {}
+    keyword = (body.get('keyword') or request.args.get('keyword', '')).lower().strip()
+    format_alasan = _format_alasan(body.get('format') or request.args.get('format'))
+
+    def buat_body():
+        results = _rekomendasi().smart_rekomendasi(keyword, format_alasan)
+        return {"keyword": keyword, "format": format_alasan, "rekomendasi": results}
+
+    return _respon_bercache([DATASET_CACHE], f"keyword={keyword}&format={format_alasan}", buat_body, pakai_bucket_waktu=True)
 
 @app.route('/api/all', methods=['GET'])
 def all_lokasi():
-    results = smart_rekomendasi('')
-    return jsonify({"lokasi": results})
+    format_alasan = _format_alasan(request.args.get('format'))
+
+    def buat_body():
+        results = _rekomendasi().smart_rekomendasi('', format_alasan)
+        return {"format": format_alasan, "lokasi": results}
+
+    return _respon_bercache([DATASET_CACHE], f"format={format_alasan}", buat_body, pakai_bucket_waktu=True)
+
+TOP_K_DEFAULT = 10
+TOP_K_MAX = 500
+
+@app.route('/api/top-lokasi', methods=['GET'])
+def api_top_lokasi():
+    """K desa terbaik saat ini untuk satu hewan/sayuran: ?nama=Kambing&k=10[&tipe=hewan|sayuran]"""
+    nama = request.args.get('nama', '').strip()
+    tipe = request.args.get('tipe', '').lower().strip() or None
+    if not nama:
+        return jsonify({"error": "Parameter 'nama' wajib diisi"}), 400
+    if tipe not in (None, 'hewan', 'sayuran'):
+        return jsonify({"error": "Parameter 'tipe' harus 'hewan' atau 'sayuran'"}), 400
+    try:
+        k = int(request.args.get('k', TOP_K_DEFAULT))
+    except (TypeError, ValueError):
+        return jsonify({"error": "Invalid k"}), 400
+    k = max(1, min(k, TOP_K_MAX))
+
+    def buat_body():
+        tipe_item, item = _rekomendasi().cari_item_katalog(nama, tipe)
+        if not item:
+            return {"error": f"Item '{nama}' tidak ditemukan di katalog"}, 404
+        return {
+            "nama": item["nama"],
+            "tipe": tipe_item,
+            "ideal": {"suhu_min": item["suhu_min"], "suhu_max": item["suhu_max"],
+                      "hu_min": item["hu_min"], "hu_max": item["hu_max"]},
+            "k": k,
+            "lokasi": _rekomendasi().top_lokasi(item, k),
+        }
+
+    return _respon_bercache([DATASET_CACHE], f"nama={nama.lower()}&tipe={tipe}&k={k}", buat_body, pakai_bucket_waktu=True)
+
+@app.route('/api/alasan-template', methods=['GET'])
+def api_alasan_template():
+    """Tabel template untuk menerjemahkan kode alasan (format=kode) di sisi klien."""
+    return jsonify(_rekomendasi().alasan_template())
 
 @app.route('/api/chatbot', methods=['POST'])
 def chatbot():
     user_input = request.json.get('keyword', '').strip()
     if not user_input:
         return jsonify({"jawaban": "Mohon berikan pertanyaan Anda."}), 400
-    jawaban = chatbot_instance.process_query(user_input)
+    jawaban = get_chatbot().process_query(user_input)
     return jsonify({"jawaban": jawaban})
 
-def haversine(lat1, lon1, lat2, lon2):
-    R = 6371
-    d_lat = math.radians(lat2 - lat1)
-    d_lon = math.radians(lon2 - lon1)
-    a = math.sin(d_lat/2)**2 + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(d_lon/2)**2
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
-    return R * c
+CHATBOT_BATCH_MAX = 100
+
+@app.route('/api/chatbot/batch', methods=['POST'])
+def chatbot_batch():
+    """
+    Banyak pertanyaan dalam satu request: body {"pertanyaan": [...]} (atau list langsung).
+    Jawaban sejajar dengan input, masing-masing dengan durasi_ms; pertanyaan kosong dijawab
+    seperti /api/chatbot tanpa ikut diproses.
+    """
+    data = request.get_json(silent=True)
+    pertanyaan_list = data.get('pertanyaan') if isinstance(data, dict) else data
+    if not isinstance(pertanyaan_list, list) or not all(isinstance(p, str) for p in pertanyaan_list):
+        return jsonify({"error": "Body harus berisi 'pertanyaan': list string."}), 400
+    if not pertanyaan_list:
+        return jsonify({"error": "Mohon berikan pertanyaan Anda."}), 400
+    if len(pertanyaan_list) > CHATBOT_BATCH_MAX:
+        return jsonify({"error": f"Maksimal {CHATBOT_BATCH_MAX} pertanyaan per batch."}), 400
+
+    mulai = time.perf_counter()
+    terisi = [p for p in pertanyaan_list if p.strip()]
+    dijawab = iter(get_chatbot().process_batch(terisi))
+    hasil = [next(dijawab) if p.strip() else
+             {"pertanyaan": p, "jawaban": "Mohon berikan pertanyaan Anda.", "durasi_ms": 0.0, "duplikat": False}
+             for p in pertanyaan_list]
+    return jsonify({
+        "hasil": hasil,
+        "jumlah": len(hasil),
+        "unik": sum(1 for h in hasil if not h["duplikat"] and h["pertanyaan"].strip()),
+        "durasi_ms": round((time.perf_counter() - mulai) * 1000, 3),
+    })
+
+NEAREST_K_MAX = 100
 
 @app.route('/api/nearest-location', methods=['GET'])
 def nearest_location():
@@ -137,32 +461,31 @@ def nearest_location():
     except (TypeError, ValueError):
         return jsonify({"error": "Invalid lat/lon"}), 400
 
-    data_filtered_dir = os.path.join(os.path.dirname(__file__), 'data_filtered')
-    data_files = [f for f in os.listdir(data_filtered_dir) if f.endswith('.json')]
-
-    nearest = None
-    min_distance = float('inf')
+    # k: jumlah lokasi terdekat; radius_km: batasi hanya lokasi dalam radius (km)
+    try:
+        radius_km = request.args.get('radius_km')
+        radius_km = float(radius_km) if radius_km not in (None, '') else None
+        k_default = NEAREST_K_MAX if radius_km is not None else 1
+        k = int(request.args.get('k', k_default))
+    except (TypeError, ValueError):
+        return jsonify({"error": "Invalid k/radius_km"}), 400
+    if radius_km is not None and radius_km <= 0:
+        return jsonify({"error": "Invalid k/radius_km"}), 400
+    k = max(1, min(k, NEAREST_K_MAX))
 
-    for file in data_files:
-        try:
-            with open(os.path.join(data_filtered_dir, file), 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            if data.get('lat') is not None and data.get('lon') is not None:
-                distance = haversine(user_lat, user_lon, data['lat'], data['lon'])
-                if distance < min_distance:
-                    min_distance = distance
-                    nearest = data
-        except Exception as e:
-            print(f"Error reading file {file}: {e}")
+    return _respon_bercache([DATASET_FILTERED], f"lat={user_lat!r}&lon={user_lon!r}&k={k}&radius_km={radius_km!r}",
+                            lambda: _hitung_lokasi_terdekat(user_lat, user_lon, k, radius_km))
 
-    if not nearest:
-        return jsonify({"error": "No data found"}), 404
+def _hitung_lokasi_terdekat(user_lat, user_lon, k=1, radius_km=None):
+    # KD-tree di memori (dibangun ulang hanya saat data_filtered berubah), tanpa I/O file per request
+    hasil = get_indeks_spasial().terdekat(user_lat, user_lon, k, radius_km)
+    if not hasil:
+        return {"error": "No data found"}, 404
+    min_distance, nearest = hasil[0]
 
-    data_dir = os.path.join(os.path.dirname(__file__), 'data')
-    with open(os.path.join(data_dir, 'hewan_cocok.json'), 'r', encoding='utf-8') as f:
-        hewan_list = json.load(f)
-    with open(os.path.join(data_dir, 'sayuran_cocok.json'), 'r', encoding='utf-8') as f:
-        sayuran_list = json.load(f)
+    katalog = get_katalog()
+    hewan_list = katalog.hewan
+    sayuran_list = katalog.sayuran
 
     suhu = nearest.get('cuaca_saat_ini', {}).get('suhu')
     hu = nearest.get('cuaca_saat_ini', {}).get('kelembapan')
@@ -175,9 +498,7 @@ def nearest_location():
     def calc_skor(item):
         if suhu is None or hu is None:
             return 0
-        ideal_suhu = (item['suhu_min'] + item['suhu_max']) / 2
-        ideal_hu = (item['hu_min'] + item['hu_max']) / 2
-        skor = 100 - (abs(suhu - ideal_suhu) + abs(hu - ideal_hu))
+        skor = 100 - (abs(suhu - item['suhu_mid']) + abs(hu - item['hu_mid']))
         return max(min(round(skor, 2), 100), 0)
 
     def get_alasan(item):
@@ -208,8 +529,10 @@ def nearest_location():
         if skor >= 70:
             rekom_sayur.append(s['nama'])
 
-    return jsonify({
-        "lokasi_terdekat": nearest,
+    return {
+        "lokasi_terdekat": nearest.ke_dict(),
+        "jarak_km": round(min_distance, 3),
+        "lokasi_sekitar": [dict(data.ke_dict(), jarak_km=round(jarak, 3)) for jarak, data in hasil],
         "rekomendasi": {
             "hewan": rekom_hewan,
             "sayuran": rekom_sayur
@@ -218,7 +541,33 @@ def nearest_location():
             "hewan": penilaian_hewan,
             "sayuran": penilaian_sayur
         }
-    })
+    }
+
+
+@app.route('/api/viewport', methods=['GET'])
+def api_viewport():
+    """
+    Lokasi di dalam bbox peta. bbox = "west,south,east,north" (format Leaflet toBBoxString)
+    atau min_lat/min_lon/max_lat/max_lon. Zoom rendah -> cluster grid, zoom tinggi -> titik.
+    Cluster = sel grid utuh yang berpotongan dengan bbox; jumlah_lokasi = lokasi di dalam bbox (kedua mode).
+    """
+    try:
+        if request.args.get('bbox'):
+            min_lon, min_lat, max_lon, max_lat = (float(v) for v in request.args['bbox'].split(','))
+        else:
+            min_lat = float(request.args.get('min_lat'))
+            min_lon = float(request.args.get('min_lon'))
+            max_lat = float(request.args.get('max_lat'))
+            max_lon = float(request.args.get('max_lon'))
+        zoom = int(request.args.get('zoom'))
+    except (TypeError, ValueError):
+        return jsonify({"error": "Invalid bbox/zoom"}), 400
+    if min_lat > max_lat or min_lon > max_lon:
+        return jsonify({"error": "Invalid bbox/zoom"}), 400
+
+    return _respon_bercache([DATASET_FILTERED],
+                            f"bbox={min_lat!r},{min_lon!r},{max_lat!r},{max_lon!r}&zoom={zoom}",
+                            lambda: get_indeks_viewport().query(zoom, min_lat, min_lon, max_lat, max_lon))
 
 
 if __name__ == '__main__':
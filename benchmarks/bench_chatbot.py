@@ -0,0 +1,216 @@
+# benchmarks/bench_chatbot.py
+"""
+Latensi ChatbotEngine.process_question atas korpus pertanyaan: CONTOH_PERTANYAAN di
+chatbot_engine.py, pertanyaan belajar/*.json, dan pertanyaan lokasi/entitas (nama tepat,
+alias, typo, tidak dikenal) yang dibangkitkan dari data lokasi. Laporan p50/p95/p99 per intent
+dan per jalur pencarian lokasi (exact per level, alias, fuzzy, tidak ketemu):
+
+    python benchmarks/bench_chatbot.py --desa 20000 --pertanyaan 2000
+
+Tanpa --data, data_filtered sintetis sebanyak --desa ditulis ke folder sementara. Cache jawaban
+dikosongkan sebelum tiap pertanyaan (yang diukur jalur lengkapnya), kecuali --dengan-cache.
+"""
+import os
+import sys
+import glob
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+SUKU_KATA = ["ka", "ma", "sa", "ra", "ta", "ja", "ba", "su", "ngan", "jaya", "sari", "wa", "di", "ri", "lo",
+             "pu", "tu", "mu", "ne", "ge", "kar", "tan", "ban", "sem", "pe", "ci", "go", "ro", "ni", "de",
+             "rejo", "harjo", "kulon", "wetan"]
+AWALAN_DESA = ["", "", "", "Sumber ", "Karang ", "Tanjung ", "Sungai ", "Batu "]
+KOTA_NYATA = ["Jakarta", "Bandung", "Surabaya", "Medan", "Binjai", "Indramayu", "Semarang", "Makassar"]
+CUACA = ["Cerah", "Cerah Berawan", "Berawan", "Hujan Ringan", "Hujan Sedang", "Kabut"]
+
+# Intent yang mencari lokasi: indeks grup nama lokasi (lihat ChatbotEngine._jawab)
+GRUP_LOKASI = {'cuaca_lokasi': 0, 'lokasi_info': 2, 'koordinat': 0, 'cuaca_detail': 0, 'suhu_max': 1,
+               'suhu_min': 1, 'kelembapan': 0, 'ringkasan_cuaca': 1, 'cocok_dipelihara': 1, 'cocok_ditanam': 1}
+POLA_LOKASI = ["cuaca di {}", "dimana letak {}", "koordinat {}", "bagaimana cuaca hari ini di {}",
+               "suhu tertinggi di {}", "suhu terendah di {}", "kelembapan di {}", "ringkasan cuaca di {}"]
+
+def buat_nama(rng, suku=None):
+    return "".join(rng.choice(SUKU_KATA) for _ in range(suku or rng.choice([2, 3, 3, 4]))).capitalize()
+
+def tulis_data_sintetis(folder, jumlah_desa, rng):
+    """File data_filtered sintetis dengan struktur & alias seperti DataFilterEngine."""
+    provinsi = [buat_nama(rng, 3) for _ in range(38)]
+    kotkab = [(f"Kota {nama}" if nama in KOTA_NYATA else f"Kab. {nama}", rng.choice(provinsi))
+              for nama in KOTA_NYATA + [buat_nama(rng) for _ in range(max(10, jumlah_desa // 160))]]
+    kecamatan = [(buat_nama(rng), rng.choice(kotkab)) for _ in range(max(20, jumlah_desa // 12))]
+    for i in range(jumlah_desa):
+        kec, (kab, prov) = rng.choice(kecamatan)
+        desa = rng.choice(AWALAN_DESA) + buat_nama(rng)
+        adm4 = f"{i // 100000:02d}.{i // 1000 % 100:02d}.{i // 10 % 100:02d}.{i:04d}"
+        t_min = round(rng.uniform(12, 26), 1)
+        t_max = round(t_min + rng.uniform(4, 12), 1)
+        data = {
+            "provinsi": prov, "kotkab": kab, "kecamatan": kec, "desa": desa,
+            "lon": round(rng.uniform(95, 141), 6), "lat": round(rng.uniform(-11, 6), 6),
+            "timezone": "+07:00", "adm4": adm4,
+            "cuaca_saat_ini": {"suhu": round(rng.uniform(t_min, t_max), 1), "kelembapan": rng.randint(55, 98),
+                               "cuaca": rng.choice(CUACA)},
+            "ringkasan_harian": {"t_max": t_max, "t_min": t_min, "t_avg": round((t_min + t_max) / 2, 1),
+                                 "hu_avg": round(rng.uniform(60, 95), 1), "cuaca_dominan": rng.choice(CUACA)},
+            "alias": sorted({desa, f"{desa} {kec}", f"{desa}, {kec}", f"{desa} {kec} {kab}", f"{desa}, {kec}, {kab}",
+                             f"{desa} {kec} {kab} {prov}", f"{desa}, {kec}, {kab}, {prov}", adm4}),
+        }
+        with open(os.path.join(folder, f"{adm4}.json"), "w", encoding="utf-8") as f:
+            json.dump(data, f)
+
+def typo(teks, rng):
+    huruf = list(teks)
+    for _ in range(rng.choice([1, 1, 2])):
+        j = rng.randrange(len(huruf))
+        operasi = rng.choice("hsgt")
+        if operasi == "h" and len(huruf) > 4:
+            del huruf[j]
+        elif operasi == "s":
+            huruf[j] = rng.choice("aiueonkrst")
+        elif operasi == "g" and j + 1 < len(huruf):
+            huruf[j], huruf[j + 1] = huruf[j + 1], huruf[j]
+        else:
+            huruf.insert(j, rng.choice("aiueonkrst"))
+    return "".join(huruf)
+
+def buat_korpus(lokasi_list, hewan, sayuran, jumlah, rng):
+    """(pertanyaan, sumber): contoh bawaan, belajar/*.json, lalu pertanyaan bangkitan sebanyak jumlah."""
+    from chatbot_engine import CONTOH_PERTANYAAN
+
+    korpus = [(q, "contoh") for q in CONTOH_PERTANYAAN]
+    for path in sorted(glob.glob(os.path.join(BACKEND_DIR, "belajar", "*.json"))):
+        with open(path, encoding="utf-8") as f:
+            korpus.append((json.load(f)["question"], "belajar"))
+
+    def nama_lokasi():
+        lokasi = rng.choice(lokasi_list)
+        jenis = rng.choices(["desa", "wilayah", "alias", "typo", "asing"], weights=[3, 2, 2, 3, 1])[0]
+        if jenis == "desa":
+            return lokasi["desa"]
+        if jenis == "wilayah":
+            return lokasi[rng.choice(["kecamatan", "kotkab", "provinsi"])]
+        if jenis == "alias":
+            return rng.choice(lokasi["alias"])
+        if jenis == "typo":
+            return typo(rng.choice([lokasi["desa"], lokasi["kecamatan"], rng.choice(lokasi["alias"])]), rng)
+        return buat_nama(rng, 4)
+
+    entitas = [item["nama"] for item in hewan + sayuran]
+    for _ in range(jumlah):
+        jenis = rng.choices(["lokasi", "cocok_di_mana", "cocok_hewan", "cocok_sayuran", "daftar"],
+                            weights=[12, 2, 2, 2, 1])[0]
+        if jenis == "lokasi":
+            q = rng.choice(POLA_LOKASI).format(nama_lokasi())
+        elif jenis == "cocok_di_mana":
+            nama = rng.choice(entitas)
+            q = f"{typo(nama, rng) if rng.random() < 0.3 else nama} cocok di mana"
+        elif jenis == "cocok_hewan":
+            q = f"apakah {rng.choice(hewan)['nama']} cocok dipelihara di {nama_lokasi()}?"
+        elif jenis == "cocok_sayuran":
+            q = f"apakah {rng.choice(sayuran)['nama']} cocok ditanam di {nama_lokasi()}?"
+        else:
+            lokasi = rng.choice(lokasi_list)
+            q = rng.choice(["provinsi apa saja", "daftar hewan", "daftar sayuran", "kecamatan apa saja",
+                            f"kecamatan apa saja di {lokasi['kotkab']}",
+                            f"desa apa saja di {lokasi['kecamatan']} halaman {rng.randint(1, 3)}"])
+        korpus.append((q if rng.random() < 0.5 else q.capitalize(), "bangkitan"))
+    return korpus
+
+def jalur_lokasi(engine, nama):
+    """Jalur find_lokasi untuk nama: exact:<level>, alias, fuzzy, atau tidak_ketemu."""
+    from chatbot_engine import LEVEL_LOKASI
+
+    nama = nama.lower().strip()
+    for level in LEVEL_LOKASI:
+        if nama in engine.lokasi_index[level]:
+            return "alias" if level == "alias" else f"exact:{level}"
+    return "fuzzy" if engine.find_lokasi(nama)[1] else "tidak_ketemu"
+
+def persentil(data_urut, p):
+    """Persentil nearest-rank dari list yang sudah diurutkan."""
+    return data_urut[max(0, min(len(data_urut) - 1, -(-len(data_urut) * p // 100) - 1))]
+
+def cetak_tabel(judul, kelompok):
+    print(f"\n{judul:22} {'n':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for nama, waktu in sorted(kelompok.items(), key=lambda kv: -len(kv[1])):
+        waktu = sorted(waktu)
+        print(f"{nama:22} {len(waktu):>6} " + " ".join(f"{persentil(waktu, p) * 1000:>9.3f}" for p in (50, 95, 99))
+              + f" {waktu[-1] * 1000:>9.3f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", help="folder data_filtered yang sudah ada (default: data sintetis)")
+    parser.add_argument("--desa", type=int, default=20000, help="jumlah desa data sintetis")
+    parser.add_argument("--pertanyaan", type=int, default=2000, help="jumlah pertanyaan bangkitan")
+    parser.add_argument("--ulang", type=int, default=1, help="berapa kali korpus dijalankan")
+    parser.add_argument("--dengan-cache", action="store_true", help="jangan kosongkan cache jawaban per pertanyaan")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    folder_sementara = None
+    if args.data is None:
+        folder_sementara = args.data = tempfile.mkdtemp(prefix="bench_chatbot_")
+        mulai = time.perf_counter()
+        tulis_data_sintetis(folder_sementara, args.desa, rng)
+        print(f"Data sintetis: {args.desa} desa ditulis dalam {time.perf_counter() - mulai:.1f}s")
+    # Harus diatur sebelum filtered_store diimpor (dibaca saat import)
+    os.environ["DATA_FILTERED_DIR"] = args.data
+
+    try:
+        from chatbot_engine import ChatbotEngine, INTENT_ROUTER
+        from filtered_store import get_filtered_store
+
+        engine = ChatbotEngine()
+        mulai = time.perf_counter()
+        engine.load_data()
+        print(f"Load: {time.perf_counter() - mulai:.2f}s, {len(engine.lokasi_data)} lokasi "
+              f"({', '.join(f'{tahap} {detik:.2f}s' for tahap, detik in engine.durasi_muat.items())})")
+
+        korpus = buat_korpus(get_filtered_store().lokasi(), engine.hewan_data, engine.sayuran_data,
+                             args.pertanyaan, rng)
+        # Intent & jalur lokasi ditentukan di luar pengukuran
+        label = []
+        for q, sumber in korpus:
+            intent, grup = INTENT_ROUTER.cocokkan(q.strip().lower())
+            jalur = jalur_lokasi(engine, grup[GRUP_LOKASI[intent]]) if intent in GRUP_LOKASI else None
+            label.append((intent or "(tidak dikenal)", jalur, sumber))
+
+        # Pemanasan: import lazy (fuzzy) & cache CPU tidak ikut terukur
+        for q, _ in korpus[:50]:
+            engine.process_question(q)
+
+        per_intent, per_jalur, per_sumber = {}, {}, {}
+        semua = []
+        for _ in range(args.ulang):
+            for (q, _), (intent, jalur, sumber) in zip(korpus, label):
+                if not args.dengan_cache:
+                    engine.cache_jawaban.kosongkan()
+                mulai = time.perf_counter()
+                engine.process_question(q)
+                durasi = time.perf_counter() - mulai
+                semua.append(durasi)
+                per_intent.setdefault(intent, []).append(durasi)
+                per_sumber.setdefault(sumber, []).append(durasi)
+                if jalur:
+                    per_jalur.setdefault(jalur, []).append(durasi)
+
+        print(f"\n{len(korpus)} pertanyaan x {args.ulang}, cache jawaban "
+              f"{'aktif' if args.dengan_cache else 'dikosongkan per pertanyaan'}")
+        cetak_tabel("intent", per_intent)
+        cetak_tabel("jalur lokasi", per_jalur)
+        cetak_tabel("sumber", per_sumber)
+        cetak_tabel("total", {"semua": semua})
+    finally:
+        if folder_sementara:
+            shutil.rmtree(folder_sementara, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
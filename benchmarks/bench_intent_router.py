@@ -0,0 +1,158 @@
+# benchmarks/bench_intent_router.py
+"""
+Bandingkan router intent (chatbot_engine.INTENT_ROUTER) dengan urutan re.search lama di
+process_question: untuk tiap pertanyaan contoh, intent dan grup harus identik.
+Lalu ukur waktu match per intent (lama vs baru). Tidak butuh data lokasi:
+
+    python benchmarks/bench_intent_router.py --repeat 2000
+"""
+import os
+import re
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chatbot_engine import INTENT_ROUTER
+
+def intent_lama(question):
+    """Urutan pengecekan process_question sebelum router (search untuk tes, search lagi untuk grup)."""
+    if re.search(r'cuaca di (.+)', question):
+        return 'cuaca_lokasi', re.search(r'cuaca di (.+)', question).groups()
+    if re.search(r'(dimana|di mana).*(letak|lokasi|posisi) (.+)', question):
+        return 'lokasi_info', re.search(r'(dimana|di mana).*(letak|lokasi|posisi) (.+)', question).groups()
+    if re.search(r'koordinat (.+)', question):
+        return 'koordinat', re.search(r'koordinat (.+)', question).groups()
+    # Ditambahkan bersama daftar wilayah per induk/halaman (di depan daftar_* lama)
+    match = re.search(r'(provinsi|kotkab|kota|kabupaten|kecamatan|desa) apa saja '
+                      r'(?:di (.+?)(?: halaman (\d+))?|halaman (\d+))\s*[?.!]*$', question)
+    if match:
+        return 'daftar_admin', match.groups()
+    if 'provinsi apa saja' in question or 'daftar provinsi' in question:
+        return 'daftar_provinsi', ()
+    if re.search(r'(kota|kotkab|kabupaten) apa saja', question):
+        return 'daftar_kotkab', re.search(r'(kota|kotkab|kabupaten) apa saja', question).groups()
+    if 'kecamatan apa saja' in question:
+        return 'daftar_kecamatan', ()
+    if 'desa apa saja' in question:
+        return 'daftar_desa', ()
+    if re.search(r'bagaimana cuaca.* di (.+)', question):
+        return 'cuaca_detail', re.search(r'bagaimana cuaca.* di (.+)', question).groups()
+    if re.search(r'suhu (tertinggi|maksimum|max).* di (.+)', question):
+        return 'suhu_max', re.search(r'suhu (tertinggi|maksimum|max).* di (.+)', question).groups()
+    if re.search(r'suhu (terendah|minimum|min).* di (.+)', question):
+        return 'suhu_min', re.search(r'suhu (terendah|minimum|min).* di (.+)', question).groups()
+    if re.search(r'kelembapan.* di (.+)', question):
+        return 'kelembapan', re.search(r'kelembapan.* di (.+)', question).groups()
+    if re.search(r'(ringkasan|summary) cuaca.* di (.+)', question):
+        return 'ringkasan_cuaca', re.search(r'(ringkasan|summary) cuaca.* di (.+)', question).groups()
+    match = re.search(r'(.+?) cocok di mana', question)
+    if match:
+        return 'entitas_cocok', match.groups()
+    if re.search(r'apakah (.+?) cocok dipelihara di (.+)\?', question):
+        return 'cocok_dipelihara', re.search(r'apakah (.+?) cocok dipelihara di (.+)\?', question).groups()
+    if re.search(r'apakah (.+?) cocok ditanam di (.+)\?', question):
+        return 'cocok_ditanam', re.search(r'apakah (.+?) cocok ditanam di (.+)\?', question).groups()
+    if re.search(r'(daftar hewan|hewan apa saja|hewan yang dapat dicek)', question):
+        return 'daftar_hewan', re.search(r'(daftar hewan|hewan apa saja|hewan yang dapat dicek)', question).groups()
+    if re.search(r'(daftar sayuran|sayuran apa saja)', question):
+        return 'daftar_sayuran', re.search(r'(daftar sayuran|sayuran apa saja)', question).groups()
+    return None, ()
+
+KORPUS = [
+    "cuaca di bogor",
+    "cuaca di kecamatan cibinong, kabupaten bogor",
+    "bagaimana cuaca hari ini di bandung",
+    "bagaimana cuaca besok di surabaya",
+    "dimana letak desa sukamaju",
+    "di mana posisi kota malang",
+    "di mana sih lokasi pasar minggu",
+    "koordinat desa cikarang",
+    "minta koordinat kecamatan depok",
+    "provinsi apa saja yang ada",
+    "daftar provinsi",
+    "kota apa saja di jawa barat",
+    "kabupaten apa saja yang tersedia",
+    "kecamatan apa saja",
+    "desa apa saja di bogor",
+    "kecamatan apa saja di kab. bogor halaman 2",
+    "desa apa saja halaman 3",
+    "provinsi apa saja di indonesia",
+    "kecamatan apa saja di bogor halaman 1?",
+    "desa apa saja di kota baru.",
+    "suhu tertinggi hari ini di jakarta",
+    "suhu maksimum di semarang",
+    "suhu max minggu ini di medan",
+    "suhu terendah di dieng",
+    "suhu minimum di lembang",
+    "suhu min di puncak",
+    "kelembapan udara di bekasi",
+    "kelembapan di pontianak",
+    "ringkasan cuaca harian di makassar",
+    "summary cuaca di denpasar",
+    "ayam cocok di mana",
+    "kangkung cocok di mana?",
+    "sapi perah cocok di mana saja",
+    "apakah ayam cocok dipelihara di bogor?",
+    "apakah kambing cocok dipelihara di desa sukamaju, kecamatan ciawi?",
+    "apakah bayam cocok ditanam di lembang?",
+    "apakah cabai cocok ditanam di garut",
+    "daftar hewan",
+    "hewan apa saja yang bisa dicek",
+    "hewan yang dapat dicek apa saja",
+    "daftar sayuran",
+    "sayuran apa saja",
+    # Beberapa intent sekaligus: urutan prioritas yang menentukan
+    "suhu tertinggi di cuaca di bogor",
+    "ringkasan cuaca di kota apa saja",
+    "bagaimana cuaca di dimana letak x",
+    "apakah ayam cocok di mana",
+    "daftar hewan dan daftar sayuran",
+    "kelembapan suhu terendah di x",
+    "koordinat provinsi apa saja",
+    "desa apa saja dan kecamatan apa saja",
+    # Baris baru, kosong, tidak dikenal
+    "cuaca\ndi bogor",
+    "halo\ncuaca di garut\nterima kasih",
+    "apakah ayam cocok dipelihara di\nbogor?",
+    "",
+    "halo",
+    "terima kasih banyak",
+    "berapa harga cabai hari ini",
+]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    beda = [(q, intent_lama(q), INTENT_ROUTER.cocokkan(q)) for q in KORPUS
+            if intent_lama(q) != INTENT_ROUTER.cocokkan(q)]
+    for q, lama, baru in beda:
+        print(f"❌ {q!r}: lama={lama} baru={baru}")
+    print(f"{len(KORPUS) - len(beda)}/{len(KORPUS)} pertanyaan: intent & grup identik")
+
+    per_intent = {}
+    for q in KORPUS:
+        per_intent.setdefault(intent_lama(q)[0] or '(tidak dikenal)', []).append(q)
+
+    print(f"\n{'intent':20} {'n':>3} {'lama µs':>9} {'baru µs':>9} {'x':>6}")
+    total_lama = total_baru = 0.0
+    for intent, pertanyaan in per_intent.items():
+        waktu = []
+        for fungsi in (intent_lama, INTENT_ROUTER.cocokkan):
+            mulai = time.perf_counter()
+            for _ in range(args.repeat):
+                for q in pertanyaan:
+                    fungsi(q)
+            waktu.append((time.perf_counter() - mulai) / (args.repeat * len(pertanyaan)) * 1e6)
+        total_lama += waktu[0] * len(pertanyaan)
+        total_baru += waktu[1] * len(pertanyaan)
+        print(f"{intent:20} {len(pertanyaan):>3} {waktu[0]:>9.2f} {waktu[1]:>9.2f} {waktu[0] / waktu[1]:>6.1f}")
+    print(f"{'rata-rata korpus':20} {len(KORPUS):>3} {total_lama / len(KORPUS):>9.2f} "
+          f"{total_baru / len(KORPUS):>9.2f} {total_lama / total_baru:>6.1f}")
+    sys.exit(1 if beda else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# benchmarks/bench_startup.py
+"""
+Ukur waktu start aplikasi: sejak proses gunicorn dijalankan sampai (1) port menerima koneksi,
+(2) /ready melaporkan siap (jika ada), dan (3) request data pertama selesai. Jalankan dari
+folder backend (butuh data_filtered/ dan cache/ terisi):
+
+    python benchmarks/bench_startup.py --runs 3
+
+Scheduler dimatikan (SCHEDULER_ENABLED=0) agar fetch BMKG tidak mengganggu pengukuran.
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+import threading
+import urllib.request
+import urllib.error
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_PATHS = [
+    "/api/nearest-location?lat=-6.2&lon=106.8",
+    "/api/top-lokasi?nama=Ayam&k=10",
+]
+
+def _status(url, timeout=300):
+    """Kode status HTTP, atau None jika koneksi ditolak."""
+    try:
+        return urllib.request.urlopen(url, timeout=timeout).status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except (urllib.error.URLError, OSError):
+        return None
+
+def satu_putaran(app_dir, port, paths):
+    base_url = f"http://127.0.0.1:{port}"
+    env = dict(os.environ, SCHEDULER_ENABLED="0")
+    mulai = time.perf_counter()
+    proses = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-w", "1", "-b", f"127.0.0.1:{port}", "--timeout", "600", "app:app"],
+        cwd=app_dir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    hasil = {}
+    try:
+        while _status(base_url + "/", timeout=5) is None:
+            time.sleep(0.01)
+        hasil["listen"] = time.perf_counter() - mulai
+
+        # Request data pertama dikirim segera setelah port terbuka (seperti trafik yang langsung masuk)
+        def ambil(path):
+            kode = _status(base_url + path)
+            hasil[path] = (time.perf_counter() - mulai) if kode == 200 else float('nan')
+        threads = [threading.Thread(target=ambil, args=(p,)) for p in paths]
+        for t in threads:
+            t.start()
+
+        # Worker sync bisa sedang melayani request data: tunggu jawaban pasti, bukan timeout
+        kode = _status(base_url + "/ready")
+        if kode != 404:
+            while kode != 200:
+                time.sleep(0.05)
+                kode = _status(base_url + "/ready")
+            hasil["ready"] = time.perf_counter() - mulai
+        for t in threads:
+            t.join()
+    finally:
+        proses.terminate()
+        proses.wait(timeout=30)
+    return hasil
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app-dir", default=BACKEND_DIR)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--paths", nargs="+", default=DEFAULT_PATHS)
+    args = parser.parse_args()
+
+    putaran = []
+    for i in range(args.runs):
+        putaran.append(satu_putaran(args.app_dir, args.port, args.paths))
+        print(f"  putaran {i + 1}: " + ", ".join(f"{k}={v:.2f}s" for k, v in putaran[-1].items()), flush=True)
+
+    print(f"\n{'tahap':45} {'median (s)':>10}")
+    for kunci in ["listen", "ready"] + args.paths:
+        nilai = [p[kunci] for p in putaran if kunci in p]
+        if nilai:
+            print(f"{kunci:45} {statistics.median(nilai):>10.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# benchmarks/bench_worker_class.py
+"""
+Bandingkan throughput & latensi gunicorn worker sync vs gevent untuk beberapa tingkat
+koneksi bersamaan. Jalankan dari folder backend (butuh data_filtered/ dan cache/ terisi):
+
+    python benchmarks/bench_worker_class.py --workers 2 --connections 1 16 64 --duration 15
+
+Scheduler dimatikan (SCHEDULER_ENABLED=0) agar fetch BMKG tidak mengganggu pengukuran.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+import subprocess
+import threading
+import urllib.request
+import urllib.error
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_ENDPOINTS = [
+    "/api/nearest-location?lat=-6.2&lon=106.8",
+    "/api/viewport?bbox=95,-11,141,6&zoom=5",
+    "/api/top-lokasi?nama=Ayam&k=10",
+    "/api/alasan-template",
+    "/api/all_laporan?limit=50",
+]
+
+def tunggu_siap(base_url, batas_detik):
+    mulai = time.time()
+    while time.time() - mulai < batas_detik:
+        try:
+            urllib.request.urlopen(base_url + "/api/alasan-template", timeout=5).read()
+            return True
+        except Exception:
+            time.sleep(0.5)
+    return False
+
+def jalankan_beban(base_url, endpoints, koneksi, durasi):
+    """koneksi klien paralel, masing-masing request berurutan selama durasi detik."""
+    latensi = []
+    galat = [0]
+    kunci = threading.Lock()
+    selesai_pada = time.time() + durasi
+
+    def klien(seed):
+        rng = random.Random(seed)
+        lokal = []
+        while time.time() < selesai_pada:
+            # Query unik per request agar ETag/304 tidak membuat hasil terlalu optimis
+            endpoint = rng.choice(endpoints)
+            url = base_url + endpoint + ("&" if "?" in endpoint else "?") + f"_={rng.random()}"
+            t0 = time.perf_counter()
+            try:
+                urllib.request.urlopen(url, timeout=60).read()
+                lokal.append(time.perf_counter() - t0)
+            except (urllib.error.URLError, OSError):
+                with kunci:
+                    galat[0] += 1
+        with kunci:
+            latensi.extend(lokal)
+
+    threads = [threading.Thread(target=klien, args=(i,)) for i in range(koneksi)]
+    mulai = time.time()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latensi, galat[0], time.time() - mulai
+
+def persentil(data, p):
+    if not data:
+        return float('nan')
+    data = sorted(data)
+    return data[min(len(data) - 1, int(round(p / 100 * (len(data) - 1))))]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--worker-classes", nargs="+", default=["sync", "gevent"])
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--connections", nargs="+", type=int, default=[1, 16, 64])
+    parser.add_argument("--duration", type=float, default=15)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--endpoints", nargs="+", default=DEFAULT_ENDPOINTS)
+    args = parser.parse_args()
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    baris = []
+    for worker_class in args.worker_classes:
+        env = dict(os.environ, SCHEDULER_ENABLED="0", GUNICORN_WORKER_CLASS=worker_class)
+        proses = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "-w", str(args.workers), "-b", f"127.0.0.1:{args.port}",
+             "--timeout", "300", "app:app"],
+            cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            if not tunggu_siap(base_url, 300):
+                print(f"❌ gunicorn ({worker_class}) tidak siap, dilewati.")
+                continue
+            # Pemanasan: indeks dibangun saat request pertama di tiap worker
+            jalankan_beban(base_url, args.endpoints, args.workers * 2, 5)
+            for koneksi in args.connections:
+                latensi, galat, lama = jalankan_beban(base_url, args.endpoints, koneksi, args.duration)
+                baris.append((worker_class, koneksi, len(latensi) / lama,
+                              statistics.median(latensi) * 1000 if latensi else float('nan'),
+                              persentil(latensi, 95) * 1000, persentil(latensi, 99) * 1000, galat))
+                print(f"  {worker_class:7} koneksi={koneksi:<4} selesai ({len(latensi)} request)")
+        finally:
+            proses.terminate()
+            proses.wait(timeout=30)
+
+    print(f"\n{'worker':8} {'koneksi':>8} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'galat':>6}")
+    for worker_class, koneksi, rps, p50, p95, p99, galat in baris:
+        print(f"{worker_class:8} {koneksi:>8} {rps:>9.1f} {p50:>9.1f} {p95:>9.1f} {p99:>9.1f} {galat:>6}")
+
+if __name__ == "__main__":
+    main()
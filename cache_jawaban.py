@@ -0,0 +1,55 @@
+# cache_jawaban.py
+import threading
+from collections import OrderedDict
+
+UKURAN_MAX = 1024
+
+
+class CacheJawaban:
+    """
+    Cache LRU jawaban chatbot. Kunci menyertakan generasi data sehingga jawaban lama tidak
+    pernah terpakai setelah reload; kosongkan() membuang semuanya sekaligus.
+    Tiap entri mencatat jumlah hit untuk memilih pertanyaan populer yang dipanaskan ulang.
+    """
+
+    def __init__(self, ukuran_max=UKURAN_MAX):
+        self.ukuran_max = ukuran_max
+        self._data = OrderedDict() # kunci -> [jawaban, jumlah hit]
+        self._lock = threading.Lock()
+        self.hit = 0
+        self.miss = 0
+
+    def ambil(self, kunci):
+        with self._lock:
+            entri = self._data.get(kunci)
+            if entri is None:
+                self.miss += 1
+                return None
+            self._data.move_to_end(kunci)
+            entri[1] += 1
+            self.hit += 1
+            return entri[0]
+
+    def simpan(self, kunci, jawaban):
+        with self._lock:
+            if kunci in self._data:
+                self._data.move_to_end(kunci)
+                self._data[kunci][0] = jawaban
+                return
+            self._data[kunci] = [jawaban, 0]
+            if len(self._data) > self.ukuran_max:
+                self._data.popitem(last=False)
+
+    def populer(self, n):
+        """n kunci dengan hit terbanyak (seri: yang terakhir dipakai lebih dulu)."""
+        with self._lock:
+            urutan = sorted(reversed(self._data.items()), key=lambda kv: kv[1][1], reverse=True)
+            return [kunci for kunci, _ in urutan[:n]]
+
+    def kosongkan(self):
+        with self._lock:
+            self._data.clear()
+
+    def status(self):
+        with self._lock:
+            return {"ukuran": len(self._data), "ukuran_max": self.ukuran_max, "hit": self.hit, "miss": self.miss}
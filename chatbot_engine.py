@@ -1,14 +1,107 @@
 import os
-import json
-import re
 from typing import Dict, List, Optional, Any, Tuple
-from fuzzywuzzy import fuzz, process
+import threading
+from array import array
+import time
 from datetime import datetime
 import statistics
+from collections.abc import Mapping
 
-class ChatbotEngine:
-    def __init__(self):
-        self.lokasi_data = {}
+from katalog import get_katalog
+from cooperative import beri_giliran
+from trigram_index import IndeksTrigram
+from climate_index import IndeksIklim
+from geocoder import normalisasi
+from intent_router import IntentRouter
+from cache_jawaban import CacheJawaban
+from filtered_store import get_filtered_store
+
+# Urutan prioritas level saat mencari lokasi (exact maupun fuzzy)
+LEVEL_LOKASI = ['desa', 'kecamatan', 'kotkab', 'provinsi', 'alias']
+FUZZY_THRESHOLD = 70
+# Struktur minimal file lokasi data_filtered yang bisa dipakai chatbot
+WAJIB_LOKASI = frozenset(['provinsi', 'kotkab', 'kecamatan', 'desa', 'lon', 'lat', 'cuaca_saat_ini', 'ringkasan_harian'])
+WAJIB_CUACA = frozenset(['suhu', 'kelembapan', 'cuaca'])
+WAJIB_RINGKASAN = frozenset(['t_max', 't_min', 't_avg', 'hu_avg', 'cuaca_dominan'])
+
+# Intent process_question: (nama, pola re.search, kata kunci). Urutan = prioritas, intent pertama
+# yang cocok menang. Kata kunci: literal yang pasti muncul jika pola cocok (minimal salah satunya).
+INTENTS = [
+    ('cuaca_lokasi', r'cuaca di (.+)', ['cuaca di ']),
+    ('lokasi_info', r'(dimana|di mana).*(letak|lokasi|posisi) (.+)', ['letak ', 'lokasi ', 'posisi ']),
+    ('koordinat', r'koordinat (.+)', ['koordinat ']),
+    ('daftar_admin', r'(provinsi|kotkab|kota|kabupaten|kecamatan|desa) apa saja '
+                     r'(?:di (.+?)(?: halaman (\d+))?|halaman (\d+))\s*[?.!]*$', [' apa saja di ', ' apa saja halaman ']),
+    ('daftar_provinsi', r'provinsi apa saja|daftar provinsi', ['provinsi apa saja', 'daftar provinsi']),
+    ('daftar_kotkab', r'(kota|kotkab|kabupaten) apa saja', ['apa saja']),
+    ('daftar_kecamatan', r'kecamatan apa saja', ['kecamatan apa saja']),
+    ('daftar_desa', r'desa apa saja', ['desa apa saja']),
+    ('cuaca_detail', r'bagaimana cuaca.* di (.+)', ['bagaimana cuaca']),
+    ('suhu_max', r'suhu (tertinggi|maksimum|max).* di (.+)', ['suhu ']),
+    ('suhu_min', r'suhu (terendah|minimum|min).* di (.+)', ['suhu ']),
+    ('kelembapan', r'kelembapan.* di (.+)', ['kelembapan']),
+    ('ringkasan_cuaca', r'(ringkasan|summary) cuaca.* di (.+)', ['ringkasan cuaca', 'summary cuaca']),
+    ('entitas_cocok', r'(.+?) cocok di mana', [' cocok di mana']),
+    ('cocok_dipelihara', r'apakah (.+?) cocok dipelihara di (.+)\?', [' cocok dipelihara di ']),
+    ('cocok_ditanam', r'apakah (.+?) cocok ditanam di (.+)\?', [' cocok ditanam di ']),
+    ('daftar_hewan', r'(daftar hewan|hewan apa saja|hewan yang dapat dicek)',
+     ['daftar hewan', 'hewan apa saja', 'hewan yang dapat dicek']),
+    ('daftar_sayuran', r'(daftar sayuran|sayuran apa saja)', ['daftar sayuran', 'sayuran apa saja']),
+]
+INTENT_ROUTER = IntentRouter(INTENTS)
+
+# Dipanaskan ke cache jawaban setelah tiap reload, bersama pertanyaan terpopuler generasi sebelumnya
+PERTANYAAN_PREWARM = ['daftar hewan', 'daftar sayuran', 'provinsi apa saja']
+PREWARM_MAX = 50
+# Daftar wilayah: level induk yang bisa dipakai untuk menyaring ("kecamatan apa saja di <kotkab>")
+INDUK_ADMIN = {
+    'provinsi': [],
+    'kotkab': ['provinsi'],
+    'kecamatan': ['kotkab', 'provinsi'],
+    'desa': ['kecamatan', 'kotkab', 'provinsi'],
+}
+# Awalan yang menunjuk level induk secara eksplisit ("desa apa saja di kecamatan X")
+AWALAN_LEVEL = {'kecamatan': 'kecamatan', 'kec': 'kecamatan', 'kabupaten': 'kotkab', 'kab': 'kotkab',
+                'kota': 'kotkab', 'provinsi': 'provinsi', 'prov': 'provinsi'}
+# Jenis awalan: "kabupaten bogor" = "Kab. Bogor", bukan "Kota Bogor"
+JENIS_AWALAN = {'kecamatan': 'kecamatan', 'kec': 'kecamatan', 'kabupaten': 'kabupaten', 'kab': 'kabupaten',
+                'kota': 'kota', 'provinsi': 'provinsi', 'prov': 'provinsi'}
+LABEL_ADMIN = {'provinsi': 'Provinsi', 'kotkab': 'Kota/Kabupaten', 'kecamatan': 'Kecamatan', 'desa': 'Desa'}
+DAFTAR_PER_HALAMAN = 50
+LOKASI_COCOK_TAMPIL = 5 # jumlah lokasi yang disebut di jawaban '[entitas] cocok di mana'
+# Contoh pertanyaan untuk uji manual (__main__) dan korpus benchmarks/bench_chatbot.py
+CONTOH_PERTANYAAN = [
+    "Cuaca di Jakarta",
+    "Bagaimana cuaca saat ini di Bandung?",
+    "Koordinat Surabaya",
+    "Data provinsi apa saja yang tersedia",
+    "Daftar hewan",
+    "Daftar sayuran",
+    "Hewan cocok di mana?",
+    "Domba cocok di mana?",
+    "Sayuran cocok di mana?",
+    "Cabai cocok di mana?",
+    "Apakah ayam cocok dipelihara di Medan?",
+    "Apakah cabai cocok ditanam di Binjai?",
+    "Sapi cocok di mana?", # Test with fuzzy match for animal
+    "Bayam cocok di mana?", # Test with fuzzy match for vegetable
+    "Apakah padi cocok ditanam di Indramayu?",
+    "Pucuk Jahe cocok di mana?", # Test the specific case
+    "Burung Dara cocok di mana?", # Test the specific case
+    "Pigeon cocok di mana?", # Test the specific case
+    "Ayam cocok di mana?", # Test the specific case
+]
+
+class DataChatbot:
+    """
+    Satu generasi data chatbot: lokasi, semua index turunannya, dan katalog hewan/sayuran.
+    Dibangun utuh di objek baru lalu dipasang ChatbotEngine dengan satu penggantian referensi;
+    setelah dipasang tidak pernah diubah lagi.
+    """
+
+    def __init__(self, generasi=0):
+        # Dict lokasi milik FilteredStore (dipakai bersama, tidak disalin); id lokasi = posisi di list
+        self.lokasi_data = []
         self.hewan_data = []
         self.sayuran_data = []
         self.lokasi_index = {
@@ -18,144 +111,250 @@ class ChatbotEngine:
             'desa': {},
             'alias': {}
         }
+        # Kandidat fuzzy find_lokasi: nama unik sesuai LEVEL_LOKASI -> id lokasi pertama
+        self.fuzzy_index = None
+        self.fuzzy_ids = array('i')
+        # Grid (t_avg, hu_avg) untuk '[entitas] cocok di mana'; id titik = id lokasi
+        self.iklim_index = None
+        # Daftar nama unik terurut per level, dan per induk: level -> level induk -> nama induk ternormalisasi -> (label, daftar)
+        self.daftar_admin = {level: [] for level in INDUK_ADMIN}
+        self.daftar_admin_per_induk = {level: {} for level in INDUK_ADMIN}
+        # Nama induk tanpa awalan levelnya -> nama lengkap (ternormalisasi): level induk -> "bogor" -> ["kab bogor", "kota bogor"]
+        self.induk_tanpa_awalan = {}
+        # Jawaban hanya berubah saat data dimuat ulang: cache per generasi data
+        self.generasi = generasi
+        # Detik per tahap pemuatan (baca, validasi, index), dilaporkan tiap load
+        self.durasi_muat = {}
         self.loaded = False
-        
-    def load_data(self):
+
+    def muat(self):
         """Load semua data dari file JSON"""
-        try:
-            print("Loading data lokasi...")
-            self._load_lokasi_data()
-            print(f"Loaded {len(self.lokasi_data)} lokasi data")
-            
-            print("Loading data hewan...")
-            self._load_hewan_data()
-            print(f"Loaded {len(self.hewan_data)} hewan data")
-            
-            print("Loading data sayuran...")
-            self._load_sayuran_data()
-            print(f"Loaded {len(self.sayuran_data)} sayuran data")
-            
-            self.loaded = True
-            print("All data loaded successfully!")
-            
-        except Exception as e:
-            print(f"Error loading data: {e}")
-            raise
-    
-    def load_filtered_data(self):
-        """Reload data yang sudah difilter - alias untuk load_data()"""
-        # Reset data sebelum load ulang
-        self.lokasi_data.clear()
-        self.hewan_data.clear()
-        self.sayuran_data.clear()
-        for key in self.lokasi_index:
-            self.lokasi_index[key].clear()
-        self.loaded = False
-        
-        # Load ulang semua data
-        self.load_data()
-    
-    def _load_lokasi_data(self):
-        """Load ribuan file JSON lokasi dari folder data_filtered"""
-        data_path = r"D:\ai-smartcare-map\backend\data_filtered"
+        print("Loading data lokasi...")
+        self._load_lokasi_data()
+        print(f"Loaded {len(self.lokasi_data)} lokasi data")
         
-        if not os.path.exists(data_path):
-            raise FileNotFoundError(f"Data path tidak ditemukan: {data_path}")
+        print("Loading data hewan...")
+        self._load_hewan_data()
+        print(f"Loaded {len(self.hewan_data)} hewan data")
         
-        json_files = [f for f in os.listdir(data_path) if f.endswith('.json')]
+        print("Loading data sayuran...")
+        self._load_sayuran_data()
+        print(f"Loaded {len(self.sayuran_data)} sayuran data")
         
-        for filename in json_files:
-            file_path = os.path.join(data_path, filename)
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    
-                # Validasi struktur data
-                if self._validate_lokasi_structure(data):
-                    # Gunakan kombinasi unique key untuk setiap lokasi
-                    key = f"{data['provinsi']}_{data['kotkab']}_{data['kecamatan']}_{data['desa']}"
-                    self.lokasi_data[key] = data
-                    
-                    # Build index untuk pencarian cepat
-                    self._build_lokasi_index(key, data)
-                    
-            except (json.JSONDecodeError, KeyError) as e:
-                print(f"Error parsing {filename}: {e}")
-                continue
-    
-    def _validate_lokasi_structure(self, data):
-        """Validasi struktur data lokasi"""
-        required_fields = ['provinsi', 'kotkab', 'kecamatan', 'desa', 'lon', 'lat', 
-                            'cuaca_saat_ini', 'ringkasan_harian']
-        
-        if not all(field in data for field in required_fields):
-            return False
-            
-        if not all(field in data['cuaca_saat_ini'] for field in ['suhu', 'kelembapan', 'cuaca']):
-            return False
-            
-        if not all(field in data['ringkasan_harian'] for field in ['t_max', 't_min', 't_avg', 'hu_avg', 'cuaca_dominan']):
-            return False
+        self.loaded = True
+        print("All data loaded successfully! (" +
+              ", ".join(f"{tahap} {detik:.2f}s" for tahap, detik in self.durasi_muat.items()) + ")")
+    
+    def _load_lokasi_data(self):
+        """Ambil lokasi data_filtered dari FilteredStore (sudah di-parse paralel, dipakai bersama endpoint lain)"""
+        store = get_filtered_store()
+        if not os.path.isdir(store.folder):
+            raise FileNotFoundError(f"Data path tidak ditemukan: {store.folder}")
+        
+        mulai = time.perf_counter()
+        lokasi_list = store.lokasi()
+        self.durasi_muat['baca'] = time.perf_counter() - mulai
+        
+        mulai = time.perf_counter()
+        valid = self._validasi_lokasi(lokasi_list)
+        self.durasi_muat['validasi'] = time.perf_counter() - mulai
+        if len(valid) != len(lokasi_list):
+            print(f"⚠️ {len(lokasi_list) - len(valid)} lokasi dilewati: struktur tidak lengkap")
+        
+        mulai = time.perf_counter()
+        # Lokasi dengan provinsi/kotkab/kecamatan/desa sama: data terakhir menang, posisi pertama dipertahankan
+        id_per_key = {}
+        for i, data in enumerate(valid):
+            beri_giliran(i)
+            key = (data['provinsi'], data['kotkab'], data['kecamatan'], data['desa'])
+            id_lokasi = id_per_key.setdefault(key, len(self.lokasi_data))
+            if id_lokasi == len(self.lokasi_data):
+                self.lokasi_data.append(data)
+            else:
+                self.lokasi_data[id_lokasi] = data
             
-        return True
+            # Build index untuk pencarian cepat
+            self._build_lokasi_index(id_lokasi, data)
+        
+        # Alias yang sama dengan nama di level lain tidak pernah tercapai (level dicek lebih dulu)
+        alias = self.lokasi_index['alias']
+        for level in LEVEL_LOKASI[:-1]:
+            for nama in alias.keys() & self.lokasi_index[level].keys():
+                del alias[nama]
+        
+        self._build_fuzzy_index()
+        self._build_iklim_index()
+        self._build_daftar_admin()
+        self.durasi_muat['index'] = time.perf_counter() - mulai
+    
+    def _build_fuzzy_index(self):
+        """Index trigram untuk fuzzy find_lokasi (nama yang sama di level lain cukup sekali)"""
+        nama_list = []
+        self.fuzzy_ids = array('i')
+        sudah = set()
+        for level in LEVEL_LOKASI:
+            for indexed_name, id_lokasi in self.lokasi_index[level].items():
+                if indexed_name not in sudah:
+                    sudah.add(indexed_name)
+                    nama_list.append(indexed_name)
+                    self.fuzzy_ids.append(id_lokasi)
+        self.fuzzy_index = IndeksTrigram(nama_list)
     
-    def _build_lokasi_index(self, key, data):
-        """Build index untuk pencarian fuzzy"""
+    def _validasi_lokasi(self, lokasi_list):
+        """Lokasi dengan struktur lengkap, divalidasi sekaligus (cek subset key per lokasi)"""
+        return [data for data in lokasi_list
+                if WAJIB_LOKASI <= data.keys()
+                and isinstance(data['cuaca_saat_ini'], Mapping) and WAJIB_CUACA <= data['cuaca_saat_ini'].keys()
+                and isinstance(data['ringkasan_harian'], Mapping) and WAJIB_RINGKASAN <= data['ringkasan_harian'].keys()]
+    
+    def _build_lokasi_index(self, id_lokasi, data):
+        """Build index nama (lowercase) -> id lokasi pertama dengan nama itu"""
         # Index berdasarkan level administratif
-        self.lokasi_index['provinsi'].setdefault(data['provinsi'].lower(), []).append(key)
-        self.lokasi_index['kotkab'].setdefault(data['kotkab'].lower(), []).append(key)
-        self.lokasi_index['kecamatan'].setdefault(data['kecamatan'].lower(), []).append(key)
-        self.lokasi_index['desa'].setdefault(data['desa'].lower(), []).append(key)
+        self.lokasi_index['provinsi'].setdefault(data['provinsi'].lower(), id_lokasi)
+        self.lokasi_index['kotkab'].setdefault(data['kotkab'].lower(), id_lokasi)
+        self.lokasi_index['kecamatan'].setdefault(data['kecamatan'].lower(), id_lokasi)
+        self.lokasi_index['desa'].setdefault(data['desa'].lower(), id_lokasi)
         
         # Index alias
         if 'alias' in data:
             for alias in data['alias']:
-                self.lokasi_index['alias'].setdefault(alias.lower(), []).append(key)
+                self.lokasi_index['alias'].setdefault(alias.lower(), id_lokasi)
+    
+    def _build_iklim_index(self):
+        """Index grid rata-rata suhu & kelembapan harian semua lokasi (urutan lokasi_data)"""
+        self.iklim_index = IndeksIklim([
+            (lokasi["ringkasan_harian"]["t_avg"], lokasi["ringkasan_harian"]["hu_avg"])
+            for lokasi in self.lokasi_data
+        ])
+    
+    def _build_daftar_admin(self):
+        """Daftar provinsi/kotkab/kecamatan/desa unik & terurut, sekali per load (dipakai handler daftar_*)"""
+        per_level = {level: set() for level in INDUK_ADMIN}
+        per_induk = {level: {} for level in INDUK_ADMIN}
+        for i, data in enumerate(self.lokasi_data):
+            beri_giliran(i)
+            for level, induk_list in INDUK_ADMIN.items():
+                per_level[level].add(data[level])
+                for induk in induk_list:
+                    grup = per_induk[level].setdefault(induk, {}).setdefault(normalisasi(data[induk]), (set(), set()))
+                    grup[0].add(data[induk])
+                    grup[1].add(data[level])
+        self.daftar_admin = {level: sorted(nama) for level, nama in per_level.items()}
+        self.daftar_admin_per_induk = {
+            level: {induk: {kunci: (' / '.join(sorted(nama_induk)), sorted(anak))
+                            for kunci, (nama_induk, anak) in grup.items()}
+                    for induk, grup in per_induk[level].items()}
+            for level in INDUK_ADMIN
+        }
+        # Awalan hanya dibuang jika memang penanda level itu sendiri (kecamatan "Kota Baru" tetap utuh)
+        tanpa_awalan = {}
+        for induk, grup in self.daftar_admin_per_induk['desa'].items():
+            for kunci in grup:
+                kata = kunci.split(' ', 1)
+                if len(kata) == 2 and AWALAN_LEVEL.get(kata[0]) == induk:
+                    tanpa_awalan.setdefault(induk, {}).setdefault(kata[1], []).append(kunci)
+        self.induk_tanpa_awalan = {induk: {pendek: sorted(kunci_list) for pendek, kunci_list in peta.items()}
+                                   for induk, peta in tanpa_awalan.items()}
     
     def _load_hewan_data(self):
-        """Load data hewan dari JSON"""
-        file_path = r"D:\ai-smartcare-map\backend\data\hewan_cocok.json"
-        
-        if not os.path.exists(file_path):
-            raise FileNotFoundError(f"File hewan tidak ditemukan: {file_path}")
-            
-        with open(file_path, 'r', encoding='utf-8') as f:
-            self.hewan_data = json.load(f)
+        """Ambil data hewan dari katalog bersama (sudah divalidasi, tidak dibaca ulang dari disk)"""
+        self.hewan_data = get_katalog().hewan
     
     def _load_sayuran_data(self):
-        """Load data sayuran dari JSON"""
-        file_path = r"D:\ai-smartcare-map\backend\data\sayuran_cocok.json"
+        """Ambil data sayuran dari katalog bersama (sudah divalidasi, tidak dibaca ulang dari disk)"""
+        self.sayuran_data = get_katalog().sayuran
+
+
+class ChatbotEngine:
+    def __init__(self):
+        # Data aktif; diganti utuh (satu assignment) saat reload, pembaca tidak pernah diblok
+        self._data = DataChatbot()
+        # Data yang dipakai request berjalan: satu pertanyaan melihat satu generasi dari awal sampai akhir
+        self._data_request = threading.local()
+        # Satu pembangunan data pada satu waktu (reload dari beberapa thread tidak saling tumpuk)
+        self._lock_muat = threading.Lock()
+        self.cache_jawaban = CacheJawaban()
+    
+    def _aktif(self):
+        return getattr(self._data_request, 'data', None) or self._data
+    
+    lokasi_data = property(lambda self: self._aktif().lokasi_data)
+    hewan_data = property(lambda self: self._aktif().hewan_data)
+    sayuran_data = property(lambda self: self._aktif().sayuran_data)
+    lokasi_index = property(lambda self: self._aktif().lokasi_index)
+    fuzzy_index = property(lambda self: self._aktif().fuzzy_index)
+    fuzzy_ids = property(lambda self: self._aktif().fuzzy_ids)
+    iklim_index = property(lambda self: self._aktif().iklim_index)
+    daftar_admin = property(lambda self: self._aktif().daftar_admin)
+    daftar_admin_per_induk = property(lambda self: self._aktif().daftar_admin_per_induk)
+    induk_tanpa_awalan = property(lambda self: self._aktif().induk_tanpa_awalan)
+    generasi = property(lambda self: self._aktif().generasi)
+    durasi_muat = property(lambda self: self._aktif().durasi_muat)
+    loaded = property(lambda self: self._aktif().loaded)
         
-        if not os.path.exists(file_path):
-            raise FileNotFoundError(f"File sayuran tidak ditemukan: {file_path}")
-            
-        with open(file_path, 'r', encoding='utf-8') as f:
-            self.sayuran_data = json.load(f)
+    def load_data(self):
+        """Bangun data baru di belakang layar lalu pasang dengan satu penggantian referensi"""
+        with self._lock_muat:
+            try:
+                mulai = time.perf_counter()
+                baru = DataChatbot(self._data.generasi + 1)
+                baru.muat()
+                durasi_bangun = time.perf_counter() - mulai
+                
+                # Swap atomik: request yang sedang berjalan tetap memakai data lama sampai selesai
+                mulai = time.perf_counter()
+                self._data = baru
+                durasi_swap = time.perf_counter() - mulai
+                print(f"✅ Data chatbot generasi {baru.generasi} dipasang "
+                      f"(bangun {durasi_bangun:.2f} detik, swap {durasi_swap * 1e6:.1f} µs)")
+                
+            except Exception as e:
+                # Data lama (jika ada) tetap melayani
+                print(f"Error loading data: {e}")
+                raise
+    
+    def load_filtered_data(self):
+        """Reload data yang sudah difilter: data lama tetap melayani sampai data baru siap"""
+        populer = [pertanyaan for _, pertanyaan in self.cache_jawaban.populer(PREWARM_MAX)]
+        self.load_data()
+        # Kunci cache memuat generasi, jadi entri lama tak terpakai lagi; buang untuk membebaskan memori
+        self.cache_jawaban.kosongkan()
+        self.prewarm(PERTANYAAN_PREWARM + populer)
+    
+    def prewarm(self, pertanyaan_list):
+        """Isi cache jawaban untuk pertanyaan yang sering ditanyakan (dipanggil setelah reload)"""
+        for i, pertanyaan in enumerate(dict.fromkeys(pertanyaan_list)):
+            beri_giliran(i)
+            self.process_question(pertanyaan)
     
-    def find_lokasi(self, nama_lokasi: str) -> Optional[Tuple[str, Dict]]:
-        """Cari lokasi dengan fuzzy matching, prioritas: desa > kecamatan > kotkab > provinsi"""
+    def find_lokasi(self, nama_lokasi: str) -> Optional[Tuple[int, Dict]]:
+        """Cari lokasi (id, dict) dengan fuzzy matching, prioritas: desa > kecamatan > kotkab > provinsi"""
         nama_lokasi = nama_lokasi.lower().strip()
-        
+        # Di dalam process_batch: nama yang sudah dicari di pertanyaan lain tidak dicari ulang
+        memo = getattr(self._data_request, 'lokasi', None)
+        if memo is not None:
+            if nama_lokasi not in memo:
+                memo[nama_lokasi] = self._cari_lokasi(nama_lokasi)
+            return memo[nama_lokasi]
+        return self._cari_lokasi(nama_lokasi)
+    
+    def _cari_lokasi(self, nama_lokasi: str) -> Optional[Tuple[int, Dict]]:
+        """find_lokasi untuk nama yang sudah dinormalisasi (lowercase + strip)"""
         # Cek exact match dulu
-        for level in ['desa', 'kecamatan', 'kotkab', 'provinsi', 'alias']:
-            if nama_lokasi in self.lokasi_index[level]:
-                key = self.lokasi_index[level][nama_lokasi][0]  # Ambil yang pertama
-                return key, self.lokasi_data[key]
-        
-        # Fuzzy matching jika tidak ada exact match
-        best_match = None
-        best_score = 0
-        best_key = None
-        
-        for level in ['desa', 'kecamatan', 'kotkab', 'provinsi', 'alias']:
-            for indexed_name, keys in self.lokasi_index[level].items():
-                score = fuzz.ratio(nama_lokasi, indexed_name)
-                if score > best_score and score >= 70:  # Threshold 70%
-                    best_score = score
-                    best_match = self.lokasi_data[keys[0]]
-                    best_key = keys[0]
-        
-        return (best_key, best_match) if best_match else (None, None)
+        for level in LEVEL_LOKASI:
+            id_lokasi = self.lokasi_index[level].get(nama_lokasi)
+            if id_lokasi is not None:
+                return id_lokasi, self.lokasi_data[id_lokasi]
+        
+        # Fuzzy matching jika tidak ada exact match: skor tertinggi >= 70%, seri -> level lebih prioritas
+        # (kandidat dari index trigram, bukan fuzz.ratio ke semua nama)
+        if self.fuzzy_index is None:
+            return None, None
+        hasil = self.fuzzy_index.cari(nama_lokasi, FUZZY_THRESHOLD)
+        if hasil is None:
+            return None, None
+        id_lokasi = self.fuzzy_ids[hasil[0]]
+        return id_lokasi, self.lokasi_data[id_lokasi]
     
     def find_hewan(self, nama_hewan: str) -> Optional[Dict]:
         """Cari hewan dengan fuzzy matching"""
@@ -167,6 +366,7 @@ class ChatbotEngine:
                 return hewan
         
         # Fuzzy matching
+        from fuzzywuzzy import fuzz, process
         hewan_names = [hewan['nama'] for hewan in self.hewan_data]
         match = process.extractOne(nama_hewan, hewan_names, scorer=fuzz.ratio)
         
@@ -187,6 +387,7 @@ class ChatbotEngine:
                 return sayuran
         
         # Fuzzy matching
+        from fuzzywuzzy import fuzz, process
         sayuran_names = [sayuran['nama'] for sayuran in self.sayuran_data]
         match = process.extractOne(nama_sayuran, sayuran_names, scorer=fuzz.ratio)
         
@@ -201,6 +402,7 @@ class ChatbotEngine:
         """Helper function untuk mencari entitas (hewan/sayuran) dengan fuzzy matching."""
         nama_input_lower = nama_input.lower().strip()
         entitas_names = [ent["nama"].lower() for ent in data_entitas]
+        from fuzzywuzzy import fuzz, process
 
         match = process.extractOne(nama_input_lower, entitas_names, scorer=fuzz.ratio)
 
@@ -212,10 +414,11 @@ class ChatbotEngine:
                     return ent
         return None
         
-    def cari_lokasi_cocok(self, entitas: Dict, lokasi_list: Dict) -> List[Dict]:
+    def cari_lokasi_cocok(self, entitas: Dict, lokasi_list: List[Dict]) -> List[Dict]:
         """Fungsi untuk mencari lokasi yang cocok berdasarkan kriteria entitas"""
         hasil = []
-        for lokasi_key, lokasi in lokasi_list.items():
+        for i, lokasi in enumerate(lokasi_list):
+            beri_giliran(i)
             # Gunakan rata-rata harian untuk kecocokan jangka panjang
             suhu = lokasi["ringkasan_harian"]["t_avg"]
             kelembapan = lokasi["ringkasan_harian"]["hu_avg"]
@@ -233,83 +436,104 @@ class ChatbotEngine:
         
         return hasil
 
+    def cari_lokasi_cocok_terindeks(self, entitas: Dict, limit: Optional[int] = None) -> Tuple[List[Dict], int]:
+        """Seperti cari_lokasi_cocok atas lokasi_data, lewat index grid: (limit lokasi pertama, jumlah total)"""
+        if self.iklim_index is None:
+            semua = self.cari_lokasi_cocok(entitas, self.lokasi_data)
+            return (semua if limit is None else semua[:limit]), len(semua)
+        ids, total = self.iklim_index.cari(entitas["suhu_min"], entitas["suhu_max"],
+                                           entitas["hu_min"], entitas["hu_max"], limit)
+        hasil = []
+        for i in ids:
+            lokasi = self.lokasi_data[i]
+            hasil.append({
+                "desa": lokasi["desa"],
+                "kecamatan": lokasi["kecamatan"],
+                "kotkab": lokasi["kotkab"],
+                "provinsi": lokasi["provinsi"]
+            })
+        return hasil, total
+
     def process_question(self, question: str) -> str:
         """Main function untuk memproses pertanyaan"""
-        if not self.loaded:
+        data = self._aktif()
+        if not data.loaded:
             return "Data belum dimuat. Silakan muat data terlebih dahulu."
         
         question = question.strip().lower()
-        
-        # Pattern matching untuk berbagai jenis pertanyaan
+        kunci = (data.generasi, question)
+        jawaban = self.cache_jawaban.ambil(kunci)
+        if jawaban is None:
+            # Kunci ke generasi yang dibaca di awal: swap di tengah jawaban tidak mencampur data
+            sebelumnya = getattr(self._data_request, 'data', None)
+            self._data_request.data = data
+            try:
+                jawaban = self._jawab(question)
+            finally:
+                self._data_request.data = sebelumnya
+            self.cache_jawaban.simpan(kunci, jawaban)
+        return jawaban
+    
+    def _jawab(self, question: str) -> str:
+        """Jawaban untuk pertanyaan yang sudah dinormalisasi (strip + lowercase)"""
+        # Intent pertama yang cocok (lihat INTENTS), grup sudah tertangkap dari match yang sama
+        intent, grup = INTENT_ROUTER.cocokkan(question)
         
         # 1. Cuaca di [lokasi]
-        if re.search(r'cuaca di (.+)', question):
-            match = re.search(r'cuaca di (.+)', question)
-            lokasi = match.group(1)
-            return self._handle_cuaca_lokasi(lokasi)
+        if intent == 'cuaca_lokasi':
+            return self._handle_cuaca_lokasi(grup[0])
         
         # 2. Dimana letak [lokasi]
-        if re.search(r'(dimana|di mana).*(letak|lokasi|posisi) (.+)', question):
-            match = re.search(r'(dimana|di mana).*(letak|lokasi|posisi) (.+)', question)
-            lokasi = match.group(3)
-            return self._handle_lokasi_info(lokasi)
+        if intent == 'lokasi_info':
+            return self._handle_lokasi_info(grup[2])
         
         # 3. Koordinat [lokasi]
-        if re.search(r'koordinat (.+)', question):
-            match = re.search(r'koordinat (.+)', question)
-            lokasi = match.group(1)
-            return self._handle_koordinat(lokasi)
+        if intent == 'koordinat':
+            return self._handle_koordinat(grup[0])
+        
+        # 4a. [Level] apa saja di [wilayah induk] / halaman [n]
+        if intent == 'daftar_admin':
+            return self._handle_daftar_admin(grup[0], grup[1], grup[2] or grup[3])
         
         # 4. Data provinsi apa saja
-        if 'provinsi apa saja' in question or 'daftar provinsi' in question:
+        if intent == 'daftar_provinsi':
             return self._handle_daftar_provinsi()
         
         # 5. Data kota/kotkab apa saja
-        if re.search(r'(kota|kotkab|kabupaten) apa saja', question):
+        if intent == 'daftar_kotkab':
             return self._handle_daftar_kotkab()
         
         # 6. Kecamatan apa saja
-        if 'kecamatan apa saja' in question:
+        if intent == 'daftar_kecamatan':
             return self._handle_daftar_kecamatan()
         
         # 7. Desa apa saja
-        if 'desa apa saja' in question:
+        if intent == 'daftar_desa':
             return self._handle_daftar_desa()
         
         # 8. Bagaimana cuaca di [lokasi]
-        if re.search(r'bagaimana cuaca.* di (.+)', question):
-            match = re.search(r'bagaimana cuaca.* di (.+)', question)
-            lokasi = match.group(1)
-            return self._handle_cuaca_detail(lokasi)
+        if intent == 'cuaca_detail':
+            return self._handle_cuaca_detail(grup[0])
         
         # 9. Suhu tertinggi/maksimum di [lokasi]
-        if re.search(r'suhu (tertinggi|maksimum|max).* di (.+)', question):
-            match = re.search(r'suhu (tertinggi|maksimum|max).* di (.+)', question)
-            lokasi = match.group(2)
-            return self._handle_suhu_max(lokasi)
+        if intent == 'suhu_max':
+            return self._handle_suhu_max(grup[1])
         
         # 10. Suhu terendah/minimum di [lokasi]
-        if re.search(r'suhu (terendah|minimum|min).* di (.+)', question):
-            match = re.search(r'suhu (terendah|minimum|min).* di (.+)', question)
-            lokasi = match.group(2)
-            return self._handle_suhu_min(lokasi)
+        if intent == 'suhu_min':
+            return self._handle_suhu_min(grup[1])
         
         # 11. Kelembapan di [lokasi]
-        if re.search(r'kelembapan.* di (.+)', question):
-            match = re.search(r'kelembapan.* di (.+)', question)
-            lokasi = match.group(1)
-            return self._handle_kelembapan(lokasi)
+        if intent == 'kelembapan':
+            return self._handle_kelembapan(grup[0])
         
         # 12. Ringkasan cuaca di [lokasi]
-        if re.search(r'(ringkasan|summary) cuaca.* di (.+)', question):
-            match = re.search(r'(ringkasan|summary) cuaca.* di (.+)', question)
-            lokasi = match.group(2)
-            return self._handle_ringkasan_cuaca(lokasi)
+        if intent == 'ringkasan_cuaca':
+            return self._handle_ringkasan_cuaca(grup[1])
         
         # 13. [Entitas] cocok di mana? (Combined handler for animal/vegetable)
-        match_cocok_di_mana = re.search(r'(.+?) cocok di mana', question)
-        if match_cocok_di_mana:
-            nama_entitas_input = match_cocok_di_mana.group(1).strip()
+        if intent == 'entitas_cocok':
+            nama_entitas_input = grup[0].strip()
             
             # Try to find in animals first
             entitas_hewan = self._cari_entitas(nama_entitas_input, self.hewan_data)
@@ -325,25 +549,19 @@ class ChatbotEngine:
             return f"Maaf, **{nama_entitas_input.title()}** tidak ditemukan dalam database hewan maupun sayuran. Pastikan nama entitas sudah benar atau coba nama lain."
 
         # 14. [Hewan] cocok dipelihara di [lokasi]?
-        if re.search(r'apakah (.+?) cocok dipelihara di (.+)\?', question):
-            match = re.search(r'apakah (.+?) cocok dipelihara di (.+)\?', question)
-            nama_hewan = match.group(1).strip()
-            nama_lokasi = match.group(2).strip()
-            return self._handle_suhu_cocok_hewan(nama_lokasi, nama_hewan)
+        if intent == 'cocok_dipelihara':
+            return self._handle_suhu_cocok_hewan(grup[1].strip(), grup[0].strip())
         
         # 15. [Sayuran] cocok ditanam di [lokasi]?
-        if re.search(r'apakah (.+?) cocok ditanam di (.+)\?', question):
-            match = re.search(r'apakah (.+?) cocok ditanam di (.+)\?', question)
-            nama_sayuran = match.group(1).strip()
-            nama_lokasi = match.group(2).strip()
-            return self._handle_suhu_cocok_sayuran(nama_lokasi, nama_sayuran)
+        if intent == 'cocok_ditanam':
+            return self._handle_suhu_cocok_sayuran(grup[1].strip(), grup[0].strip())
 
         # 16. Daftar hewan
-        if re.search(r'(daftar hewan|hewan apa saja|hewan yang dapat dicek)', question):
+        if intent == 'daftar_hewan':
             return self._handle_daftar_hewan()
         
         # 17. Daftar sayuran
-        if re.search(r'(daftar sayuran|sayuran apa saja)', question):
+        if intent == 'daftar_sayuran':
             return self._handle_daftar_sayuran()
         
         return "Maaf, saya tidak mengerti pertanyaan Anda. Coba tanyakan hal lain seperti 'Cuaca di Jakarta' atau 'Daftar hewan'."
@@ -352,6 +570,32 @@ class ChatbotEngine:
         """Alias untuk process_question - untuk kompatibilitas dengan main.py"""
         return self.process_question(query)
     
+    def process_batch(self, pertanyaan_list: List[str]) -> List[Dict]:
+        """
+        Bentuk batch process_question: list {pertanyaan, jawaban, durasi_ms, duplikat} sejajar dengan input.
+        Pertanyaan yang sama (setelah strip + lowercase) hanya dijawab sekali, semua pertanyaan memakai
+        satu generasi data, dan lokasi yang sama hanya dicari sekali (find_lokasi di-memo selama batch).
+        """
+        sebelumnya = (getattr(self._data_request, 'data', None), getattr(self._data_request, 'lokasi', None))
+        self._data_request.data = self._aktif()
+        self._data_request.lokasi = {}
+        try:
+            memo = {}
+            hasil = []
+            for i, pertanyaan in enumerate(pertanyaan_list):
+                beri_giliran(i)
+                kunci = pertanyaan.strip().lower()
+                duplikat = kunci in memo
+                if not duplikat:
+                    mulai = time.perf_counter()
+                    memo[kunci] = self.process_question(pertanyaan)
+                    durasi = time.perf_counter() - mulai
+                hasil.append({"pertanyaan": pertanyaan, "jawaban": memo[kunci],
+                              "durasi_ms": 0.0 if duplikat else round(durasi * 1000, 3), "duplikat": duplikat})
+            return hasil
+        finally:
+            self._data_request.data, self._data_request.lokasi = sebelumnya
+    
     # Handler functions
     def _handle_cuaca_lokasi(self, nama_lokasi: str) -> str:
         key, lokasi = self.find_lokasi(nama_lokasi)
@@ -378,21 +622,77 @@ class ChatbotEngine:
         return f"Koordinat {nama_lokasi.title()}: longitude = {lokasi['lon']}, latitude = {lokasi['lat']}."
     
     def _handle_daftar_provinsi(self) -> str:
-        provinsi_list = sorted(set(data['provinsi'] for data in self.lokasi_data.values()))
+        provinsi_list = self.daftar_admin['provinsi']
         return f"Provinsi yang tersedia: {', '.join(provinsi_list)}."
     
     def _handle_daftar_kotkab(self) -> str:
-        kotkab_list = sorted(set(data['kotkab'] for data in self.lokasi_data.values()))
+        kotkab_list = self.daftar_admin['kotkab']
         return f"Kota/Kabupaten yang tersedia: {', '.join(kotkab_list)}."
     
     def _handle_daftar_kecamatan(self) -> str:
-        kecamatan_list = sorted(set(data['kecamatan'] for data in self.lokasi_data.values()))
+        kecamatan_list = self.daftar_admin['kecamatan']
         return f"Kecamatan yang tersedia: {', '.join(kecamatan_list[:50])}..." if len(kecamatan_list) > 50 else f"Kecamatan yang tersedia: {', '.join(kecamatan_list)}."
     
     def _handle_daftar_desa(self) -> str:
-        desa_list = sorted(set(data['desa'] for data in self.lokasi_data.values()))
+        desa_list = self.daftar_admin['desa']
         return f"Desa yang tersedia: {', '.join(desa_list[:50])}..." if len(desa_list) > 50 else f"Desa yang tersedia: {', '.join(desa_list)}."
     
+    def _handle_daftar_admin(self, level: str, nama_induk: Optional[str], halaman: Optional[str]) -> str:
+        """Daftar satu level wilayah, opsional disaring wilayah induk, per DAFTAR_PER_HALAMAN nama"""
+        level = 'kotkab' if level in ('kota', 'kabupaten') else level
+        daftar = self.daftar_admin[level]
+        judul = f"{LABEL_ADMIN[level]} yang tersedia"
+        catatan = ""
+        if nama_induk and not INDUK_ADMIN[level]:
+            catatan = f"{LABEL_ADMIN[level]} tidak bisa disaring per wilayah, berikut semuanya. "
+        elif nama_induk:
+            ditemukan = self._cari_induk_admin(level, nama_induk)
+            if isinstance(ditemukan, str):
+                return ditemukan
+            label_induk, daftar = ditemukan
+            judul = f"{LABEL_ADMIN[level]} di {label_induk}"
+        
+        jumlah_halaman = max(1, -(-len(daftar) // DAFTAR_PER_HALAMAN))
+        nomor = int(halaman) if halaman else 1
+        if not 1 <= nomor <= jumlah_halaman:
+            return f"Halaman {nomor} tidak tersedia, hanya ada {jumlah_halaman} halaman."
+        awal = (nomor - 1) * DAFTAR_PER_HALAMAN
+        isi = ', '.join(daftar[awal:awal + DAFTAR_PER_HALAMAN])
+        return f"{catatan}{judul} (halaman {nomor} dari {jumlah_halaman}, total {len(daftar)}): {isi}."
+    
+    def _cari_induk_admin(self, level: str, nama_induk: str):
+        """(label induk, daftar anak) untuk wilayah induk yang disebut, atau teks jawaban jika tidak/ambigu"""
+        per_induk = self.daftar_admin_per_induk[level]
+        induk_list = INDUK_ADMIN[level]
+        kunci = normalisasi(nama_induk)
+        # 1. Nama lengkap apa adanya, induk terdekat lebih dulu ("desa apa saja di kota baru": kecamatan Kota Baru)
+        for induk in induk_list:
+            if kunci in per_induk.get(induk, {}):
+                return per_induk[induk][kunci]
+        
+        kata = kunci.split(' ', 1)
+        if len(kata) == 2 and AWALAN_LEVEL.get(kata[0]) in induk_list:
+            # 2. Awalan eksplisit ("kabupaten bogor"): level dan jenis awalan harus sama, tidak ada fallback
+            induk = AWALAN_LEVEL[kata[0]]
+            if kata[1] in per_induk.get(induk, {}):
+                return per_induk[induk][kata[1]]
+            cocok = [k for k in self.induk_tanpa_awalan.get(induk, {}).get(kata[1], [])
+                     if JENIS_AWALAN.get(k.split(' ', 1)[0]) == JENIS_AWALAN[kata[0]]]
+            if len(cocok) == 1:
+                return per_induk[induk][cocok[0]]
+        else:
+            # 3. Tanpa awalan ("bogor"): cocokkan dengan nama induk tanpa awalan levelnya
+            for induk in induk_list:
+                cocok = self.induk_tanpa_awalan.get(induk, {}).get(kunci, [])
+                if len(cocok) == 1:
+                    return per_induk[induk][cocok[0]]
+                if len(cocok) > 1:
+                    pilihan = ', '.join(per_induk[induk][k][0] for k in cocok)
+                    return (f"Wilayah '{nama_induk}' cocok dengan beberapa {LABEL_ADMIN[induk]}: {pilihan}. "
+                            f"Sebutkan salah satunya, misalnya '{LABEL_ADMIN[level].lower()} apa saja di "
+                            f"{per_induk[induk][cocok[0]][0]}'.")
+        return f"Maaf, wilayah '{nama_induk}' tidak ditemukan."
+    
     def _handle_cuaca_detail(self, nama_lokasi: str) -> str:
         key, lokasi = self.find_lokasi(nama_lokasi)
         if not lokasi:
@@ -469,8 +769,8 @@ class ChatbotEngine:
             f"dan kelembapan ideal adalah {entitas['hu_min']}% - {entitas['hu_max']}%."
         )
 
-        # Cari lokasi yang cocok
-        lokasi_cocok = self.cari_lokasi_cocok(entitas, self.lokasi_data)
+        # Cari lokasi yang cocok (hanya 5 pertama yang disebut; jumlah total dari index)
+        lokasi_cocok, total_cocok = self.cari_lokasi_cocok_terindeks(entitas, LOKASI_COCOK_TAMPIL)
         
         if lokasi_cocok:
             lokasi_names = [
@@ -478,8 +778,8 @@ class ChatbotEngine:
                 for l in lokasi_cocok
             ]
             # Batasi hingga 5 lokasi pertama untuk ringkasan di chat
-            display_locations = ', '.join(lokasi_names[:5])
-            if len(lokasi_names) > 5:
+            display_locations = ', '.join(lokasi_names)
+            if total_cocok > LOKASI_COCOK_TAMPIL:
                 display_locations += "..."
             return (
                 f"Berdasarkan data rata-rata cuaca harian, **{entitas['nama']}** cocok di beberapa lokasi, "
@@ -556,29 +856,7 @@ if __name__ == "__main__":
         print("Data berhasil dimuat!")
         
         # Test beberapa pertanyaan
-        test_questions = [
-            "Cuaca di Jakarta",
-            "Bagaimana cuaca saat ini di Bandung?",
-            "Koordinat Surabaya",
-            "Data provinsi apa saja yang tersedia",
-            "Daftar hewan",
-            "Daftar sayuran",
-            "Hewan cocok di mana?",
-            "Domba cocok di mana?",
-            "Sayuran cocok di mana?",
-            "Cabai cocok di mana?",
-            "Apakah ayam cocok dipelihara di Medan?",
-            "Apakah cabai cocok ditanam di Binjai?",
-            "Sapi cocok di mana?", # Test with fuzzy match for animal
-            "Bayam cocok di mana?", # Test with fuzzy match for vegetable
-            "Apakah padi cocok ditanam di Indramayu?",
-            "Pucuk Jahe cocok di mana?", # Test the specific case
-            "Burung Dara cocok di mana?", # Test the specific case
-            "Pigeon cocok di mana?", # Test the specific case
-            "Ayam cocok di mana?", # Test the specific case
-        ]
-        
-        for question in test_questions:
+        for question in CONTOH_PERTANYAAN:
             print(f"\nQ: {question}")
             print(f"A: {chatbot.process_question(question)}")
             
@@ -0,0 +1,59 @@
+# climate_index.py
+import heapq
+import math
+from array import array
+from itertools import islice
+
+from cooperative import beri_giliran
+
+LEBAR_SUHU = 0.5       # °C per sel grid
+LEBAR_KELEMBAPAN = 2.0 # % per sel grid
+
+
+class IndeksIklim:
+    """
+    Grid 2-D atas (t_avg, hu_avg) untuk kueri persegi panjang suhu_min..suhu_max x hu_min..hu_max
+    (batas inklusif). Sel yang seluruhnya di dalam persegi dihitung langsung tanpa memeriksa titik;
+    hanya sel tepi yang difilter. Id titik = posisi dalam urutan input, sehingga hasil pertama
+    sama urutannya dengan scan linear.
+    """
+
+    def __init__(self, nilai_list):
+        """nilai_list: list (t_avg, hu_avg); nilai non-numerik dilewati."""
+        self.sel = {} # (i_suhu, i_hu) -> (array id naik, array t, array hu)
+        for i, (t, hu) in enumerate(nilai_list):
+            beri_giliran(i)
+            if not isinstance(t, (int, float)) or not isinstance(hu, (int, float)):
+                continue
+            if math.isnan(t) or math.isnan(hu):
+                continue
+            kunci = (math.floor(t / LEBAR_SUHU), math.floor(hu / LEBAR_KELEMBAPAN))
+            sel = self.sel.get(kunci)
+            if sel is None:
+                sel = self.sel[kunci] = (array('l'), array('d'), array('d'))
+            sel[0].append(i)
+            sel[1].append(t)
+            sel[2].append(hu)
+
+    def cari(self, suhu_min, suhu_max, hu_min, hu_max, limit=None):
+        """(id cocok terkecil sebanyak limit -- semua jika None --, jumlah total yang cocok)."""
+        # Pembagian float monoton: sel di antara sel tepi (eksklusif) pasti seluruhnya cocok
+        ts_min, ts_max = math.floor(suhu_min / LEBAR_SUHU), math.floor(suhu_max / LEBAR_SUHU)
+        hs_min, hs_max = math.floor(hu_min / LEBAR_KELEMBAPAN), math.floor(hu_max / LEBAR_KELEMBAPAN)
+        total = 0
+        sumber = []
+        for (i_t, i_h), (ids, ts, hus) in self.sel.items():
+            if not (ts_min <= i_t <= ts_max and hs_min <= i_h <= hs_max):
+                continue
+            if ts_min < i_t < ts_max and hs_min < i_h < hs_max:
+                total += len(ids)
+                sumber.append(ids)
+            else:
+                cocok = [id_ for id_, t, hu in zip(ids, ts, hus)
+                         if suhu_min <= t <= suhu_max and hu_min <= hu <= hu_max]
+                total += len(cocok)
+                sumber.append(cocok)
+        # Gabungkan id naik dari semua sel; berhenti begitu limit tercapai
+        gabungan = heapq.merge(*sumber)
+        hasil = list(gabungan if limit is None else islice(gabungan, limit))
+        return hasil, total
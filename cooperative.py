@@ -0,0 +1,16 @@
+# cooperative.py
+import time
+
+# Mode worker kooperatif (GUNICORN_WORKER_CLASS=gevent, lihat gunicorn.conf.py): gevent mem-patch
+# time/socket/threading sehingga sleep, request HTTP (requests) dan thread latar menjadi greenlet.
+# Yang tidak ikut di-patch adalah loop CPU panjang (parse ribuan file, scoring semua lokasi):
+# loop seperti itu memanggil beri_giliran() agar hub tetap bisa melayani koneksi lain.
+YIELD_EVERY = 100
+
+def beri_giliran(i=0):
+    """
+    Serahkan giliran jika i kelipatan YIELD_EVERY (tanpa argumen: selalu).
+    Di worker gevent time.sleep(0) kembali ke hub; di thread biasa hanya melepas GIL sebentar.
+    """
+    if i % YIELD_EVERY == 0:
+        time.sleep(0)
@@ -7,9 +7,11 @@ from collections import Counter
 import re # Import re for regex in normalize_weather_description
 import concurrent.futures # Import for parallel processing
 
+from cooperative import beri_giliran
+from filtered_store import DATA_FILTERED_DIR, alias_lokasi # DATA_FILTERED_DIR bisa diatur lewat env
+
 # --- Directory Paths ---
 CACHE_DIR = os.path.join(os.path.dirname(__file__), 'cache')
-DATA_FILTERED_DIR = os.path.join(os.path.dirname(__file__), 'data_filtered')
 SAMPAH_DIR = os.path.join(os.path.dirname(__file__), 'sampahku') # Define SAMPAH_DIR here as well
 
 # Ensure output directories exist
@@ -29,13 +31,14 @@ class DataFilterEngine:
         os.makedirs(self.sampah_folder, exist_ok=True)
 
     def run_filter_process(self):
+        """Menjalankan seluruh tahap filter. Mengembalikan jumlah file yang disimpan."""
         print(f"--- Memulai tugas terjadwal: Pemfilteran Data ({datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}) ---")
         print("🚀 Memulai proses filter data...")
 
         raw_files = self._load_raw_data()
         if not raw_files:
             print("✅ Ditemukan 0 data mentah di folder cache.")
-            return
+            return 0
 
         print(f"✅ Ditemukan {len(raw_files)} data mentah di folder cache.")
 
@@ -64,11 +67,13 @@ class DataFilterEngine:
 
         # Menyimpan Hasil
         print("\n--- Menyimpan Hasil Filter & Ringkasan ---")
-        self._save_filtered_data(final_filtered_data)
+        return self._save_filtered_data(final_filtered_data)
 
 
     def _read_json_file(self, filepath):
         """Helper function to read and process a single JSON file."""
+        # Di worker gevent thread pool di bawah berupa greenlet: serahkan giliran per file
+        beri_giliran()
         try:
             with open(filepath, 'r', encoding='utf-8') as f:
                 data = json.load(f)
@@ -135,7 +140,8 @@ class DataFilterEngine:
         # Valid timezones for Indonesia based on standard offsets from UTC
         valid_timezone_offsets = ["+07:00", "+08:00", "+09:00"]
 
-        for entry in raw_data_list:
+        for i, entry in enumerate(raw_data_list):
+            beri_giliran(i)
             lokasi = entry.get('lokasi', {})
             adm4_id = lokasi.get('adm4', 'N/A')
             
@@ -181,7 +187,8 @@ class DataFilterEngine:
         final_filtered_data = []
         current_time_utc = datetime.datetime.now(datetime.timezone.utc) 
         
-        for entry in location_filtered_data:
+        for i, entry in enumerate(location_filtered_data):
+            beri_giliran(i)
             weather_data = entry.get('cuaca', []) # 'cuaca' is now the flattened list
             adm4_id = entry.get('lokasi', {}).get('adm4', 'N/A')
             
@@ -238,7 +245,8 @@ class DataFilterEngine:
 
     def _summarize_weather_data(self, filtered_data):
         processed_data = []
-        for entry in filtered_data:
+        for i, entry in enumerate(filtered_data):
+            beri_giliran(i)
             loc = entry["lokasi"]
             weather_data = entry["cuaca"] # This is the cleaned and recent weather data
 
@@ -298,7 +306,8 @@ class DataFilterEngine:
 
     def _normalize_and_alias_data(self, summary_data):
         final_data_with_alias = []
-        for entry in summary_data:
+        for i, entry in enumerate(summary_data):
+            beri_giliran(i)
             # Normalisasi nama lokasi
             provinsi = re.sub(r'\s+', ' ', entry.get('provinsi', '').replace('KABUPATEN ', '').replace('KOTA ', '').title()).strip()
             kotkab = re.sub(r'\s+', ' ', entry.get('kotkab', '').replace('KABUPATEN ', '').replace('KOTA ', '').title()).strip()
@@ -316,34 +325,9 @@ class DataFilterEngine:
             if entry.get('ringkasan_harian') and entry['ringkasan_harian'].get('cuaca_dominan'):
                 entry['ringkasan_harian']['cuaca_dominan'] = self._normalize_weather_description(entry['ringkasan_harian']['cuaca_dominan'])
             
-            aliases = []
-            
-            # 1. Add the most specific name (desa)
-            if desa:
-                aliases.append(desa)
-
-            # 2. Add combinations of desa + kecamatan
-            if desa and kecamatan:
-                aliases.append(f"{desa} {kecamatan}")
-                aliases.append(f"{desa}, {kecamatan}") # With comma for natural language
-
-            # 3. Add combinations of desa + kecamatan + kotkab
-            if desa and kecamatan and kotkab:
-                aliases.append(f"{desa} {kecamatan} {kotkab}")
-                aliases.append(f"{desa}, {kecamatan}, {kotkab}") # With commas
-
-            # 4. Add combinations of desa + kecamatan + kotkab + provinsi
-            if desa and kecamatan and kotkab and provinsi:
-                aliases.append(f"{desa} {kecamatan} {kotkab} {provinsi}")
-                aliases.append(f"{desa}, {kecamatan}, {kotkab}, {provinsi}") # With commas
-
-            # 5. Add ADM4 code as a guaranteed unique identifier
-            if entry.get('adm4'):
-                aliases.append(entry['adm4'])
-
-            # Filter out empty or redundant aliases and ensure uniqueness within this list
+            # Alias standar (desa, desa+kecamatan, ..., adm4), aturan yang sama dibaca ulang oleh FilteredStore
             # By making these aliases highly specific, we reduce collisions when chatbot searches.
-            entry['alias'] = list(set([a.strip() for a in aliases if a and a.strip()])) 
+            entry['alias'] = alias_lokasi(desa, kecamatan, kotkab, provinsi, entry.get('adm4'))
 
             final_data_with_alias.append(entry)
 
@@ -368,7 +352,8 @@ class DataFilterEngine:
     def _save_filtered_data(self, filtered_data_list):
         print("\n--- Menyimpan Hasil Filter & Ringkasan ---")
         saved_count = 0
-        for data_item in filtered_data_list:
+        for i, data_item in enumerate(filtered_data_list):
+            beri_giliran(i)
             adm4 = data_item.get('adm4')
             if not adm4:
                 print(f"⚠️ Tidak dapat menyimpan data: Tidak ada 'adm4' di item data. Dilewati.")
@@ -397,6 +382,7 @@ class DataFilterEngine:
             except Exception as e:
                 print(f"❌ Gagal menyimpan {adm4}.json: {e}")
         print(f"✅ Selesai menyimpan {saved_count} file hasil filter.")
+        return saved_count
 
 # This part is for standalone testing of the filter engine
 if __name__ == '__main__':
@@ -0,0 +1,98 @@
+# data_version.py
+import os
+import json
+import time
+import hashlib
+import threading
+
+# File versi dibagikan lewat disk agar semua worker gunicorn melihat generasi yang sama
+VERSION_FILE = os.path.join(os.path.dirname(__file__), 'data_version.json')
+
+# --- Dataset yang diberi versi ---
+DATASET_CACHE = 'cache'        # cache/ hasil fetch BMKG -> /api/all, /api/search
+DATASET_FILTERED = 'filtered'  # data_filtered/ hasil filter -> /api/nearest-location, chatbot
+
+# Hasil smart_rekomendasi ikut bergantung pada jam sekarang (entri realtime terdekat
+# dan "hari ini"). Slot prakiraan BMKG jatuh di jam bulat, jadi titik perpindahannya
+# selalu di kelipatan 30 menit; respons aman di-cache sampai batas bucket berikutnya.
+WAKTU_BUCKET_SECONDS = 1800
+
+_lock = threading.Lock()
+_cached_state = {}
+_cached_mtime = None
+
+def _baca_state():
+    """Membaca file versi, di-cache berdasarkan mtime (cukup satu os.stat per panggilan)."""
+    global _cached_state, _cached_mtime
+    try:
+        mtime = os.stat(VERSION_FILE).st_mtime_ns
+    except FileNotFoundError:
+        return {}
+    if mtime != _cached_mtime:
+        try:
+            with open(VERSION_FILE, encoding='utf-8') as f:
+                _cached_state = json.load(f)
+            _cached_mtime = mtime
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"⚠️ Gagal baca {os.path.basename(VERSION_FILE)}: {e}")
+            return _cached_state
+    return _cached_state
+
+def _tulis_state(state):
+    tmp_path = f"{VERSION_FILE}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, VERSION_FILE) # atomic: pembaca tidak pernah melihat file setengah jadi
+
+def naikkan_versi(dataset, detik_refresh_berikutnya):
+    """Tandai dataset berubah: generasi +1 dan catat kapan refresh terjadwal berikutnya."""
+    with _lock:
+        state = dict(_baca_state())
+        now = time.time()
+        generasi = state.get(dataset, {}).get('generasi', 0) + 1
+        state[dataset] = {
+            "generasi": generasi,
+            "id": f"{generasi}.{int(now)}",
+            "diperbarui": now,
+            "refresh_berikutnya": now + detik_refresh_berikutnya,
+        }
+        _tulis_state(state)
+    print(f"🔖 Versi data '{dataset}' naik ke generasi {generasi}.")
+    return state[dataset]
+
+def atur_jadwal_refresh(dataset, detik_refresh_berikutnya):
+    """Perbarui jadwal refresh tanpa menaikkan generasi (data tidak berubah)."""
+    with _lock:
+        state = dict(_baca_state())
+        entry = dict(state.get(dataset, {"generasi": 0, "id": "0", "diperbarui": None}))
+        entry["refresh_berikutnya"] = time.time() + detik_refresh_berikutnya
+        state[dataset] = entry
+        _tulis_state(state)
+
+def versi(dataset):
+    """Info versi dataset: dict berisi generasi, id, diperbarui, refresh_berikutnya."""
+    return _baca_state().get(dataset, {"generasi": 0, "id": "0", "diperbarui": None, "refresh_berikutnya": None})
+
+def info_cache(datasets, kunci, pakai_bucket_waktu=False, ekstra=()):
+    """
+    Menghasilkan (etag, max_age) untuk respons yang dibangun dari `datasets`.
+    kunci: representasi query yang sudah dinormalisasi (path + parameter).
+    ekstra: penanda versi lain yang ikut menentukan isi respons (mis. mtime katalog).
+    """
+    now = time.time()
+    bagian = [kunci]
+    batas = []
+    for dataset in datasets:
+        v = versi(dataset)
+        bagian.append(f"{dataset}={v.get('id')}")
+        if v.get('refresh_berikutnya'):
+            batas.append(v['refresh_berikutnya'])
+    if pakai_bucket_waktu:
+        bucket = int(now // WAKTU_BUCKET_SECONDS)
+        bagian.append(f"t={bucket}")
+        batas.append((bucket + 1) * WAKTU_BUCKET_SECONDS)
+    bagian.extend(str(e) for e in ekstra)
+
+    etag = hashlib.sha1("|".join(bagian).encode('utf-8')).hexdigest()[:24]
+    max_age = max(0, int(min(batas) - now)) if batas else 0
+    return etag, max_age
@@ -0,0 +1,312 @@
+# filtered_store.py
+import os
+import sys
+import json
+import time
+import threading
+import concurrent.futures
+from collections.abc import Mapping
+
+from data_version import DATASET_FILTERED, versi
+from cooperative import beri_giliran
+
+# Folder data hasil filter: DATA_FILTERED_DIR dari environment, default di samping modul ini
+DATA_FILTERED_DIR = os.environ.get('DATA_FILTERED_DIR') or os.path.join(os.path.dirname(__file__), 'data_filtered')
+# Thread pembaca file JSON saat refresh (open/read melepas GIL; terasa di disk lambat / Windows)
+LOAD_WORKERS = int(os.environ.get('DATA_LOAD_WORKERS', 0)) or min(32, (os.cpu_count() or 1) * 2)
+LOAD_CHUNK = 256 # file per tugas pool
+# Angka cuaca (suhu/kelembapan, 1 desimal) hanya punya ratusan nilai berbeda: objek float dibagi antar lokasi
+_ANGKA_BERSAMA = {}
+
+
+def alias_lokasi(desa, kecamatan, kotkab, provinsi, adm4):
+    """Alias standar satu lokasi (dipakai DataFilterEngine saat menulis & Lokasi saat membaca)."""
+    aliases = []
+    if desa:
+        aliases.append(desa)
+    if desa and kecamatan:
+        aliases.append(f"{desa} {kecamatan}")
+        aliases.append(f"{desa}, {kecamatan}")
+    if desa and kecamatan and kotkab:
+        aliases.append(f"{desa} {kecamatan} {kotkab}")
+        aliases.append(f"{desa}, {kecamatan}, {kotkab}")
+    if desa and kecamatan and kotkab and provinsi:
+        aliases.append(f"{desa} {kecamatan} {kotkab} {provinsi}")
+        aliases.append(f"{desa}, {kecamatan}, {kotkab}, {provinsi}")
+    if adm4:
+        aliases.append(adm4)
+    return list(dict.fromkeys(a.strip() for a in aliases if a and a.strip()))
+
+
+class _Rekaman(Mapping):
+    """
+    Mapping read-only ber-__slots__ pengganti dict hasil json.load: field yang dikenal
+    disimpan di slot (string berulang di-intern, angka cuaca dibagi), key lain di _lain.
+    Key yang tidak ada di file = slot kosong, sehingga `in`/get/[] sama seperti dict aslinya.
+    """
+    __slots__ = ('_lain',)
+    FIELD = ()
+    FIELD_SET = frozenset()
+    FIELD_INTERN = frozenset()
+    FIELD_ANGKA = frozenset()
+    FIELD_REKAMAN = {}
+
+    def __init__(self, data, lain=None):
+        self._lain = lain
+        for kunci, nilai in data.items():
+            if kunci not in self.FIELD_SET:
+                if self._lain is None:
+                    self._lain = {}
+                self._lain[kunci] = nilai
+                continue
+            if kunci in self.FIELD_INTERN and isinstance(nilai, str):
+                nilai = sys.intern(nilai)
+            elif kunci in self.FIELD_ANGKA and type(nilai) is float:
+                nilai = _ANGKA_BERSAMA.setdefault(nilai, nilai)
+            elif kunci in self.FIELD_REKAMAN and isinstance(nilai, dict):
+                nilai = self.FIELD_REKAMAN[kunci](nilai)
+            setattr(self, kunci, nilai)
+
+    def __getitem__(self, kunci):
+        if kunci in self.FIELD_SET:
+            try:
+                return getattr(self, kunci)
+            except AttributeError:
+                raise KeyError(kunci) from None
+        if self._lain is None:
+            raise KeyError(kunci)
+        return self._lain[kunci]
+
+    def __iter__(self):
+        for kunci in self.FIELD:
+            if hasattr(self, kunci):
+                yield kunci
+        if self._lain is not None:
+            yield from self._lain
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def ke_dict(self):
+        """Salinan dict biasa (rekursif), untuk jsonify."""
+        return {kunci: nilai.ke_dict() if isinstance(nilai, _Rekaman) else nilai for kunci, nilai in self.items()}
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.ke_dict()!r})"
+
+
+class CuacaSaatIni(_Rekaman):
+    __slots__ = ('local_datetime', 'suhu', 'kelembapan', 'cuaca', 'ikon')
+    FIELD = __slots__
+    FIELD_SET = frozenset(FIELD)
+    FIELD_INTERN = frozenset(['local_datetime', 'cuaca', 'ikon'])
+    FIELD_ANGKA = frozenset(['suhu', 'kelembapan'])
+
+
+class RingkasanHarian(_Rekaman):
+    __slots__ = ('t_max', 't_min', 't_avg', 'hu_avg', 'cuaca_dominan')
+    FIELD = __slots__
+    FIELD_SET = frozenset(FIELD)
+    FIELD_INTERN = frozenset(['cuaca_dominan'])
+    FIELD_ANGKA = frozenset(['t_max', 't_min', 't_avg', 'hu_avg'])
+
+
+class Lokasi(_Rekaman):
+    """
+    Satu lokasi data_filtered. Alias yang sama dengan alias_lokasi() (kasus normal) tidak
+    disimpan, dibentuk ulang saat dibaca; alias lain disimpan apa adanya.
+    """
+    __slots__ = ('provinsi', 'kotkab', 'kecamatan', 'desa', 'lon', 'lat', 'timezone', 'adm4',
+                 'analysis_date', 'cuaca_saat_ini', 'ringkasan_harian', 'alias')
+    FIELD = __slots__
+    FIELD_SET = frozenset(FIELD)
+    FIELD_INTERN = frozenset(['provinsi', 'kotkab', 'kecamatan', 'desa', 'timezone', 'analysis_date'])
+    FIELD_REKAMAN = {'cuaca_saat_ini': CuacaSaatIni, 'ringkasan_harian': RingkasanHarian}
+
+    def __init__(self, data):
+        alias = data.get('alias')
+        lain = None
+        if isinstance(alias, list) and all(isinstance(a, str) for a in alias):
+            data = dict(data)
+            standar = self._alias_standar(data)
+            data['alias'] = None if set(alias) == set(standar) and len(alias) == len(standar) else tuple(alias)
+        elif 'alias' in data:
+            # Bukan list string: simpan apa adanya di _lain
+            data = dict(data)
+            lain = {'alias': data.pop('alias')}
+        super().__init__(data, lain)
+
+    @staticmethod
+    def _alias_standar(data):
+        return alias_lokasi(data.get('desa'), data.get('kecamatan'), data.get('kotkab'),
+                            data.get('provinsi'), data.get('adm4'))
+
+    def __getitem__(self, kunci):
+        if kunci == 'alias':
+            try:
+                alias = self.alias
+            except AttributeError:
+                if self._lain is None:
+                    raise KeyError(kunci) from None
+                return self._lain[kunci]
+            return self._alias_standar(self) if alias is None else list(alias)
+        return super().__getitem__(kunci)
+
+
+# Jaring pengaman jika file berubah tanpa kenaikan versi (mis. disalin manual)
+RESCAN_INTERVAL_SECONDS = 300
+
+
+class FilteredStore:
+    """
+    Data lokasi hasil filter (data_filtered/*.json) di memori, satu salinan per proses.
+    Folder dipindai ulang saat versi dataset 'filtered' berubah (atau tiap
+    RESCAN_INTERVAL_SECONDS) dan hanya file dengan mtime baru yang di-parse.
+
+    Indeks turunan (spasial, geocoder, cluster, ...) didaftarkan lewat turunan():
+    dibangun sekali per generasi data dan dibuang otomatis saat data berubah.
+    """
+
+    def __init__(self, folder=DATA_FILTERED_DIR):
+        self.folder = folder
+        self._files = {}     # filename -> (mtime_ns, Lokasi | None)
+        # (generasi, list Lokasi sesuai urutan os.listdir), ditukar sebagai satu referensi
+        self._state = (0, [])
+        self._turunan = {}   # nama -> (generasi, objek)
+        self._lock_turunan = {} # nama -> Lock: satu builder per indeks, indeks berbeda tetap paralel
+        self._lock_daftar = threading.Lock() # menjaga kedua dict di atas
+        self._versi_id = None
+        self._scan_terakhir = 0
+        self._lock = threading.Lock()
+        # beku: data tidak dimuat ulang di proses ini (worker mode SHARED_DATA, lihat shared_data.py)
+        self.beku = False
+
+    def _perlu_refresh(self):
+        if self.beku:
+            return False
+        return (versi(DATASET_FILTERED).get('id') != self._versi_id or
+                time.time() - self._scan_terakhir > RESCAN_INTERVAL_SECONDS)
+
+    def refresh(self, paksa=False):
+        if not paksa and not self._perlu_refresh():
+            return
+        with self._lock:
+            if not paksa and not self._perlu_refresh():
+                return
+            versi_id = versi(DATASET_FILTERED).get('id')
+            lama = self._files
+            baru = {}
+            berubah = 0
+            try:
+                filenames = [f for f in os.listdir(self.folder) if f.endswith('.json')]
+            except FileNotFoundError:
+                filenames = []
+
+            mulai = time.perf_counter()
+            dibaca = [] # (filename, mtime) file baru/berubah, di-parse sekaligus di bawah
+            for i, filename in enumerate(filenames):
+                beri_giliran(i)
+                path = os.path.join(self.folder, filename)
+                try:
+                    mtime = os.stat(path).st_mtime_ns
+                except OSError:
+                    continue
+                sebelumnya = lama.get(filename)
+                if sebelumnya and sebelumnya[0] == mtime:
+                    baru[filename] = sebelumnya
+                    continue
+                baru[filename] = None # jaga urutan os.listdir
+                dibaca.append((filename, mtime))
+
+            if dibaca:
+                # Satu tugas = satu potongan file (ribuan future per file justru lebih lambat dari serial)
+                potongan = [dibaca[i:i + LOAD_CHUNK] for i in range(0, len(dibaca), LOAD_CHUNK)]
+                with concurrent.futures.ThreadPoolExecutor(max_workers=LOAD_WORKERS) as executor:
+                    for i, (bagian, hasil) in enumerate(zip(potongan, executor.map(self._baca_potongan, potongan))):
+                        beri_giliran(i)
+                        for (filename, mtime), data in zip(bagian, hasil):
+                            baru[filename] = (mtime, data)
+                berubah = len(dibaca)
+
+            if berubah or len(baru) != len(lama):
+                lokasi_list = [data for _, data in baru.values() if data is not None]
+                generasi = self._state[0] + 1
+                self._files = baru
+                self._state = (generasi, lokasi_list)
+                print(f"📂 FilteredStore generasi {generasi}: {len(lokasi_list)} lokasi ({berubah} file baru/berubah, "
+                      f"{time.perf_counter() - mulai:.2f}s).")
+            self._versi_id = versi_id
+            self._scan_terakhir = time.time()
+
+    def _baca_potongan(self, bagian):
+        """Isi file untuk list (filename, mtime), sesuai urutan (dipanggil dari thread pool)."""
+        return [self._baca_file(filename) for filename, _ in bagian]
+
+    def _baca_file(self, filename):
+        """Lokasi dari isi file JSON, atau None jika rusak/bukan object."""
+        try:
+            with open(os.path.join(self.folder, filename), 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if not isinstance(data, dict):
+                return None
+            return Lokasi(data)
+        except Exception as e:
+            print(f"Error reading file {filename}: {e}")
+            return None
+
+    @property
+    def generasi(self):
+        return self._state[0]
+
+    def lokasi(self):
+        """Daftar Lokasi hasil filter (Mapping read-only), diperbarui jika perlu."""
+        self.refresh()
+        return self._state[1]
+
+    def status(self):
+        """Ringkasan data yang sudah dimuat (tanpa memicu refresh), untuk /ready."""
+        generasi, lokasi_list = self._state
+        return {
+            "generasi": generasi,
+            "jumlah_lokasi": len(lokasi_list),
+            "versi_id": self._versi_id,
+            "indeks": {nama: gen for nama, (gen, _) in self._salinan_turunan().items()},
+        }
+
+    def turunan(self, nama, builder):
+        """Objek turunan builder(lokasi_list) untuk generasi data saat ini (di-cache per generasi)."""
+        self.refresh()
+        generasi, lokasi_list = self._state
+        tersimpan = self._turunan.get(nama)
+        if tersimpan and tersimpan[0] == generasi:
+            return tersimpan[1]
+        with self._lock_daftar:
+            lock = self._lock_turunan.setdefault(nama, threading.Lock())
+        # Request serentak menunggu builder pertama, bukan membangun indeks yang sama sendiri-sendiri
+        with lock:
+            tersimpan = self._turunan.get(nama)
+            if tersimpan and tersimpan[0] == generasi:
+                return tersimpan[1]
+            mulai = time.perf_counter()
+            objek = builder(lokasi_list)
+            with self._lock_daftar:
+                self._turunan[nama] = (generasi, objek)
+            print(f"🧱 Indeks '{nama}' dibangun untuk generasi {generasi} ({time.perf_counter() - mulai:.2f}s).")
+            return objek
+
+    def _salinan_turunan(self):
+        with self._lock_daftar:
+            return dict(self._turunan)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_filtered_store():
+    """FilteredStore bersama untuk proses ini."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = FilteredStore()
+    return _store
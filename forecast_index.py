@@ -0,0 +1,248 @@
+# forecast_index.py
+import os
+import json
+import time
+import bisect
+import datetime
+import threading
+from array import array
+
+from ai_engine import CACHE_DIR
+from data_version import DATASET_CACHE, versi
+from cooperative import beri_giliran
+
+_tz_jakarta = None
+
+def tz_jakarta():
+    """Zona waktu Asia/Jakarta (pytz dimuat saat pertama dipakai, bukan saat import modul)."""
+    global _tz_jakarta
+    if _tz_jakarta is None:
+        import pytz
+        _tz_jakarta = pytz.timezone("Asia/Jakarta")
+    return _tz_jakarta
+
+# Jaring pengaman jika file cache berubah tanpa kenaikan versi (mis. disalin manual)
+RESCAN_INTERVAL_SECONDS = 300
+
+def _parse_datetime(dt_str):
+    """Format waktu BMKG: '%Y-%m-%d %H:%M:%S' atau '%Y-%m-%d %H:%M'. None jika gagal."""
+    try:
+        return datetime.datetime.strptime(dt_str, "%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        try:
+            return datetime.datetime.strptime(dt_str, "%Y-%m-%d %H:%M")
+        except Exception:
+            return None
+
+def _flatten_cuaca(data_list):
+    flat_list = []
+    for d_entry in data_list:
+        cuaca_entry_list = d_entry.get('cuaca', d_entry.get('data', []))
+        for c_item in cuaca_entry_list:
+            if isinstance(c_item, list):
+                flat_list.extend(c_item)
+            elif isinstance(c_item, dict):
+                flat_list.append(c_item)
+    return flat_list
+
+def _bulat(nilai):
+    return round(nilai, 1) if isinstance(nilai, (int, float)) else None
+
+
+class PrakiraanLokasi:
+    """
+    Prakiraan satu lokasi yang sudah diolah sekali saat dimuat:
+    epoch terurut untuk pencarian entri realtime (binary search), ringkasan suhu
+    per tanggal lokal, serta rata-rata periode yang tidak bergantung pada waktu.
+    """
+    __slots__ = ('adm4', 'lokasi', 'epochs', 'urutan', 't', 'hu', 'desc',
+                 'suhu_per_hari', 'rata2_suhu', 'rata2_hu', 'date_start', 'date_end')
+
+    def __init__(self, adm4, data):
+        self.adm4 = adm4
+        self.lokasi = data.get('lokasi', {})
+        flat_list = _flatten_cuaca(data.get('data', []))
+
+        t_values_all = []
+        hu_values_all = []
+        suhu_harian = {}
+        terurut = []
+        datetimes = []
+
+        for urutan, c_item in enumerate(flat_list):
+            t = c_item.get('t')
+            hu = c_item.get('hu')
+            if isinstance(t, (int, float)):
+                t_values_all.append(t)
+            if isinstance(hu, (int, float)):
+                hu_values_all.append(hu)
+
+            dt_str = c_item.get('datetime')
+            if dt_str:
+                dt_obj = _parse_datetime(dt_str)
+                if dt_obj:
+                    datetimes.append(dt_obj)
+
+            local_dt_str = c_item.get('local_datetime') or c_item.get('datetime')
+            if local_dt_str:
+                local_dt = _parse_datetime(local_dt_str)
+                if local_dt:
+                    if isinstance(t, (int, float)):
+                        suhu_harian.setdefault(local_dt.strftime('%Y-%m-%d'), []).append(t)
+                    epoch = tz_jakarta().localize(local_dt).timestamp()
+                    terurut.append((epoch, urutan, t, hu, c_item.get('weather_desc', '')))
+
+        # Stabil: untuk epoch yang sama, urutan asli di file tetap terjaga
+        terurut.sort(key=lambda x: (x[0], x[1]))
+        # Array bertipe (bukan list float): tidak membuat objek per nilai, dan halaman memorinya
+        # tidak ikut tersalin saat dibaca worker hasil fork (mode SHARED_DATA)
+        self.epochs = array('d', (x[0] for x in terurut))
+        self.urutan = array('l', (x[1] for x in terurut))
+        self.t = [x[2] for x in terurut]
+        self.hu = [x[3] for x in terurut]
+        self.desc = [x[4] for x in terurut]
+
+        self.suhu_per_hari = {
+            tanggal: {
+                "rata2": round(sum(nilai)/len(nilai), 1),
+                "max": round(max(nilai), 1),
+                "min": round(min(nilai), 1),
+            }
+            for tanggal, nilai in suhu_harian.items()
+        }
+
+        self.rata2_suhu = round(sum(t_values_all)/len(t_values_all), 1) if t_values_all else None
+        self.rata2_hu = round(sum(hu_values_all)/len(hu_values_all), 1) if hu_values_all else None
+
+        if datetimes:
+            self.date_start = min(datetimes).strftime('%Y-%m-%d')
+            self.date_end = max(datetimes).strftime('%Y-%m-%d')
+        else:
+            self.date_start, self.date_end = None, None
+
+    def indeks_realtime(self, now_ts):
+        """Indeks entri dengan waktu terdekat ke now_ts (seri: entri yang lebih awal di file)."""
+        epochs = self.epochs
+        if not epochs:
+            return None
+        i = bisect.bisect_left(epochs, now_ts)
+        if i == 0:
+            return 0
+        # Untuk epoch kembar, bisect_left memberi entri pertama menurut urutan file
+        sebelum = bisect.bisect_left(epochs, epochs[i - 1])
+        if i == len(epochs):
+            return sebelum
+        selisih_sebelum = now_ts - epochs[sebelum]
+        selisih_sesudah = epochs[i] - now_ts
+        if selisih_sebelum < selisih_sesudah:
+            return sebelum
+        if selisih_sesudah < selisih_sebelum:
+            return i
+        return sebelum if self.urutan[sebelum] < self.urutan[i] else i
+
+    def realtime(self, now_ts):
+        """(t_realtime, hu_realtime, weather_desc) dari entri terdekat, atau None jika tidak ada."""
+        i = self.indeks_realtime(now_ts)
+        if i is None:
+            return None
+        return _bulat(self.t[i]), _bulat(self.hu[i]), self.desc[i]
+
+    def suhu_hari_ini(self, tanggal_str):
+        ringkasan = self.suhu_per_hari.get(tanggal_str)
+        if ringkasan is None:
+            return {"rata2": None, "max": None, "min": None}
+        return dict(ringkasan)
+
+
+class ForecastIndex:
+    """
+    Indeks prakiraan semua lokasi di folder cache. File hanya di-parse ulang jika
+    mtime-nya berubah; pemindaian folder dipicu oleh kenaikan versi dataset 'cache'
+    (atau paling lambat tiap RESCAN_INTERVAL_SECONDS).
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self._records = {}   # filename -> (mtime_ns, PrakiraanLokasi | None)
+        self._urutan = []    # daftar PrakiraanLokasi sesuai urutan os.listdir
+        self._versi_id = None
+        self._scan_terakhir = 0
+        self._lock = threading.Lock()
+        # beku: data tidak dimuat ulang di proses ini (worker mode SHARED_DATA, lihat shared_data.py)
+        self.beku = False
+
+    def _perlu_refresh(self):
+        if self.beku:
+            return False
+        return (versi(DATASET_CACHE).get('id') != self._versi_id or
+                time.time() - self._scan_terakhir > RESCAN_INTERVAL_SECONDS)
+
+    def refresh(self, paksa=False):
+        if not paksa and not self._perlu_refresh():
+            return
+        with self._lock:
+            if not paksa and not self._perlu_refresh():
+                return
+            versi_id = versi(DATASET_CACHE).get('id')
+            lama = self._records
+            baru = {}
+            diparse = 0
+            mulai = time.perf_counter()
+            try:
+                filenames = [f for f in os.listdir(self.cache_dir) if f.endswith('.json')]
+            except FileNotFoundError:
+                filenames = []
+
+            for i, filename in enumerate(filenames):
+                beri_giliran(i)
+                path = os.path.join(self.cache_dir, filename)
+                try:
+                    mtime = os.stat(path).st_mtime_ns
+                except OSError:
+                    continue
+                sebelumnya = lama.get(filename)
+                if sebelumnya and sebelumnya[0] == mtime:
+                    baru[filename] = sebelumnya
+                    continue
+                try:
+                    with open(path, encoding='utf-8') as f:
+                        data = json.load(f)
+                    record = PrakiraanLokasi(filename[:-5], data)
+                except Exception:
+                    record = None # file rusak dilewati, sama seperti sebelumnya
+                baru[filename] = (mtime, record)
+                diparse += 1
+
+            # Tukar referensi sekaligus: pembaca tidak pernah melihat indeks setengah jadi
+            self._records = baru
+            self._urutan = [r for _, r in baru.values() if r is not None]
+            self._versi_id = versi_id
+            self._scan_terakhir = time.time()
+            if diparse:
+                print(f"📚 ForecastIndex: {diparse} file di-parse ulang, {len(self._urutan)} lokasi ({time.perf_counter() - mulai:.2f}s).")
+
+    def status(self):
+        """Ringkasan data yang sudah dimuat (tanpa memicu refresh), untuk /ready."""
+        return {
+            "dimuat": self._scan_terakhir > 0,
+            "jumlah_lokasi": len(self._urutan),
+            "versi_id": self._versi_id,
+        }
+
+    def lokasi(self):
+        """Daftar PrakiraanLokasi (urutan folder cache), diperbarui jika perlu."""
+        self.refresh()
+        return self._urutan
+
+
+_forecast_index = None
+_forecast_index_lock = threading.Lock()
+
+def get_forecast_index():
+    """ForecastIndex bersama untuk folder cache (dibuat saat pertama dipakai)."""
+    global _forecast_index
+    if _forecast_index is None:
+        with _forecast_index_lock:
+            if _forecast_index is None:
+                _forecast_index = ForecastIndex(CACHE_DIR)
+    return _forecast_index
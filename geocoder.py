@@ -0,0 +1,129 @@
+# geocoder.py
+import bisect
+
+from filtered_store import get_filtered_store
+from cooperative import beri_giliran
+from utils import normalize_text
+
+# Urutan prioritas jika satu nama cocok di beberapa level: yang paling spesifik menang
+LEVELS = ('desa', 'alias', 'kecamatan', 'kotkab', 'provinsi')
+# Kata awalan administratif yang diabaikan ("Kecamatan Cibinong" == "Cibinong")
+AWALAN = ('desa', 'kelurahan', 'kel', 'kecamatan', 'kec', 'kabupaten', 'kab', 'kota', 'provinsi', 'prov')
+# Awalan yang memang penanda level nama itu sendiri: kecamatan "Kota Baru" tetap "kota baru", bukan "baru"
+AWALAN_LEVEL = {
+    'desa': ('desa', 'kelurahan', 'kel'),
+    'kecamatan': ('kecamatan', 'kec'),
+    'kotkab': ('kabupaten', 'kab', 'kota'),
+    'provinsi': ('provinsi', 'prov'),
+}
+FUZZY_CUTOFF = 80
+
+def normalisasi(nama):
+    return ' '.join(normalize_text(nama or '').split())
+
+def _tanpa_awalan(kunci):
+    kata = kunci.split(' ', 1)
+    if len(kata) == 2 and kata[0] in AWALAN:
+        return kata[1]
+    return kunci
+
+
+class Geocoder:
+    """
+    Nama lokasi (desa, alias, kecamatan, kotkab, provinsi) -> koordinat, dari data hasil filter.
+    Nama wilayah di atas desa memakai titik tengah (rata-rata) semua desa anggotanya.
+    Pencarian: exact (dict), prefix (bisect pada kunci terurut), lalu fuzzy (rapidfuzz).
+    """
+
+    def __init__(self, lokasi_list):
+        agregat = {} # (kunci, level, tanpa awalan?) -> [sum_lat, sum_lon, n, label, adm4 pertama]
+        for i, data in enumerate(lokasi_list):
+            beri_giliran(i)
+            lat, lon = data.get('lat'), data.get('lon')
+            if not isinstance(lat, (int, float)) or not isinstance(lon, (int, float)):
+                continue
+            nama_level = [(data.get(level), level) for level in ('desa', 'kecamatan', 'kotkab', 'provinsi')]
+            nama_level += [(alias, 'alias') for alias in data.get('alias') or [] if isinstance(alias, str)]
+            for nama, level in nama_level:
+                kunci = normalisasi(nama)
+                if not kunci:
+                    continue
+                varian = [(kunci, False)]
+                kata = kunci.split(' ', 1)
+                if len(kata) == 2 and kata[0] in AWALAN_LEVEL.get(level, ()):
+                    varian.append((kata[1], True))
+                for k, pendek in varian:
+                    a = agregat.get((k, level, pendek))
+                    if a is None:
+                        agregat[(k, level, pendek)] = [lat, lon, 1, nama, data.get('adm4')]
+                    else:
+                        a[0] += lat
+                        a[1] += lon
+                        a[2] += 1
+
+        self.entri = {} # nama lengkap -> hasil terbaik (level paling spesifik)
+        # Nama tanpa awalan level ("bogor" untuk "Kab. Bogor"): dipakai hanya jika nama lengkap tidak cocok
+        self.entri_pendek = {}
+        prioritas = {level: i for i, level in enumerate(LEVELS)}
+        for (kunci, level, pendek), (sum_lat, sum_lon, n, label, adm4) in agregat.items():
+            tabel = self.entri_pendek if pendek else self.entri
+            lama = tabel.get(kunci)
+            if lama and prioritas[lama['level']] <= prioritas[level]:
+                continue
+            tabel[kunci] = {
+                "nama": label,
+                "level": level,
+                "lat": sum_lat / n,
+                "lon": sum_lon / n,
+                # adm4 hanya bermakna jika nama menunjuk satu desa
+                "adm4": adm4 if n == 1 and level in ('desa', 'alias') else None,
+                "jumlah_desa": n,
+            }
+        self.kunci_terurut = sorted(self.entri.keys() | self.entri_pendek.keys())
+
+    def _entri(self, kunci):
+        return self.entri.get(kunci) or self.entri_pendek[kunci]
+
+    def _prefix(self, q):
+        i = bisect.bisect_left(self.kunci_terurut, q)
+        if i < len(self.kunci_terurut) and self.kunci_terurut[i].startswith(q):
+            return self.kunci_terurut[i]
+        return None
+
+    def cari(self, nama, fuzzy=True):
+        """Hasil geocoding untuk satu nama (dict dengan lat/lon, level, cara, skor) atau None."""
+        q = normalisasi(nama)
+        if not q:
+            return None
+        for kunci in (q, _tanpa_awalan(q)):
+            if kunci in self.entri:
+                return dict(self.entri[kunci], cara='exact', skor=100)
+        if q in self.entri_pendek:
+            return dict(self.entri_pendek[q], cara='exact', skor=100)
+        for kunci in (q, _tanpa_awalan(q)):
+            cocok = self._prefix(kunci)
+            if cocok:
+                return dict(self._entri(cocok), cara='prefix', skor=100)
+        if fuzzy and self.kunci_terurut:
+            from rapidfuzz import fuzz, process # diimpor saat fuzzy pertama dipakai (startup lebih cepat)
+            cocok = process.extractOne(_tanpa_awalan(q), self.kunci_terurut, scorer=fuzz.ratio,
+                                       score_cutoff=FUZZY_CUTOFF)
+            if cocok:
+                return dict(self._entri(cocok[0]), cara='fuzzy', skor=round(cocok[1], 1))
+        return None
+
+    def cari_banyak(self, nama_list, fuzzy=True):
+        """Bentuk batch: list hasil sejajar dengan nama_list; nama yang sama hanya dicari sekali."""
+        memo = {}
+        hasil = []
+        for nama in nama_list:
+            q = normalisasi(nama)
+            if q not in memo:
+                memo[q] = self.cari(q, fuzzy)
+            hasil.append(memo[q])
+        return hasil
+
+
+def get_geocoder():
+    """Geocoder untuk generasi data_filtered saat ini (dibangun ulang saat data berubah)."""
+    return get_filtered_store().turunan('geocoder', Geocoder)
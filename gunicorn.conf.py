@@ -0,0 +1,28 @@
+# gunicorn.conf.py (dibaca otomatis oleh `gunicorn app:app` dari folder ini)
+import os
+
+# Mode data bersama antar worker (lihat shared_data.py): SHARED_DATA=1 -> app dan data
+# serving dimuat sekali di master lalu dibagi ke worker lewat fork (copy-on-write)
+preload_app = os.environ.get("SHARED_DATA", "0") == "1"
+
+# Worker: "sync" (default) atau "gevent" (kooperatif: sleep, socket, requests dan thread latar
+# menjadi greenlet; loop CPU panjang menyerahkan giliran lewat cooperative.beri_giliran)
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "sync")
+if worker_class == "gevent":
+    worker_connections = int(os.environ.get("GUNICORN_WORKER_CONNECTIONS", "1000"))
+    if preload_app:
+        # App dimuat di master: patch harus terjadi sebelum threading/socket/requests diimpor
+        from gevent import monkey
+        monkey.patch_all()
+
+def pre_fork(server, worker):
+    if preload_app:
+        import shared_data
+        shared_data.sebelum_fork()
+
+def post_fork(server, worker):
+    if preload_app:
+        import shared_data
+        from filtered_store import get_filtered_store
+        from forecast_index import get_forecast_index
+        shared_data.setelah_fork(get_filtered_store(), get_forecast_index())
@@ -0,0 +1,34 @@
+# intent_router.py
+import re
+
+
+class IntentRouter:
+    """
+    Pencocokan intent dengan pola yang dikompilasi sekali. Tiap intent punya kata kunci literal
+    (minimal satu pasti muncul jika polanya cocok); regex intent hanya dijalankan jika salah satu
+    kata kuncinya ada di teks (cek `in`, jauh lebih murah dari re.search), dan hanya sekali:
+    grup diambil dari match yang sama.
+
+    Hasil sama dengan memanggil re.search(pola, teks) per intent secara berurutan: intent
+    pertama yang cocok menang. (Satu regex gabungan (?=...)|(?=...) yang mempertahankan urutan
+    prioritas justru lebih lambat di modul re: optimasi prefix literal hilang di dalam lookahead.)
+    """
+
+    def __init__(self, intents):
+        """intents: list (nama, pola, kata_kunci) sesuai urutan prioritas."""
+        self.intents = []
+        for nama, pola, kata_kunci in intents:
+            if not kata_kunci:
+                raise ValueError(f"Intent '{nama}' butuh minimal satu kata kunci")
+            self.intents.append((nama, re.compile(pola), tuple(kata_kunci)))
+
+    def cocokkan(self, teks):
+        """(nama intent, tuple grup) untuk intent pertama yang cocok, atau (None, ())."""
+        for nama, pola, kata_kunci in self.intents:
+            for kata in kata_kunci:
+                if kata in teks:
+                    match = pola.search(teks)
+                    if match:
+                        return nama, match.groups()
+                    break
+        return None, ()
@@ -0,0 +1,144 @@
+# katalog.py
+import os
+import json
+import time
+import threading
+
+KATALOG_DIR = os.path.join(os.path.dirname(__file__), 'data')
+HEWAN_FILE = os.path.join(KATALOG_DIR, 'hewan_cocok.json')
+SAYURAN_FILE = os.path.join(KATALOG_DIR, 'sayuran_cocok.json')
+
+# Batas frekuensi os.stat: perubahan file katalog terlihat paling lambat setelah selang ini
+MTIME_CHECK_INTERVAL = 5
+
+RANGE_FIELDS = ("suhu_min", "suhu_max", "hu_min", "hu_max")
+
+def _validasi_item(item, filename):
+    """Item valid: punya nama dan rentang numerik dengan min <= max. Mengembalikan salinan + nilai turunan."""
+    if not isinstance(item, dict) or not isinstance(item.get("nama"), str) or not item["nama"].strip():
+        print(f"⚠️ Item tanpa nama di {filename} dilewati: {item}")
+        return None
+    if not all(isinstance(item.get(f), (int, float)) and not isinstance(item.get(f), bool) for f in RANGE_FIELDS):
+        print(f"⚠️ Item '{item['nama']}' di {filename} tidak lengkap (min/max suhu/kelembapan), dilewati.")
+        return None
+    if item["suhu_min"] > item["suhu_max"] or item["hu_min"] > item["hu_max"]:
+        print(f"⚠️ Item '{item['nama']}' di {filename} punya rentang terbalik, dilewati.")
+        return None
+
+    hasil = dict(item)
+    hasil["suhu_mid"] = (item["suhu_min"] + item["suhu_max"]) / 2
+    hasil["hu_mid"] = (item["hu_min"] + item["hu_max"]) / 2
+    hasil["suhu_lebar"] = item["suhu_max"] - item["suhu_min"]
+    hasil["hu_lebar"] = item["hu_max"] - item["hu_min"]
+    return hasil
+
+def _muat_file(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        print(f"⚠️ File {os.path.basename(path)} tidak ditemukan. Katalog kosong.")
+        return []
+    except (json.JSONDecodeError, OSError) as e:
+        print(f"❌ Gagal baca {os.path.basename(path)}: {e}")
+        return None
+    if not isinstance(data, list):
+        print(f"❌ {os.path.basename(path)} bukan list di root.")
+        return None
+    items = (_validasi_item(item, os.path.basename(path)) for item in data)
+    return [item for item in items if item is not None]
+
+
+class Katalog:
+    """
+    Katalog hewan & sayuran bersama (satu salinan per proses). File hanya dibaca ulang
+    jika mtime berubah; item sudah divalidasi dan punya suhu_mid/hu_mid/suhu_lebar/hu_lebar.
+    List yang dikembalikan dianggap read-only: reload menukar list baru, bukan mengubah isinya.
+    """
+
+    def __init__(self, hewan_path=HEWAN_FILE, sayuran_path=SAYURAN_FILE):
+        self.paths = {'hewan': hewan_path, 'sayuran': sayuran_path}
+        self._items = {'hewan': [], 'sayuran': []}
+        self._by_nama = {'hewan': {}, 'sayuran': {}}
+        self._mtimes = {'hewan': None, 'sayuran': None}
+        self._cek_terakhir = 0
+        self._lock = threading.Lock()
+
+    def _mtime(self, tipe):
+        try:
+            return os.stat(self.paths[tipe]).st_mtime_ns
+        except OSError:
+            return 0
+
+    def _muat_jika_berubah(self):
+        now = time.monotonic()
+        if self._cek_terakhir and now - self._cek_terakhir < MTIME_CHECK_INTERVAL:
+            return
+        with self._lock:
+            if self._cek_terakhir and now - self._cek_terakhir < MTIME_CHECK_INTERVAL:
+                return
+            for tipe in ('hewan', 'sayuran'):
+                mtime = self._mtime(tipe)
+                if mtime == self._mtimes[tipe]:
+                    continue
+                items = _muat_file(self.paths[tipe])
+                if items is None:
+                    # File sedang rusak/setengah tersimpan: pertahankan versi lama, coba lagi nanti
+                    continue
+                by_nama = {}
+                for item in items:
+                    by_nama.setdefault(item["nama"].lower(), item) # nama duplikat: yang pertama menang
+                self._items[tipe] = items
+                self._by_nama[tipe] = by_nama
+                self._mtimes[tipe] = mtime
+                print(f"📗 Katalog {tipe} dimuat: {len(items)} item.")
+            self._cek_terakhir = time.monotonic()
+
+    @property
+    def hewan(self):
+        self._muat_jika_berubah()
+        return self._items['hewan']
+
+    @property
+    def sayuran(self):
+        self._muat_jika_berubah()
+        return self._items['sayuran']
+
+    @property
+    def versi(self):
+        """Penanda versi katalog (mtime kedua file), untuk ETag."""
+        self._muat_jika_berubah()
+        return (self._mtimes['hewan'], self._mtimes['sayuran'])
+
+    def status(self):
+        """Jumlah item yang sudah dimuat (tanpa membaca file), untuk /ready."""
+        return {
+            "dimuat": self._cek_terakhir > 0,
+            "hewan": len(self._items['hewan']),
+            "sayuran": len(self._items['sayuran']),
+        }
+
+    def cari(self, nama, tipe=None):
+        """Cari item berdasarkan nama persis (tanpa beda huruf besar/kecil). Mengembalikan (tipe, item)."""
+        self._muat_jika_berubah()
+        nama = nama.lower().strip()
+        for tipe_item in ('hewan', 'sayuran'):
+            if tipe and tipe != tipe_item:
+                continue
+            item = self._by_nama[tipe_item].get(nama)
+            if item:
+                return tipe_item, item
+        return None, None
+
+
+_katalog = None
+_katalog_lock = threading.Lock()
+
+def get_katalog():
+    """Instance Katalog bersama untuk proses ini."""
+    global _katalog
+    if _katalog is None:
+        with _katalog_lock:
+            if _katalog is None:
+                _katalog = Katalog()
+    return _katalog
@@ -1,71 +1,135 @@
 # laporan_handler.py
-import os
-import json
-import uuid # Pastikan uuid diimpor
 from datetime import datetime # Impor datetime untuk timestamp
 
-# --- PERUBAHAN DI SINI ---
-# Asumsi smart_rekomendasi SEKARANG ada di recommendation_module.py
-from recommendation_module import smart_rekomendasi
-# --- AKHIR PERUBAHAN ---
+# Geocoding nama lokasi memakai indeks nama lokasi di memori (geocoder.py)
+from geocoder import get_geocoder
 
-# Direktori tempat menyimpan file laporan
-LAPORAN_DIR = os.path.join(os.path.dirname(__file__), 'laporan')
+# Reverse geocoding koordinat -> desa (adm4) terdekat lewat KD-tree (spatial_index.py)
+from spatial_index import get_indeks_spasial
 
-# Pastikan folder 'laporan' ada. Jika tidak, akan dibuat.
-if not os.path.exists(LAPORAN_DIR):
-    os.makedirs(LAPORAN_DIR)
+# Laporan disimpan di database SQLite (laporan.db); file lama di folder 'laporan' diimpor otomatis
+from laporan_store import get_laporan_store
 
 # Koordinat default untuk pusat Indonesia, akan digunakan jika lokasi tidak ditemukan
 DEFAULT_LAT = -2.0
 DEFAULT_LON = 118.0
 
-def simpan_laporan(data_laporan):
-    """
-    Menyimpan data laporan ke dalam file JSON terpisah di folder LAPORAN_DIR.
-    data_laporan: dictionary yang berisi detail laporan dari frontend.
-    """
-    lokasi_nama = data_laporan.get('lokasi', '').strip()
-    
-    # Inisialisasi lat, lon dengan nilai dari data_laporan (jika sudah ada dari frontend)
-    # Ini penting agar koordinat yang sudah di-geocode di frontend tidak ditimpa
+# Laporan lebih jauh dari ini dari desa mana pun tidak dikaitkan ke adm4
+REVERSE_GEOCODE_MAX_KM = 50
+
+def _wilayah_terdekat(lat, lon):
+    """(lokasi desa terdekat dalam radius, {'adm4', 'wilayah'}) atau (None, None)."""
+    hasil = get_indeks_spasial().terdekat(lat, lon, 1, REVERSE_GEOCODE_MAX_KM)
+    if not hasil:
+        return None, None
+    jarak, lokasi = hasil[0]
+    return lokasi, {
+        "adm4": lokasi.get('adm4'),
+        "wilayah": {
+            "desa": lokasi.get('desa'),
+            "kecamatan": lokasi.get('kecamatan'),
+            "kotkab": lokasi.get('kotkab'),
+            "provinsi": lokasi.get('provinsi'),
+            "jarak_km": round(jarak, 3),
+        },
+    }
+
+def _reverse_geocode(data_laporan):
+    """Tambahkan adm4 desa terdekat dan snapshot cuaca saat ini ke laporan (jika ada dalam radius)."""
+    try:
+        lokasi, wilayah = _wilayah_terdekat(data_laporan['lat'], data_laporan['lon'])
+    except Exception as e:
+        print(f"WARNING: Gagal reverse geocoding laporan: {e}")
+        return
+    if lokasi is None:
+        return
+    cuaca = lokasi.get('cuaca_saat_ini') or {}
+    data_laporan.update(wilayah)
+    data_laporan['cuaca_snapshot'] = {
+        "local_datetime": cuaca.get('local_datetime'),
+        "suhu": cuaca.get('suhu'),
+        "kelembapan": cuaca.get('kelembapan'),
+        "cuaca": cuaca.get('cuaca'),
+    }
+
+def _perlu_geocode(data_laporan):
+    return bool((data_laporan.get('lokasi') or '').strip()) and (
+        data_laporan.get('lat') is None or data_laporan.get('lon') is None)
+
+def _lengkapi_laporan(data_laporan, hasil_geocode):
+    """Isi lat/lon (hasil geocode atau default), adm4 + snapshot cuaca, dan waktu pada data laporan."""
+    # Koordinat yang sudah di-geocode di frontend tidak ditimpa
     lat = data_laporan.get('lat')
     lon = data_laporan.get('lon')
-
-    # Jika lokasi nama diberikan dan lat/lon belum diisi (misal geocoding frontend gagal)
-    # atau jika smart_rekomendasi dapat memberikan koordinat yang lebih akurat
-    if lokasi_nama and (lat is None or lon is None):
-        try:
-            # Panggil smart_rekomendasi untuk mendapatkan koordinat berdasarkan nama lokasi
-            # Asumsi smart_rekomendasi mengembalikan list dari dict, dan hasil pertama adalah yang terbaik
-            hasil_rekomendasi = smart_rekomendasi(lokasi_nama)
-            if hasil_rekomendasi and isinstance(hasil_rekomendasi, list) and len(hasil_rekomendasi) > 0:
-                # Ambil lat/lon dari hasil rekomendasi pertama
-                rec_lat = hasil_rekomendasi[0].get('lat')
-                rec_lon = hasil_rekomendasi[0].get('lon')
-                
-                # Gunakan koordinat dari rekomendasi jika valid
-                if rec_lat is not None and rec_lon is not None:
-                    lat = float(rec_lat)
-                    lon = float(rec_lon)
-                    print(f"DEBUG: Lokasi '{lokasi_nama}' di-geocode ulang di backend: {lat}, {lon}")
-        except Exception as e:
-            print(f"WARNING: Gagal geocoding '{lokasi_nama}' di backend: {e}")
-            # Biarkan lat/lon tetap None jika ada error, agar fallback ke default
+    if (lat is None or lon is None) and hasil_geocode:
+        lat, lon = hasil_geocode['lat'], hasil_geocode['lon']
+        print(f"DEBUG: Lokasi '{data_laporan.get('lokasi')}' di-geocode di backend "
+              f"({hasil_geocode['cara']}, {hasil_geocode['level']}): {lat}, {lon}")
 
     # Pastikan lat dan lon memiliki nilai. Jika masih None setelah upaya geocoding, gunakan default.
     data_laporan['lat'] = float(lat) if lat is not None else DEFAULT_LAT
     data_laporan['lon'] = float(lon) if lon is not None else DEFAULT_LON
 
+    # Koordinat default (lokasi tidak diketahui) tidak di-reverse-geocode
+    if lat is not None and lon is not None:
+        _reverse_geocode(data_laporan)
+
     # Tambahkan timestamp jika belum ada (dari frontend)
     if 'waktu' not in data_laporan:
         data_laporan['waktu'] = datetime.now().isoformat()
+    return data_laporan
+
+def lengkapi_adm4_laporan():
+    """
+    Reverse-geocode laporan tersimpan yang belum punya adm4 (laporan lama hasil impor folder tidak
+    melewati _lengkapi_laporan). Hanya adm4 + wilayah: cuaca saat ini bukan cuaca saat laporan dibuat.
+    """
+    def resolver(lat, lon):
+        # Koordinat default = lokasi tidak diketahui
+        if (lat, lon) == (DEFAULT_LAT, DEFAULT_LON):
+            return None
+        return _wilayah_terdekat(lat, lon)[1]
 
-    # Gunakan uuid untuk nama file yang unik
-    filename = f"{uuid.uuid4()}.json"
-    filepath = os.path.join(LAPORAN_DIR, filename)
+    jumlah = get_laporan_store().lengkapi_adm4(resolver)
+    if jumlah:
+        print(f"📍 adm4 diisi untuk {jumlah} laporan lama.")
+    return jumlah
+
+def simpan_laporan(data_laporan):
+    """
+    Menyimpan data laporan ke LaporanStore (SQLite).
+    data_laporan: dictionary yang berisi detail laporan dari frontend.
+    """
+    hasil_geocode = None
+    if _perlu_geocode(data_laporan):
+        try:
+            hasil_geocode = get_geocoder().cari(data_laporan['lokasi'])
+        except Exception as e:
+            print(f"WARNING: Gagal geocoding '{data_laporan.get('lokasi')}' di backend: {e}")
+            # Biarkan lat/lon tetap None jika ada error, agar fallback ke default
+    _lengkapi_laporan(data_laporan, hasil_geocode)
+
+    # id unik (uuid4) selalu ditetapkan oleh store
+    get_laporan_store().simpan(data_laporan)
+
+    print(f"Laporan berhasil disimpan dengan UUID {data_laporan['id']}")
+
+def simpan_laporan_banyak(laporan_list):
+    """
+    Bentuk batch simpan_laporan untuk impor banyak laporan: geocoding sekali per nama lokasi
+    unik dan satu transaksi database. Mengembalikan jumlah laporan yang disimpan.
+    """
+    perlu = [data for data in laporan_list if _perlu_geocode(data)]
+    hasil_geocode = {}
+    if perlu:
+        try:
+            hasil = get_geocoder().cari_banyak([data['lokasi'] for data in perlu])
+            hasil_geocode = {id(data): h for data, h in zip(perlu, hasil)}
+        except Exception as e:
+            print(f"WARNING: Gagal geocoding batch di backend: {e}")
+    for data in laporan_list:
+        _lengkapi_laporan(data, hasil_geocode.get(id(data)))
 
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(data_laporan, f, ensure_ascii=False, indent=2)
-    
-    print(f"Laporan berhasil disimpan dengan UUID {filename} di {filepath}")
\ No newline at end of file
+    get_laporan_store().simpan_banyak(laporan_list)
+    print(f"{len(laporan_list)} laporan berhasil disimpan.")
+    return len(laporan_list)
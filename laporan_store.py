@@ -0,0 +1,243 @@
+# laporan_store.py
+import os
+import sys
+import json
+import uuid
+import base64
+import sqlite3
+import threading
+
+def _thread_local():
+    """
+    threading.local asli. Di worker gevent threading.local di-patch menjadi per-greenlet (= koneksi
+    baru tiap request); koneksi cukup per thread OS karena query sqlite3 tidak pernah menyerahkan
+    giliran di tengah jalan. gevent tidak diimpor jika belum dipakai proses ini.
+    """
+    monkey = sys.modules.get('gevent.monkey')
+    if monkey is not None:
+        return monkey.get_original('threading', 'local')()
+    return threading.local()
+
+LAPORAN_DIR = os.path.join(os.path.dirname(__file__), 'laporan')
+LAPORAN_DB = os.path.join(os.path.dirname(__file__), 'laporan.db')
+
+HALAMAN_MAX = 500
+# Koneksi milik proses induk yang terbawa fork: disimpan (tidak pernah dipakai/ditutup) di proses anak
+_koneksi_warisan = []
+
+_SKEMA = """
+CREATE TABLE IF NOT EXISTS laporan (
+    seq      INTEGER PRIMARY KEY AUTOINCREMENT,
+    id       TEXT NOT NULL UNIQUE,
+    waktu    TEXT NOT NULL DEFAULT '',
+    kategori TEXT,
+    lat      REAL,
+    lon      REAL,
+    adm4     TEXT,
+    data     TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_laporan_waktu ON laporan (waktu, seq);
+CREATE INDEX IF NOT EXISTS idx_laporan_kategori ON laporan (kategori, waktu, seq);
+CREATE INDEX IF NOT EXISTS idx_laporan_latlon ON laporan (lat, lon);
+CREATE TABLE IF NOT EXISTS meta (kunci TEXT PRIMARY KEY, nilai TEXT);
+"""
+
+def _angka(nilai):
+    try:
+        return float(nilai)
+    except (TypeError, ValueError):
+        return None
+
+def _encode_cursor(waktu, seq):
+    return base64.urlsafe_b64encode(json.dumps([waktu, seq]).encode()).decode().rstrip('=')
+
+def _decode_cursor(cursor):
+    """Cursor -> (waktu, seq); ValueError jika tidak valid."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        waktu, seq = json.loads(raw)
+    except Exception:
+        raise ValueError("cursor tidak valid")
+    if not isinstance(waktu, str) or not isinstance(seq, int):
+        raise ValueError("cursor tidak valid")
+    return waktu, seq
+
+
+class LaporanStore:
+    """
+    Laporan warga di SQLite (mode WAL): satu baris per laporan, isi lengkap sebagai JSON,
+    dengan indeks pada waktu, kategori, adm4 dan koordinat. Satu koneksi per thread.
+    Urutan daftar: terbaru dulu (waktu, lalu urutan masuk); paginasi memakai cursor keyset.
+    """
+
+    def __init__(self, path=LAPORAN_DB, folder_impor=LAPORAN_DIR):
+        self.path = path
+        self._lokal = _thread_local()
+        with self._koneksi() as conn:
+            conn.executescript(_SKEMA)
+            # Migrasi database lama (sebelum kolom adm4 ada)
+            kolom = {row[1] for row in conn.execute("PRAGMA table_info(laporan)")}
+            if 'adm4' not in kolom:
+                conn.execute("ALTER TABLE laporan ADD COLUMN adm4 TEXT")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_laporan_adm4 ON laporan (adm4, waktu, seq)")
+        # Laporan lama (satu file JSON per laporan) diimpor sekali secara otomatis
+        if folder_impor and not self._meta('impor_folder_selesai'):
+            jumlah = self.impor_folder(folder_impor)
+            self._set_meta('impor_folder_selesai', '1')
+            if jumlah:
+                print(f"📥 {jumlah} laporan lama diimpor dari {folder_impor}.")
+
+    def _koneksi(self):
+        conn = getattr(self._lokal, 'conn', None)
+        if conn is not None and self._lokal.pid != os.getpid():
+            # Koneksi warisan fork (mis. master gunicorn --preload): SQLite tidak aman dipakai lintas
+            # fork. Jangan ditutup juga (close di proses anak bisa checkpoint/hapus WAL milik induk).
+            _koneksi_warisan.append(conn)
+            conn = None
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._lokal.conn = conn
+            self._lokal.pid = os.getpid()
+        return conn
+
+    def _meta(self, kunci):
+        row = self._koneksi().execute("SELECT nilai FROM meta WHERE kunci = ?", (kunci,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, kunci, nilai):
+        with self._koneksi() as conn:
+            conn.execute("INSERT OR REPLACE INTO meta (kunci, nilai) VALUES (?, ?)", (kunci, nilai))
+
+    @staticmethod
+    def _baris(laporan):
+        return (str(laporan['id']), str(laporan.get('waktu') or ''), laporan.get('kategori'),
+                _angka(laporan.get('lat')), _angka(laporan.get('lon')),
+                laporan.get('adm4') if isinstance(laporan.get('adm4'), str) else None,
+                json.dumps(laporan, ensure_ascii=False, separators=(',', ':')))
+
+    def simpan(self, laporan):
+        """Simpan satu laporan (dict). 'id' selalu uuid4 baru dari server (id kiriman klien diabaikan); mengembalikan dict tsb."""
+        laporan['id'] = str(uuid.uuid4())
+        with self._koneksi() as conn:
+            conn.execute("INSERT INTO laporan (id, waktu, kategori, lat, lon, adm4, data) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                         self._baris(laporan))
+        return laporan
+
+    def simpan_banyak(self, laporan_list):
+        """Simpan banyak laporan dalam satu transaksi."""
+        for laporan in laporan_list:
+            laporan['id'] = str(uuid.uuid4())
+        with self._koneksi() as conn:
+            conn.executemany("INSERT INTO laporan (id, waktu, kategori, lat, lon, adm4, data) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                             [self._baris(laporan) for laporan in laporan_list])
+        return laporan_list
+
+    def impor_folder(self, folder=LAPORAN_DIR):
+        """Impor file laporan/*.json (id = field 'id' atau nama file). Yang sudah ada dilewati."""
+        try:
+            filenames = sorted(f for f in os.listdir(folder) if f.endswith('.json'))
+        except FileNotFoundError:
+            return 0
+        baris = []
+        for filename in filenames:
+            try:
+                with open(os.path.join(folder, filename), 'r', encoding='utf-8') as f:
+                    laporan = json.load(f)
+            except Exception as e:
+                print(f"Error reading file {filename}: {e}")
+                continue
+            if not isinstance(laporan, dict):
+                continue
+            laporan.setdefault('id', filename[:-len('.json')])
+            baris.append(self._baris(laporan))
+        with self._koneksi() as conn:
+            sebelum = conn.total_changes
+            conn.executemany("INSERT OR IGNORE INTO laporan (id, waktu, kategori, lat, lon, adm4, data) "
+                             "VALUES (?, ?, ?, ?, ?, ?, ?)", baris)
+            return conn.total_changes - sebelum
+
+    def lengkapi_adm4(self, resolver):
+        """
+        Isi adm4 laporan yang belum punya (mis. hasil impor_folder, atau disimpan sebelum data lokasi siap).
+        resolver(lat, lon) -> dict field yang digabung ke laporan (wajib berisi 'adm4'), atau None.
+        Mengembalikan jumlah laporan yang diisi.
+        """
+        rows = self._koneksi().execute(
+            "SELECT id, lat, lon, data FROM laporan WHERE adm4 IS NULL AND lat IS NOT NULL AND lon IS NOT NULL").fetchall()
+        pembaruan = []
+        for id_laporan, lat, lon, data in rows:
+            tambahan = resolver(lat, lon)
+            if not tambahan or not isinstance(tambahan.get('adm4'), str):
+                continue
+            laporan = json.loads(data)
+            laporan.update(tambahan)
+            pembaruan.append((tambahan['adm4'], json.dumps(laporan, ensure_ascii=False, separators=(',', ':')),
+                              id_laporan))
+        if pembaruan:
+            with self._koneksi() as conn:
+                conn.executemany("UPDATE laporan SET adm4 = ?, data = ? WHERE id = ? AND adm4 IS NULL", pembaruan)
+        return len(pembaruan)
+
+    def daftar(self, limit=None, cursor=None, kategori=None, sejak=None, sampai=None, bbox=None, adm4=None):
+        """
+        Daftar laporan terbaru dulu. bbox = (min_lat, min_lon, max_lat, max_lon);
+        sejak/sampai dibandingkan dengan string waktu ISO.
+        Mengembalikan (list_laporan, next_cursor); next_cursor None jika sudah habis.
+        """
+        kondisi, args = [], []
+        if kategori:
+            kondisi.append("kategori = ?")
+            args.append(kategori)
+        if adm4:
+            kondisi.append("adm4 = ?")
+            args.append(adm4)
+        if sejak:
+            kondisi.append("waktu >= ?")
+            args.append(sejak)
+        if sampai:
+            kondisi.append("waktu <= ?")
+            args.append(sampai)
+        if bbox:
+            kondisi.append("lat BETWEEN ? AND ? AND lon BETWEEN ? AND ?")
+            args.extend((bbox[0], bbox[2], bbox[1], bbox[3]))
+        if cursor:
+            kondisi.append("(waktu, seq) < (?, ?)")
+            args.extend(_decode_cursor(cursor))
+
+        sql = "SELECT waktu, seq, data FROM laporan"
+        if kondisi:
+            sql += " WHERE " + " AND ".join(kondisi)
+        sql += " ORDER BY waktu DESC, seq DESC"
+        if limit is not None:
+            # Ambil satu lebih untuk tahu apakah masih ada halaman berikutnya
+            sql += " LIMIT ?"
+            args.append(limit + 1)
+
+        rows = self._koneksi().execute(sql, args).fetchall()
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = _encode_cursor(rows[-1][0], rows[-1][1])
+        return [json.loads(data) for _, _, data in rows], next_cursor
+
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_laporan_store():
+    """LaporanStore bersama untuk proses ini."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = LaporanStore()
+    return _store
+
+
+if __name__ == '__main__':
+    # python laporan_store.py [folder]  -> impor ulang file laporan JSON ke database
+    folder = sys.argv[1] if len(sys.argv) > 1 else LAPORAN_DIR
+    jumlah = LaporanStore(folder_impor=None).impor_folder(folder)
+    print(f"✅ {jumlah} laporan diimpor dari {folder} ke {LAPORAN_DB}.")
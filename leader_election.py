@@ -0,0 +1,74 @@
+# leader_election.py
+import os
+import time
+import threading
+
+try:
+    import fcntl
+except ImportError: # Windows
+    fcntl = None
+    import msvcrt
+
+LOCK_FILE = os.path.join(os.path.dirname(__file__), 'scheduler.lock')
+# Seberapa sering follower mencoba mengambil alih lock (failover jika leader mati)
+RETRY_SECONDS = 15
+
+
+class LeaderElection:
+    """
+    Pemilihan leader antar proses (mis. worker gunicorn) memakai lock file eksklusif.
+    Proses yang memegang lock menjalankan on_leader() sekali; lock dilepas otomatis oleh OS
+    saat proses itu mati, dan follower yang mencoba ulang tiap RETRY_SECONDS mengambil alih.
+    """
+
+    def __init__(self, on_leader, path=LOCK_FILE, retry_seconds=RETRY_SECONDS):
+        self.on_leader = on_leader
+        self.path = path
+        self.retry_seconds = retry_seconds
+        self.is_leader = False
+        self._fd = None
+
+    def _coba_lock(self):
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        except OSError:
+            os.close(fd)
+            return False
+        # fd sengaja tetap terbuka selama proses hidup: menutupnya melepas lock
+        self._fd = fd
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        return True
+
+    def coba(self):
+        """Coba menjadi leader (non-blocking). True jika proses ini leader."""
+        if not self.is_leader and self._coba_lock():
+            self.is_leader = True
+            print(f"👑 Proses {os.getpid()} menjadi leader scheduler.")
+            self.on_leader()
+        return self.is_leader
+
+    def _loop_follower(self):
+        while not self.coba():
+            time.sleep(self.retry_seconds)
+
+    def setelah_fork(self):
+        """
+        Di proses hasil fork (worker gunicorn --preload): state leader milik proses induk.
+        fd warisan ditutup; lock tetap dipegang induk karena fd induk masih terbuka.
+        """
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+        self.is_leader = False
+
+    def mulai(self):
+        """Coba jadi leader sekarang; jika gagal, terus coba di thread latar (failover)."""
+        if not self.coba():
+            print(f"🕒 Proses {os.getpid()} follower: scheduler dijalankan proses lain.")
+            threading.Thread(target=self._loop_follower, daemon=True).start()
+        return self.is_leader
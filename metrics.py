@@ -0,0 +1,140 @@
+# metrics.py
+import bisect
+import threading
+import time
+
+# Batas bucket histogram (nilai <= batas), sesuai konvensi Prometheus
+LATENSI_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+UKURAN_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+def _escape(nilai):
+    return str(nilai).replace('\\', '\\\\').replace('"', '\\"').replace('\n', ' ')
+
+def _label(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+def _angka(nilai):
+    if nilai == float('inf'):
+        return "+Inf"
+    if isinstance(nilai, float):
+        return repr(nilai)
+    return str(int(nilai)) # int / bool
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.jumlah = [0] * (len(buckets) + 1) # elemen terakhir: +Inf
+        self.total = 0.0
+
+    def amati(self, nilai):
+        self.jumlah[bisect.bisect_left(self.buckets, nilai)] += 1
+        self.total += nilai
+
+    def baris(self, nama, labels):
+        kumulatif = 0
+        for batas, n in zip(self.buckets + (float('inf'),), self.jumlah):
+            kumulatif += n
+            yield f"{nama}_bucket{_label(labels + (('le', _angka(batas)),))} {kumulatif}"
+        yield f"{nama}_sum{_label(labels)} {_angka(self.total)}"
+        yield f"{nama}_count{_label(labels)} {kumulatif}"
+
+
+class Metrik:
+    """
+    Metrik proses ini dalam format teks Prometheus (/metrics).
+    - Request: histogram latensi & ukuran respons per (route, method) dan jumlah per kode status,
+      dicatat oleh middleware di app.py. Route = pola URL Flask, bukan path mentah.
+    - Tugas latar: waktu sukses/gagal terakhir dan jumlah run per tugas (catat_tugas).
+    - Gauge: fungsi yang dipanggil saat scrape (umur data, jumlah lokasi, status pemanasan, ...).
+    Tiap worker gunicorn punya metrik sendiri; Prometheus menjumlahkan per instance/pid.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latensi = {}   # (route, method) -> Histogram
+        self._ukuran = {}    # (route, method) -> Histogram
+        self._status = {}    # (route, method, status) -> jumlah
+        self._tugas = {}     # nama -> {"sukses": n, "gagal": n, "sukses_terakhir": ts, "gagal_terakhir": ts}
+        self._gauges = []    # (nama, bantuan, fungsi -> [(labels, nilai)])
+
+    def catat_request(self, route, method, status, durasi, ukuran=None):
+        kunci = (route, method)
+        with self._lock:
+            hist = self._latensi.get(kunci)
+            if hist is None:
+                hist = self._latensi[kunci] = Histogram(LATENSI_BUCKETS)
+                self._ukuran[kunci] = Histogram(UKURAN_BUCKETS)
+            hist.amati(durasi)
+            if ukuran is not None:
+                self._ukuran[kunci].amati(ukuran)
+            kunci_status = (route, method, str(status))
+            self._status[kunci_status] = self._status.get(kunci_status, 0) + 1
+
+    def catat_tugas(self, nama, sukses=True):
+        hasil = "sukses" if sukses else "gagal"
+        with self._lock:
+            tugas = self._tugas.setdefault(nama, {"sukses": 0, "gagal": 0})
+            tugas[hasil] += 1
+            tugas[f"{hasil}_terakhir"] = time.time()
+
+    def gauge(self, nama, bantuan, fungsi):
+        """Daftarkan gauge; fungsi() -> angka, atau list (labels dict, nilai)."""
+        self._gauges.append((nama, bantuan, fungsi))
+
+    def render(self):
+        with self._lock:
+            latensi = list(self._latensi.items())
+            ukuran = list(self._ukuran.items())
+            status = list(self._status.items())
+            tugas = {nama: dict(t) for nama, t in self._tugas.items()}
+            baris = []
+            baris += ["# HELP http_request_duration_seconds Latensi request per route.",
+                      "# TYPE http_request_duration_seconds histogram"]
+            for (route, method), hist in sorted(latensi):
+                baris += hist.baris("http_request_duration_seconds", (('route', route), ('method', method)))
+            baris += ["# HELP http_response_size_bytes Ukuran body respons per route.",
+                      "# TYPE http_response_size_bytes histogram"]
+            for (route, method), hist in sorted(ukuran):
+                baris += hist.baris("http_response_size_bytes", (('route', route), ('method', method)))
+
+        baris += ["# HELP http_requests_total Jumlah request per route dan kode status.",
+                  "# TYPE http_requests_total counter"]
+        for (route, method, kode), n in sorted(status):
+            baris.append(f"http_requests_total{_label((('route', route), ('method', method), ('status', kode)))} {n}")
+
+        baris += ["# HELP tugas_latar_total Jumlah run tugas latar per hasil.",
+                  "# TYPE tugas_latar_total counter"]
+        for nama, t in sorted(tugas.items()):
+            for hasil in ("sukses", "gagal"):
+                baris.append(f"tugas_latar_total{_label((('tugas', nama), ('hasil', hasil)))} {t[hasil]}")
+        baris += ["# HELP tugas_latar_terakhir_timestamp_seconds Waktu (unix) run terakhir tugas latar per hasil.",
+                  "# TYPE tugas_latar_terakhir_timestamp_seconds gauge"]
+        for nama, t in sorted(tugas.items()):
+            for hasil in ("sukses", "gagal"):
+                if t.get(f"{hasil}_terakhir"):
+                    baris.append(f"tugas_latar_terakhir_timestamp_seconds{_label((('tugas', nama), ('hasil', hasil)))} "
+                                 f"{_angka(t[f'{hasil}_terakhir'])}")
+
+        for nama, bantuan, fungsi in self._gauges:
+            try:
+                nilai = fungsi()
+            except Exception as e:
+                print(f"⚠️ Gauge {nama} gagal dihitung: {e}")
+                continue
+            baris += [f"# HELP {nama} {bantuan}", f"# TYPE {nama} gauge"]
+            if isinstance(nilai, (int, float)):
+                nilai = [({}, nilai)]
+            for labels, n in nilai:
+                if n is not None:
+                    baris.append(f"{nama}{_label(tuple(labels.items()))} {_angka(n)}")
+        return "\n".join(baris) + "\n"
+
+
+_metrik = Metrik()
+
+def get_metrik():
+    """Registry metrik bersama untuk proses ini."""
+    return _metrik
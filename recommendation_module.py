@@ -1,11 +1,12 @@
 import os
-import json
 import datetime
+import heapq
 from collections import Counter
 import pytz
 
-# Import necessary components from ai_engine.py
-from ai_engine import DATA_DIR, CACHE_DIR, load_json
+from cooperative import beri_giliran
+from forecast_index import get_forecast_index
+from katalog import get_katalog
 
 def cocok_item(item, rata2_suhu, rata2_hu, keyword):
     """Checks if an item (animal/vegetable) is suitable based on avg temp/humidity and keyword."""
@@ -116,10 +117,139 @@ def skor_cocok_item(item, realtime_suhu, realtime_hu, rata2_suhu, rata2_hu):
         return 0, " ".join(alasan_parts)
 
 
-def smart_rekomendasi(keyword):
+# --- Format alasan ringkas (kode) ---
+# Format "teks" menghasilkan kalimat panjang untuk setiap pasangan lokasi-item.
+# Format "kode" mengirim setiap penilaian sebagai baris [nama, skor, kode, cek];
+# nilai cuaca sudah ada di level lokasi dan rentang ideal ada di tabel template,
+# sehingga klien cukup mengambil ALASAN_TEMPLATE sekali lalu menyusun teks sendiri.
+FORMAT_TEKS = 'teks'
+FORMAT_KODE = 'kode'
+
+KODE_SANGAT_COCOK = "SC"
+KODE_CUKUP_COCOK = "CC"
+KODE_AGAK_COCOK = "AC"
+KODE_TIDAK_COCOK = "TC"
+KODE_DATA_TIDAK_LENGKAP = "DI"
+
+# Bit pada field "cek": bit menyala jika nilai tersedia DAN berada dalam rentang ideal
+CEK_REALTIME_SUHU = 1
+CEK_REALTIME_HU = 2
+CEK_RATA2_SUHU = 4
+CEK_RATA2_HU = 8
+CEK_REALTIME = CEK_REALTIME_SUHU | CEK_REALTIME_HU
+CEK_RATA2 = CEK_RATA2_SUHU | CEK_RATA2_HU
+
+ALASAN_TEMPLATE = {
+    "versi": 1,
+    "kolom": ["nama", "skor", "kode", "cek"],
+    "kode": {
+        KODE_SANGAT_COCOK: {"skor": 100, "teks": "Sangat cocok: {realtime_suhu}, {realtime_hu}, {rata2_suhu}, {rata2_hu}."},
+        KODE_CUKUP_COCOK: {"skor": 70, "teks": "Cukup cocok: {realtime_suhu}, {realtime_hu}. Namun, rata-rata: {rata2_suhu}, {rata2_hu}. Idealnya: Suhu ({suhu_min}-{suhu_max}°C), Kelembapan ({hu_min}-{hu_max}%)."},
+        KODE_AGAK_COCOK: {"skor": 60, "teks": "Agak cocok: {rata2_suhu}, {rata2_hu}. Namun, realtime: {realtime_suhu}, {realtime_hu}. Idealnya: Suhu ({suhu_min}-{suhu_max}°C), Kelembapan ({hu_min}-{hu_max}%)."},
+        KODE_TIDAK_COCOK: {"skor": 0, "teks": "Tidak cocok: Realtime: {realtime_suhu}, {realtime_hu}. Rata-rata: {rata2_suhu}, {rata2_hu}. Idealnya: Suhu ({suhu_min}-{suhu_max}°C), Kelembapan ({hu_min}-{hu_max}%)."},
+        KODE_DATA_TIDAK_LENGKAP: {"skor": 0, "teks": "Data item tidak lengkap (min/max suhu/kelembapan)"},
+    },
+    # Urutan bit, field nilai di objek lokasi, dan kalimat per kondisi
+    "cek": {
+        "realtime_suhu": {
+            "bit": CEK_REALTIME_SUHU, "field": "suhu_realtime",
+            "sesuai": "suhu realtime ({nilai}°C) sesuai",
+            "tidak_sesuai": "suhu realtime ({nilai}°C) tidak sesuai",
+            "tidak_tersedia": "suhu realtime tidak tersedia",
+        },
+        "realtime_hu": {
+            "bit": CEK_REALTIME_HU, "field": "kelembapan_realtime",
+            "sesuai": "kelembapan realtime ({nilai}%) sesuai",
+            "tidak_sesuai": "kelembapan realtime ({nilai}%) tidak sesuai",
+            "tidak_tersedia": "kelembapan realtime tidak tersedia",
+        },
+        "rata2_suhu": {
+            "bit": CEK_RATA2_SUHU, "field": "rata2_suhu",
+            "sesuai": "suhu rata-rata ({nilai}°C) sesuai",
+            "tidak_sesuai": "suhu rata-rata ({nilai}°C) tidak sesuai",
+            "tidak_tersedia": "suhu rata-rata tidak tersedia",
+        },
+        "rata2_hu": {
+            "bit": CEK_RATA2_HU, "field": "rata2_hu",
+            "sesuai": "kelembapan rata-rata ({nilai}%) sesuai",
+            "tidak_sesuai": "kelembapan rata-rata ({nilai}%) tidak sesuai",
+            "tidak_tersedia": "kelembapan rata-rata tidak tersedia",
+        },
+    },
+}
+
+def skor_cocok_item_kode(item, realtime_suhu, realtime_hu, rata2_suhu, rata2_hu):
+    """
+    Versi ringkas dari skor_cocok_item: tanpa menyusun kalimat.
+    Mengembalikan tuple (skor, kode, cek) dengan kode dari ALASAN_TEMPLATE
+    dan cek berupa bitmask CEK_* untuk pengecekan yang lolos.
+    """
+    suhu_min = item.get("suhu_min")
+    suhu_max = item.get("suhu_max")
+    hu_min = item.get("hu_min")
+    hu_max = item.get("hu_max")
+
+    if not all(isinstance(v, (int, float)) for v in [suhu_min, suhu_max, hu_min, hu_max]):
+        return 0, KODE_DATA_TIDAK_LENGKAP, 0
+
+    cek = 0
+    if realtime_suhu is not None and suhu_min <= realtime_suhu <= suhu_max:
+        cek |= CEK_REALTIME_SUHU
+    if realtime_hu is not None and hu_min <= realtime_hu <= hu_max:
+        cek |= CEK_REALTIME_HU
+    if rata2_suhu is not None and suhu_min <= rata2_suhu <= suhu_max:
+        cek |= CEK_RATA2_SUHU
+    if rata2_hu is not None and hu_min <= rata2_hu <= hu_max:
+        cek |= CEK_RATA2_HU
+
+    realtime_ok_all = (cek & CEK_REALTIME) == CEK_REALTIME
+    rata2_ok_all = (cek & CEK_RATA2) == CEK_RATA2
+
+    if realtime_ok_all and rata2_ok_all:
+        return 100, KODE_SANGAT_COCOK, cek
+    elif realtime_ok_all:
+        return 70, KODE_CUKUP_COCOK, cek
+    elif rata2_ok_all:
+        return 60, KODE_AGAK_COCOK, cek
+    return 0, KODE_TIDAK_COCOK, cek
+
+def alasan_template(hewan_list=None, sayuran_list=None):
+    """Tabel template alasan + rentang ideal per item, untuk di-cache klien (format=kode)."""
+    katalog = get_katalog()
+    if hewan_list is None:
+        hewan_list = katalog.hewan
+    if sayuran_list is None:
+        sayuran_list = katalog.sayuran
+
+    def rentang(items):
+        return {
+            i["nama"]: [i.get("suhu_min"), i.get("suhu_max"), i.get("hu_min"), i.get("hu_max")]
+            for i in items if isinstance(i, dict) and "nama" in i
+        }
+
+    return {
+        **ALASAN_TEMPLATE,
+        # Urutan nilai: [suhu_min, suhu_max, hu_min, hu_max]
+        "ideal": {
+            "hewan": rentang(hewan_list),
+            "sayuran": rentang(sayuran_list),
+        },
+    }
+
+def _nilai_item(item, format_alasan, t_realtime, hu_realtime, rata2_suhu, rata2_hu):
+    """Menilai satu item sesuai format_alasan; mengembalikan (skor, entri_penilaian, ringkasan_alasan)."""
+    if format_alasan == FORMAT_KODE:
+        skor, kode, cek = skor_cocok_item_kode(item, t_realtime, hu_realtime, rata2_suhu, rata2_hu)
+        return skor, [item["nama"], skor, kode, cek], kode
+    skor, alasan_item = skor_cocok_item(item, t_realtime, hu_realtime, rata2_suhu, rata2_hu)
+    return skor, {"nama": item["nama"], "skor": skor, "alasan_skor": alasan_item}, alasan_item
+
+
+def smart_rekomendasi(keyword, format_alasan=FORMAT_TEKS):
     keyword = keyword.lower()
-    hewan_list = load_json(os.path.join(DATA_DIR, 'hewan_cocok.json'))
-    sayuran_list = load_json(os.path.join(DATA_DIR, 'sayuran_cocok.json'))
+    katalog = get_katalog()
+    hewan_list = katalog.hewan
+    sayuran_list = katalog.sayuran
     results = []
 
     # Pastikan pakai timezone Asia/Jakarta untuk perbandingan realtime
@@ -139,216 +269,187 @@ def smart_rekomendasi(keyword):
         "default": "https://raw.githubusercontent.com/pointhi/leaflet-color-markers/master/img/marker-icon-blue.png" 
     }
 
-    # Iterate through existing cache files
-    for filename in os.listdir(CACHE_DIR):
-        if filename.endswith('.json'):
-            adm4 = filename[:-5] 
-            cache_file = os.path.join(CACHE_DIR, filename)
-
-            try:
-                with open(cache_file, encoding='utf-8') as f:
-                    data = json.load(f)
-
-                lokasi = data.get('lokasi', {})
-                data_list = data.get('data', [])
-
-                suhu_hari_ini_values = [] 
-                t_values_all = []        
-                hu_values_all = []       
-                descs_all = []           
-                date_start, date_end = None, None 
-
-                closest_item = None
-                min_diff = float('inf')
-
-                flat_list = []
-                for d_entry in data_list:
-                    cuaca_entry_list = d_entry.get('cuaca', d_entry.get('data', []))
-                    for c_item in cuaca_entry_list:
-                        if isinstance(c_item, list):
-                            flat_list.extend(c_item)
-                        elif isinstance(c_item, dict):
-                            flat_list.append(c_item)
-
-                datetimes = []
-                for c_item in flat_list:
-                    dt_str = c_item.get('datetime')
-                    if dt_str:
-                        try:
-                            dt_obj = datetime.datetime.strptime(dt_str, "%Y-%m-%d %H:%M:%S")
-                            datetimes.append(dt_obj)
-                        except ValueError:
-                            try:
-                                dt_obj = datetime.datetime.strptime(dt_str, "%Y-%m-%d %H:%M")
-                                datetimes.append(dt_obj)
-                            except Exception:
-                                pass
-
-                if datetimes:
-                    datetimes_sorted = sorted(datetimes)
-                    date_start = datetimes_sorted[0].strftime('%Y-%m-%d')
-                    date_end = datetimes_sorted[-1].strftime('%Y-%m-%d')
-
-                for c_item in flat_list:
-                    t = c_item.get('t')
-                    hu = c_item.get('hu')
-                    desc = c_item.get('weather_desc')
-                    local_dt_str = c_item.get('local_datetime') or c_item.get('datetime')
-
-                    if isinstance(t, (int, float)):
-                        t_values_all.append(t)
-                    if isinstance(hu, (int, float)):
-                        hu_values_all.append(hu)
-                    if isinstance(desc, str):
-                        descs_all.append(desc)
-
-                    if local_dt_str:
-                        try:
-                            current_item_dt = datetime.datetime.strptime(local_dt_str, "%Y-%m-%d %H:%M:%S")
-                        except ValueError:
-                            try:
-                                current_item_dt = datetime.datetime.strptime(local_dt_str, "%Y-%m-%d %H:%M")
-                            except Exception:
-                                current_item_dt = None 
-
-                        if current_item_dt and current_item_dt.strftime('%Y-%m-%d') == today_date_str:
-                            if isinstance(t, (int, float)):
-                                suhu_hari_ini_values.append(t)
-
-                    if local_dt_str:
-                        try:
-                            local_dt_obj_tz = tz_jakarta.localize(datetime.datetime.strptime(local_dt_str, "%Y-%m-%d %H:%M:%S"))
-                        except ValueError:
-                            try:
-                                local_dt_obj_tz = tz_jakarta.localize(datetime.datetime.strptime(local_dt_str, "%Y-%m-%d %H:%M"))
-                            except Exception:
-                                continue 
-                        
-                        diff = abs((local_dt_obj_tz - now_local).total_seconds())
-
-                        if diff < min_diff:
-                            min_diff = diff
-                            closest_item = c_item
-                
-                t_realtime = None
-                hu_realtime = None
-                cuaca_realtime = ''
-                weather_icon_url = weather_icons["default"]
-
-                if closest_item:
-                    if isinstance(closest_item.get('t'), (int, float)):
-                        t_realtime = round(closest_item.get('t'), 1)
-                    if isinstance(closest_item.get('hu'), (int, float)):
-                        hu_realtime = round(closest_item.get('hu'), 1)
-                    
-                    cuaca_realtime = closest_item.get('weather_desc', '') 
-                    
-                    cuaca_lower = cuaca_realtime.lower()
-                    if "hujan" in cuaca_lower:
-                        weather_icon_url = weather_icons["hujan"]
-                    elif "cerah berawan" in cuaca_lower:
-                        weather_icon_url = weather_icons["cerah berawan"]
-                    elif "berawan" in cuaca_lower:
-                        weather_icon_url = weather_icons["berawan"]
-                    elif "cerah" in cuaca_lower: 
-                        weather_icon_url = weather_icons["cerah"]
-                    elif any(k in cuaca_lower for k in ["kabut", "asap", "udara kabur"]): 
-                        weather_icon_url = weather_icons["kabut/asap/udara kabur"]
-
-                suhu_hari_ini = {
-                    "rata2": round(sum(suhu_hari_ini_values)/len(suhu_hari_ini_values),1) if suhu_hari_ini_values else None,
-                    "max": round(max(suhu_hari_ini_values),1) if suhu_hari_ini_values else None,
-                    "min": round(min(suhu_hari_ini_values),1) if suhu_hari_ini_values else None
-                }
-
-                rata2_suhu = round(sum(t_values_all)/len(t_values_all),1) if t_values_all else None
-                rata2_hu = round(sum(hu_values_all)/len(hu_values_all),1) if hu_values_all else None
-
-                # --- BAGIAN PERUBAHAN: Menggunakan skor_cocok_item untuk mendapatkan skor dan alasan ---
-                cocok_hewan_scored, cocok_sayur_scored = [], []
-                pilihan_tepat_hewan = []
-                pilihan_tepat_sayuran = []
-
-                for h in hewan_list:
-                    skor, alasan_item = skor_cocok_item(h, t_realtime, hu_realtime, rata2_suhu, rata2_hu)
-                    if skor > 0: # Hanya tambahkan jika skor lebih dari 0
-                        cocok_hewan_scored.append( {"nama": h["nama"], "skor": skor, "alasan_skor": alasan_item} )
-                        if skor >= 70  :
-                            pilihan_tepat_hewan.append(h["nama"])
-                for s in sayuran_list:
-                    skor, alasan_item = skor_cocok_item(s, t_realtime, hu_realtime, rata2_suhu, rata2_hu)
-                    if skor > 0: # Hanya tambahkan jika skor lebih dari 0
-                        cocok_sayur_scored.append( {"nama": s["nama"], "skor": skor, "alasan_skor": alasan_item} )
-                        if skor >= 70 :
-                            pilihan_tepat_sayuran.append(s["nama"])
-
-                # Urutkan berdasarkan skor tertinggi
-                cocok_hewan_scored.sort(key=lambda x: x["skor"], reverse=True)
-                cocok_sayur_scored.sort(key=lambda x: x["skor"], reverse=True)
-                # --- AKHIR BAGIAN PERUBAHAN ---
-
-                cocok_lokasi = any(keyword in (lokasi.get(k,'').lower()) for k in ['desa','kecamatan','kotkab','provinsi', 'adm4'])
+    # Prakiraan tiap lokasi sudah diolah sekali saat dimuat (lihat forecast_index.py);
+    # di sini hanya binary search entri realtime dan lookup ringkasan hari ini
+    now_ts = now_local.timestamp()
+    for i, record in enumerate(get_forecast_index().lokasi()):
+        beri_giliran(i)
+        adm4 = record.adm4
+        lokasi = record.lokasi
+
+        try:
+            t_realtime = None
+            hu_realtime = None
+            cuaca_realtime = ''
+            weather_icon_url = weather_icons["default"]
+
+            realtime = record.realtime(now_ts)
+            if realtime:
+                t_realtime, hu_realtime, cuaca_realtime = realtime
                 
-                alasan = []
-                if cocok_lokasi:
-                    alasan.append("Lokasi cocok dengan keyword")
-                # Perbarui alasan untuk mencerminkan skor kecocokan
-                if keyword and cocok_hewan_scored:
-                    for item_skor in cocok_hewan_scored:
-                        if keyword in item_skor['nama'].lower():
-                            alasan.append(f"Hewan '{item_skor['nama']}' cocok (Skor: {item_skor['skor']}, {item_skor['alasan_skor']})")
-                            break 
-                if keyword and cocok_sayur_scored:
-                    for item_skor in cocok_sayur_scored:
-                        if keyword in item_skor['nama'].lower():
-                            alasan.append(f"Sayuran '{item_skor['nama']}' cocok (Skor: {item_skor['skor']}, {item_skor['alasan_skor']})")
-                            break 
-                
-                # Default alasan jika tidak ada keyword dan ada rekomendasi
-                if not keyword and (cocok_hewan_scored or cocok_sayur_scored):
-                    alasan.append("Tidak ada keyword, menampilkan lokasi dengan rekomendasi")
-                elif not alasan and (t_realtime is not None or hu_realtime is not None):
-                    alasan.append("Kondisi cuaca tersedia")
-                elif not alasan and not keyword:
-                    alasan.append("Tidak ada keyword dan kondisi cuaca belum spesifik untuk rekomendasi")
-                elif not alasan and keyword:
-                    alasan.append("Keyword tidak ditemukan atau kondisi cuaca tidak cocok")
-
-
-                if cocok_hewan_scored or cocok_sayur_scored or cocok_lokasi or keyword == '' or t_realtime is not None or hu_realtime is not None:
-                    results.append({
-                        "adm4": adm4,
-                        "desa": lokasi.get('desa',''),
-                        "kecamatan": lokasi.get('kecamatan',''),
-                        "kotkab": lokasi.get('kotkab',''),
-                        "provinsi": lokasi.get('provinsi',''),
-                        "lat": lokasi.get('lat'),
-                        "lon": lokasi.get('lon'),
-                        "suhu_hari_ini": suhu_hari_ini, 
-                        "rata2_suhu": rata2_suhu,
-                        "rata2_hu": rata2_hu,
-                        "suhu_realtime": t_realtime,
-                        "kelembapan_realtime": hu_realtime,
-                        "weather_desc": cuaca_realtime,
-                        "weather_icon_url": weather_icon_url,
-                        "date_start": date_start or '',
-                        "date_end": date_end or '',
-                        "cocok_untuk": {
-                            "hewan": cocok_hewan_scored, 
-                            "sayuran": cocok_sayur_scored 
-                        },
-                        "pilihan_tepat": { # MENAMBAHKAN BAGIAN INI
-                            "hewan": pilihan_tepat_hewan,
-                            "sayuran": pilihan_tepat_sayuran
-                        },
-                        "alasan": ", ".join(alasan) if alasan else "Informasi cuaca tersedia"
-                    })
-            except Exception as e:
-                # print(f"❌ Gagal parsing cache {adm4}: {e}") # Debugging
-                pass 
+                cuaca_lower = cuaca_realtime.lower()
+                if "hujan" in cuaca_lower:
+                    weather_icon_url = weather_icons["hujan"]
+                elif "cerah berawan" in cuaca_lower:
+                    weather_icon_url = weather_icons["cerah berawan"]
+                elif "berawan" in cuaca_lower:
+                    weather_icon_url = weather_icons["berawan"]
+                elif "cerah" in cuaca_lower: 
+                    weather_icon_url = weather_icons["cerah"]
+                elif any(k in cuaca_lower for k in ["kabut", "asap", "udara kabur"]): 
+                    weather_icon_url = weather_icons["kabut/asap/udara kabur"]
+
+            suhu_hari_ini = record.suhu_hari_ini(today_date_str)
+            rata2_suhu = record.rata2_suhu
+            rata2_hu = record.rata2_hu
+            date_start, date_end = record.date_start, record.date_end
+
+            # --- BAGIAN PERUBAHAN: Menggunakan skor_cocok_item untuk mendapatkan skor dan alasan ---
+            # Tuple (skor, nama, ringkasan_alasan, entri) agar pengurutan & alasan keyword
+            # tidak bergantung pada bentuk entri (dict untuk teks, baris list untuk kode)
+            penilaian_hewan, penilaian_sayur = [], []
+            pilihan_tepat_hewan = []
+            pilihan_tepat_sayuran = []
+
+            for h in hewan_list:
+                skor, entri, ringkas = _nilai_item(h, format_alasan, t_realtime, hu_realtime, rata2_suhu, rata2_hu)
+                if skor > 0: # Hanya tambahkan jika skor lebih dari 0
+                    penilaian_hewan.append((skor, h["nama"], ringkas, entri))
+                    if skor >= 70  :
+                        pilihan_tepat_hewan.append(h["nama"])
+            for s in sayuran_list:
+                skor, entri, ringkas = _nilai_item(s, format_alasan, t_realtime, hu_realtime, rata2_suhu, rata2_hu)
+                if skor > 0: # Hanya tambahkan jika skor lebih dari 0
+                    penilaian_sayur.append((skor, s["nama"], ringkas, entri))
+                    if skor >= 70 :
+                        pilihan_tepat_sayuran.append(s["nama"])
+
+            # Urutkan berdasarkan skor tertinggi
+            penilaian_hewan.sort(key=lambda x: x[0], reverse=True)
+            penilaian_sayur.sort(key=lambda x: x[0], reverse=True)
+            cocok_hewan_scored = [p[3] for p in penilaian_hewan]
+            cocok_sayur_scored = [p[3] for p in penilaian_sayur]
+            # --- AKHIR BAGIAN PERUBAHAN ---
+
+            cocok_lokasi = any(keyword in (lokasi.get(k,'').lower()) for k in ['desa','kecamatan','kotkab','provinsi', 'adm4'])
+            
+            alasan = []
+            if cocok_lokasi:
+                alasan.append("Lokasi cocok dengan keyword")
+            # Perbarui alasan untuk mencerminkan skor kecocokan
+            if keyword and penilaian_hewan:
+                for skor, nama_item, ringkas, _ in penilaian_hewan:
+                    if keyword in nama_item.lower():
+                        alasan.append(f"Hewan '{nama_item}' cocok (Skor: {skor}, {ringkas})")
+                        break 
+            if keyword and penilaian_sayur:
+                for skor, nama_item, ringkas, _ in penilaian_sayur:
+                    if keyword in nama_item.lower():
+                        alasan.append(f"Sayuran '{nama_item}' cocok (Skor: {skor}, {ringkas})")
+                        break 
+            
+            # Default alasan jika tidak ada keyword dan ada rekomendasi
+            if not keyword and (cocok_hewan_scored or cocok_sayur_scored):
+                alasan.append("Tidak ada keyword, menampilkan lokasi dengan rekomendasi")
+            elif not alasan and (t_realtime is not None or hu_realtime is not None):
+                alasan.append("Kondisi cuaca tersedia")
+            elif not alasan and not keyword:
+                alasan.append("Tidak ada keyword dan kondisi cuaca belum spesifik untuk rekomendasi")
+            elif not alasan and keyword:
+                alasan.append("Keyword tidak ditemukan atau kondisi cuaca tidak cocok")
+
+
+            if cocok_hewan_scored or cocok_sayur_scored or cocok_lokasi or keyword == '' or t_realtime is not None or hu_realtime is not None:
+                results.append({
+                    "adm4": adm4,
+                    "desa": lokasi.get('desa',''),
+                    "kecamatan": lokasi.get('kecamatan',''),
+                    "kotkab": lokasi.get('kotkab',''),
+                    "provinsi": lokasi.get('provinsi',''),
+                    "lat": lokasi.get('lat'),
+                    "lon": lokasi.get('lon'),
+                    "suhu_hari_ini": suhu_hari_ini, 
+                    "rata2_suhu": rata2_suhu,
+                    "rata2_hu": rata2_hu,
+                    "suhu_realtime": t_realtime,
+                    "kelembapan_realtime": hu_realtime,
+                    "weather_desc": cuaca_realtime,
+                    "weather_icon_url": weather_icon_url,
+                    "date_start": date_start or '',
+                    "date_end": date_end or '',
+                    "cocok_untuk": {
+                        "hewan": cocok_hewan_scored, 
+                        "sayuran": cocok_sayur_scored 
+                    },
+                    "pilihan_tepat": { # MENAMBAHKAN BAGIAN INI
+                        "hewan": pilihan_tepat_hewan,
+                        "sayuran": pilihan_tepat_sayuran
+                    },
+                    "alasan": ", ".join(alasan) if alasan else "Informasi cuaca tersedia"
+                })
+        except Exception as e:
+            # print(f"❌ Gagal parsing cache {adm4}: {e}") # Debugging
+            pass 
 
     return results
 
+def _jarak_ideal(item, suhu, hu):
+    """Jarak ternormalisasi dari titik tengah rentang ideal (0 = tepat di tengah). Pemecah seri skor."""
+    if suhu is None or hu is None:
+        return float('inf')
+    return (abs(suhu - item["suhu_mid"]) / max(item["suhu_lebar"], 1e-9) +
+            abs(hu - item["hu_mid"]) / max(item["hu_lebar"], 1e-9))
+
+def cari_item_katalog(nama, tipe=None):
+    """Cari item hewan/sayuran berdasarkan nama (tanpa beda huruf besar/kecil). Mengembalikan (tipe, item)."""
+    return get_katalog().cari(nama, tipe)
+
+def top_lokasi(item, k=10):
+    """
+    K lokasi terbaik untuk satu item katalog, diurutkan berdasarkan skor kecocokan
+    (skor_cocok_item_kode) lalu jarak dari titik tengah rentang ideal.
+    Memakai heap berukuran K: O(N log K), tanpa menyusun hasil untuk semua lokasi.
+    """
+    now_ts = datetime.datetime.now(tz=pytz.timezone("Asia/Jakarta")).timestamp()
+
+    def kandidat():
+        for urutan, record in enumerate(get_forecast_index().lokasi()):
+            beri_giliran(urutan)
+            realtime = record.realtime(now_ts)
+            t_realtime, hu_realtime, cuaca_realtime = realtime if realtime else (None, None, '')
+            skor, kode, cek = skor_cocok_item_kode(item, t_realtime, hu_realtime, record.rata2_suhu, record.rata2_hu)
+            # Nilai realtime lebih relevan untuk "sekarang"; rata-rata periode sebagai cadangan
+            if t_realtime is not None and hu_realtime is not None:
+                jarak = _jarak_ideal(item, t_realtime, hu_realtime)
+            else:
+                jarak = _jarak_ideal(item, record.rata2_suhu, record.rata2_hu)
+            yield (-skor, jarak, urutan), (record, skor, kode, cek, jarak, t_realtime, hu_realtime, cuaca_realtime)
+
+    terbaik = heapq.nsmallest(k, kandidat(), key=lambda x: x[0])
+
+    hasil = []
+    for _, (record, skor, kode, cek, jarak, t_realtime, hu_realtime, cuaca_realtime) in terbaik:
+        lokasi = record.lokasi
+        hasil.append({
+            "adm4": record.adm4,
+            "desa": lokasi.get('desa', ''),
+            "kecamatan": lokasi.get('kecamatan', ''),
+            "kotkab": lokasi.get('kotkab', ''),
+            "provinsi": lokasi.get('provinsi', ''),
+            "lat": lokasi.get('lat'),
+            "lon": lokasi.get('lon'),
+            "skor": skor,
+            "kode": kode,
+            "cek": cek,
+            "jarak_ideal": round(jarak, 4) if jarak != float('inf') else None,
+            "suhu_realtime": t_realtime,
+            "kelembapan_realtime": hu_realtime,
+            "rata2_suhu": record.rata2_suhu,
+            "rata2_hu": record.rata2_hu,
+            "weather_desc": cuaca_realtime,
+        })
+    return hasil
+
 # Example of how to use smart_rekomendasi (optional)
 if __name__ == '__main__':
     print("\n--- Rekomendasi untuk 'ayam' ---")
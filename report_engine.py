@@ -1,18 +1,12 @@
 # backend/report_engine.py
-import os
-import json
 import uuid
 from datetime import datetime
 
-LAPORAN_DIR = os.path.join(os.path.dirname(__file__), 'laporan')
-if not os.path.exists(LAPORAN_DIR):
-    os.makedirs(LAPORAN_DIR)
+from laporan_store import get_laporan_store
 
 def simpan_laporan(data):
-    filename = f"{uuid.uuid4()}.json"
-    filepath = os.path.join(LAPORAN_DIR, filename)
     laporan_data = {
-        "id": filename.replace(".json", ""),
+        "id": str(uuid.uuid4()),
         "foto": data.get("foto"),
         "lat": data.get("lat"),
         "lon": data.get("lon"),
@@ -22,14 +16,8 @@ def simpan_laporan(data):
         "waktu": data.get("waktu", datetime.utcnow().isoformat()),
         "kontak": data.get("kontak", ""),
     }
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(laporan_data, f, ensure_ascii=False, indent=2)
-    return laporan_data
+    return get_laporan_store().simpan(laporan_data)
 
 def semua_laporan():
-    hasil = []
-    for f in os.listdir(LAPORAN_DIR):
-        if f.endswith('.json'):
-            with open(os.path.join(LAPORAN_DIR, f), encoding='utf-8') as file:
-                hasil.append(json.load(file))
+    hasil, _ = get_laporan_store().daftar()
     return hasil
@@ -0,0 +1,84 @@
+# shared_data.py
+import os
+import gc
+import time
+import signal
+import threading
+
+from data_version import DATASET_CACHE, DATASET_FILTERED, versi
+
+# Mode data bersama: SHARED_DATA=1 gunicorn -c gunicorn.conf.py app:app
+#  - master memuat semua data serving sekali (preload_app) lalu gc.freeze() sebelum fork,
+#    sehingga worker berbagi halaman memori yang sama (copy-on-write);
+#  - worker tidak pernah memuat ulang data sendiri (store/indeks di-"beku");
+#  - saat versi data naik, master membangun generasi baru lalu SIGHUP ke dirinya sendiri:
+#    gunicorn mem-fork worker baru dari data baru dan mematikan worker lama dengan graceful;
+#    objek generasi lama di-unfreeze dulu agar bisa dikoleksi;
+#  - scheduler (leader) berjalan di master; worker mereset status leader warisan fork.
+ENV_FLAG = 'SHARED_DATA'
+POLL_SECONDS = 30
+# Jarak minimum antar rotasi worker (cache bisa naik versi tiap batch fetch)
+MIN_ROTASI_SECONDS = 300
+
+_lock_muat = threading.Lock()
+# Fungsi yang dijalankan di tiap worker sesudah fork (didaftarkan app lewat saat_fork)
+_setelah_fork = []
+
+def aktif():
+    """True di master gunicorn yang berjalan dengan SHARED_DATA=1."""
+    return (os.environ.get(ENV_FLAG, '0') == '1' and
+            os.environ.get('SERVER_SOFTWARE', '').startswith('gunicorn'))
+
+def _versi_data():
+    return versi(DATASET_FILTERED).get('id'), versi(DATASET_CACHE).get('id')
+
+def muat(muat_data):
+    """Jalankan muat_data() (membangun semua data serving) lalu bekukan hasilnya untuk fork."""
+    with _lock_muat:
+        mulai = time.perf_counter()
+        # Generasi lama (dibekukan di muat/fork sebelumnya) harus bisa dikoleksi lagi setelah diganti
+        gc.unfreeze()
+        gc.collect()
+        muat_data()
+        gc.collect()
+        gc.freeze()
+        print(f"🧊 Data serving dimuat & dibekukan di master ({time.perf_counter() - mulai:.2f}s, "
+              f"{gc.get_freeze_count()} objek).")
+
+def pantau(muat_data, poll_seconds=POLL_SECONDS):
+    """Master: muat generasi data baru saat versi naik, lalu rotasi worker (SIGHUP)."""
+    def loop():
+        terakhir = _versi_data()
+        rotasi_terakhir = time.monotonic()
+        while True:
+            time.sleep(poll_seconds)
+            sekarang = _versi_data()
+            if sekarang == terakhir or time.monotonic() - rotasi_terakhir < MIN_ROTASI_SECONDS:
+                continue
+            try:
+                muat(muat_data)
+            except Exception as e:
+                print(f"❌ Gagal memuat data baru di master: {e}")
+                continue
+            terakhir = sekarang
+            rotasi_terakhir = time.monotonic()
+            print("🔁 Rotasi worker gunicorn ke generasi data baru...")
+            os.kill(os.getpid(), signal.SIGHUP)
+
+    threading.Thread(target=loop, daemon=True).start()
+
+def sebelum_fork():
+    """Hook pre_fork: tunggu pemuatan yang sedang berjalan selesai agar worker tidak mewarisi state setengah jadi."""
+    with _lock_muat:
+        gc.freeze()
+
+def setelah_fork(*stores):
+    """Hook post_fork (di worker): bekukan store agar tidak memuat ulang salinan data sendiri, lalu jalankan fungsi saat_fork."""
+    for store in stores:
+        store.beku = True
+    for fungsi in _setelah_fork:
+        fungsi()
+
+def saat_fork(fungsi):
+    """Daftarkan fungsi() untuk dijalankan di tiap worker baru (hook post_fork), bukan di master."""
+    _setelah_fork.append(fungsi)
@@ -0,0 +1,143 @@
+# spatial_index.py
+import math
+import heapq
+
+from filtered_store import get_filtered_store
+
+EARTH_RADIUS_KM = 6371
+LEAF_SIZE = 16
+
+def haversine(lat1, lon1, lat2, lon2):
+    """Jarak great-circle dalam km."""
+    d_lat = math.radians(lat2 - lat1)
+    d_lon = math.radians(lon2 - lon1)
+    a = math.sin(d_lat/2)**2 + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(d_lon/2)**2
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
+    return EARTH_RADIUS_KM * c
+
+def ke_unit_sphere(lat, lon):
+    """Koordinat (x, y, z) di bola satuan; jarak Euclid (chord) monoton terhadap jarak great-circle."""
+    lat_r = math.radians(lat)
+    lon_r = math.radians(lon)
+    cos_lat = math.cos(lat_r)
+    return (cos_lat * math.cos(lon_r), cos_lat * math.sin(lon_r), math.sin(lat_r))
+
+def chord2_dari_km(radius_km):
+    """Kuadrat panjang chord untuk jarak great-circle radius_km."""
+    theta = radius_km / EARTH_RADIUS_KM
+    if theta >= math.pi:
+        return 4.0 # seluruh bola
+    return (2 * math.sin(theta / 2)) ** 2
+
+
+class KDTree:
+    """
+    KD-tree 3 dimensi sederhana dengan leaf bucket. Titik disimpan sebagai list koordinat
+    paralel; node disimpan di list datar (axis, split, kiri, kanan, awal, akhir).
+    """
+
+    def __init__(self, points):
+        self.xs = [p[0] for p in points]
+        self.ys = [p[1] for p in points]
+        self.zs = [p[2] for p in points]
+        self._coords = (self.xs, self.ys, self.zs)
+        self.perm = list(range(len(points)))
+        self.nodes = []
+        self.root = self._build(0, len(points)) if points else None
+
+    def _build(self, awal, akhir):
+        node_id = len(self.nodes)
+        if akhir - awal <= LEAF_SIZE:
+            self.nodes.append((-1, 0.0, -1, -1, awal, akhir))
+            return node_id
+        self.nodes.append(None) # placeholder, diisi setelah anak dibangun
+
+        bagian = self.perm[awal:akhir]
+        # Pilih sumbu dengan sebaran terbesar
+        axis, sebaran_max = 0, -1.0
+        for a, coord in enumerate(self._coords):
+            nilai = [coord[i] for i in bagian]
+            sebaran = max(nilai) - min(nilai)
+            if sebaran > sebaran_max:
+                axis, sebaran_max = a, sebaran
+        coord = self._coords[axis]
+        bagian.sort(key=coord.__getitem__)
+        self.perm[awal:akhir] = bagian
+        tengah = (awal + akhir) // 2
+        split = coord[self.perm[tengah]]
+
+        kiri = self._build(awal, tengah)
+        kanan = self._build(tengah, akhir)
+        self.nodes[node_id] = (axis, split, kiri, kanan, awal, akhir)
+        return node_id
+
+    def query(self, q, k=1, max_d2=float('inf')):
+        """k titik terdekat ke q dengan chord^2 <= max_d2. Mengembalikan list (d2, indeks) terurut."""
+        if self.root is None or k <= 0:
+            return []
+        qx, qy, qz = q
+        q_axis = (qx, qy, qz)
+        xs, ys, zs, perm, nodes = self.xs, self.ys, self.zs, self.perm, self.nodes
+        heap = [] # max-heap lewat (-d2, -indeks): seri jarak -> indeks kecil (urutan data) menang
+
+        def terburuk():
+            return (-heap[0][0], -heap[0][1]) if len(heap) >= k else (max_d2, float('inf'))
+
+        # Stack berisi (node, batas bawah chord^2); sisi jauh dilewati jika batasnya
+        # sudah lebih besar dari kandidat terburuk saat node itu diambil
+        stack = [(self.root, 0.0)]
+        while stack:
+            node_id, batas = stack.pop()
+            if batas > terburuk()[0]:
+                continue
+            axis, split, kiri, kanan, awal, akhir = nodes[node_id]
+            if axis < 0:
+                for j in range(awal, akhir):
+                    i = perm[j]
+                    dx = xs[i] - qx
+                    dy = ys[i] - qy
+                    dz = zs[i] - qz
+                    d2 = dx*dx + dy*dy + dz*dz
+                    if (d2, i) < terburuk():
+                        if len(heap) >= k:
+                            heapq.heapreplace(heap, (-d2, -i))
+                        else:
+                            heapq.heappush(heap, (-d2, -i))
+                continue
+            selisih = q_axis[axis] - split
+            dekat, jauh = (kiri, kanan) if selisih < 0 else (kanan, kiri)
+            stack.append((jauh, max(batas, selisih * selisih)))
+            stack.append((dekat, batas))
+
+        return sorted((-d2, -i) for d2, i in heap)
+
+
+class IndeksSpasial:
+    """Indeks lokasi hasil filter untuk pencarian k-terdekat dan radius."""
+
+    def __init__(self, lokasi_list):
+        self.lokasi = []
+        points = []
+        for data in lokasi_list:
+            lat, lon = data.get('lat'), data.get('lon')
+            if isinstance(lat, (int, float)) and isinstance(lon, (int, float)):
+                self.lokasi.append(data)
+                points.append(ke_unit_sphere(lat, lon))
+        self.tree = KDTree(points)
+
+    def __len__(self):
+        return len(self.lokasi)
+
+    def terdekat(self, lat, lon, k=1, radius_km=None):
+        """List (jarak_km, dict_lokasi) terurut dari yang terdekat."""
+        max_d2 = chord2_dari_km(radius_km) if radius_km is not None else float('inf')
+        hasil = []
+        for d2, i in self.tree.query(ke_unit_sphere(lat, lon), k, max_d2):
+            data = self.lokasi[i]
+            hasil.append((haversine(lat, lon, data['lat'], data['lon']), data))
+        return hasil
+
+
+def get_indeks_spasial():
+    """IndeksSpasial untuk generasi data_filtered saat ini (dibangun ulang saat data berubah)."""
+    return get_filtered_store().turunan('spasial', IndeksSpasial)
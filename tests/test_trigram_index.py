@@ -0,0 +1,94 @@
+# tests/test_trigram_index.py
+"""
+IndeksTrigram.cari dibandingkan dengan scan penuh fuzz.ratio (cara find_lokasi sebelum indeks trigram):
+
+    python -m pytest -q tests
+"""
+import os
+import sys
+import random
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rapidfuzz import fuzz
+
+import trigram_index
+from trigram_index import IndeksTrigram
+
+THRESHOLD = 70
+SUKU = ['ba', 'ma', 'ra', 'ja', 'su', 'ka', 'ti', 'ne', 'lo', 'we', 'ga', 'ri', 'an', 'ng', 'si', 'de']
+
+
+def nama_sintetis(jumlah, seed=1):
+    rng = random.Random(seed)
+    nama = []
+    while len(nama) < jumlah:
+        kata = ''.join(rng.choice(SUKU) for _ in range(rng.randint(2, 4)))
+        nama.append(kata if rng.random() < 0.5 else f"{kata} {rng.choice(['desa', 'kec', 'kab'])} {rng.randint(1, 40)}")
+    return list(dict.fromkeys(nama))
+
+
+def brute_force(nama_list, q, threshold=THRESHOLD):
+    """(id, skor) tertinggi, seri -> id terkecil; sama seperti scan lama."""
+    terbaik = None
+    for i, nama in enumerate(nama_list):
+        skor = int(round(fuzz.ratio(q, nama)))
+        if skor >= threshold and (terbaik is None or skor > terbaik[1]):
+            terbaik = (i, skor)
+    return terbaik
+
+
+def typo(rng, teks):
+    huruf = list(teks)
+    j = rng.randrange(len(huruf))
+    aksi = rng.choice(['ganti', 'hapus', 'sisip'])
+    if aksi == 'ganti':
+        huruf[j] = rng.choice('aiueokr')
+    elif aksi == 'hapus' and len(huruf) > 1:
+        del huruf[j]
+    else:
+        huruf.insert(j, rng.choice('aiueokr'))
+    return ''.join(huruf)
+
+
+@pytest.fixture(scope='module')
+def nama_list():
+    return nama_sintetis(3000)
+
+
+@pytest.fixture(scope='module')
+def indeks(nama_list):
+    return IndeksTrigram(nama_list)
+
+
+def test_query_pendek_sama_dengan_brute_force(nama_list, indeks):
+    rng = random.Random(2)
+    queries = ['a', 'ba', 'rai', 'reia', 'desa', 'kab']
+    queries += [rng.choice(nama_list)[:rng.randint(1, 4)] for _ in range(40)]
+    queries += [typo(rng, q) for q in queries]
+    for q in queries:
+        assert indeks.cari(q, THRESHOLD) == brute_force(nama_list, q), q
+
+
+def test_query_typo_sama_dengan_brute_force(nama_list, indeks):
+    rng = random.Random(3)
+    for _ in range(150):
+        q = typo(rng, rng.choice(nama_list))
+        assert indeks.cari(q, THRESHOLD) == brute_force(nama_list, q), q
+
+
+def test_kandidat_terpotong_tidak_kehilangan_kecocokan(nama_list, monkeypatch):
+    # Batas kecil memaksa kandidat terpotong: jika scan penuh menemukan nama, cari tidak boleh None
+    # (nama yang ditemukan boleh berbeda dari scan penuh, skornya tetap lolos threshold)
+    monkeypatch.setattr(trigram_index, 'MAX_POSTING', 50)
+    monkeypatch.setattr(trigram_index, 'MAX_KANDIDAT', 5)
+    indeks = IndeksTrigram(nama_list)
+    rng = random.Random(4)
+    for _ in range(150):
+        q = typo(rng, rng.choice(nama_list))
+        hasil, brute = indeks.cari(q, THRESHOLD), brute_force(nama_list, q)
+        assert (hasil is None) == (brute is None), q
+        if hasil is not None:
+            assert fuzz.ratio(q, nama_list[hasil[0]]) >= THRESHOLD - 0.5
@@ -0,0 +1,90 @@
+# trigram_index.py
+from array import array
+from collections import Counter
+
+from cooperative import beri_giliran
+
+Q = 3
+MAX_POSTING = 40000  # batas jumlah posting yang dihitung per query (gram paling jarang lebih dulu)
+MAX_KANDIDAT = 1000  # kandidat dengan gram bersama terbanyak yang diberi skor
+PANJANG_MIN_TRIGRAM = 5 # query lebih pendek dinilai terhadap semua nama (scan penuh)
+
+def trigram(teks):
+    """Himpunan trigram teks dengan padding (awal kata lebih berbobot, seperti pg_trgm)."""
+    s = f"  {teks} "
+    return {s[i:i + Q] for i in range(len(s) - Q + 1)}
+
+
+class IndeksTrigram:
+    """
+    Pencarian fuzzy atas daftar nama tanpa membandingkan query dengan semua nama:
+    postings trigram -> id nama memilih MAX_KANDIDAT nama dengan trigram bersama terbanyak,
+    lalu hanya kandidat itu diberi skor sekaligus dengan RapidFuzz.
+
+    Skor = round(fuzz.ratio) RapidFuzz, sama dengan fuzzywuzzy.fuzz.ratio (python-Levenshtein).
+    Skor seri dimenangkan id terkecil, jadi urutan nama_list menentukan prioritas.
+
+    Tidak selalu identik dengan scan penuh: nama di luar kandidat (terpotong MAX_POSTING/MAX_KANDIDAT,
+    atau tanpa trigram bersama, mis. 'ireia' vs 'ririga' skor 73) tidak dinilai. Karena itu semua
+    nama tetap dinilai (scan penuh) untuk query pendek (< PANJANG_MIN_TRIGRAM) dan jika tidak ada
+    kandidat yang lolos threshold: hasil None hanya jika scan penuh pun tidak menemukan apa-apa.
+    Yang masih bisa berbeda: ada kandidat yang lolos, padahal nama di luar kandidat skornya lebih tinggi.
+    """
+
+    def __init__(self, nama_list):
+        self.nama = list(nama_list)
+        self.postings = {} # trigram -> array id nama (naik)
+        for i, nama in enumerate(self.nama):
+            beri_giliran(i)
+            for gram in trigram(nama):
+                posting = self.postings.get(gram)
+                if posting is None:
+                    posting = self.postings[gram] = array('i')
+                posting.append(i)
+
+    def kandidat(self, q):
+        """Id nama dengan trigram bersama terbanyak dengan q."""
+        postings = sorted((self.postings[g] for g in trigram(q) if g in self.postings), key=len)
+        hitung = Counter()
+        total = 0
+        for posting in postings:
+            if total and total + len(posting) > MAX_POSTING:
+                break
+            hitung.update(posting)
+            total += len(posting)
+        if len(hitung) <= MAX_KANDIDAT:
+            return list(hitung)
+        # Ambang jumlah gram bersama untuk MAX_KANDIDAT teratas (jumlah per tingkat dihitung di C);
+        # di tingkat ambang, id kecil (prioritas lebih tinggi) didahulukan
+        per_tingkat = Counter(hitung.values())
+        sisa = MAX_KANDIDAT
+        for batas in sorted(per_tingkat, reverse=True):
+            if per_tingkat[batas] >= sisa:
+                break
+            sisa -= per_tingkat[batas]
+        atas = [i for i, n in hitung.items() if n > batas]
+        return atas + sorted(i for i, n in hitung.items() if n == batas)[:sisa]
+
+    def cari(self, q, threshold):
+        """(id nama, skor) dengan skor tertinggi >= threshold, atau None."""
+        if not q:
+            return None
+        if len(q) < PANJANG_MIN_TRIGRAM:
+            return self._terbaik(q, None, threshold)
+        hasil = self._terbaik(q, self.kandidat(q), threshold)
+        if hasil is None:
+            # Kandidat terpotong / tanpa trigram bersama: pastikan tidak ada nama lain yang lolos
+            return self._terbaik(q, None, threshold)
+        return hasil
+
+    def _terbaik(self, q, kandidat, threshold):
+        """Skor tertinggi di antara kandidat (list id), atau semua nama jika kandidat None."""
+        from rapidfuzz import fuzz, process # diimpor saat fuzzy pertama dipakai (startup lebih cepat)
+        pilihan = self.nama if kandidat is None else [self.nama[i] for i in kandidat]
+        terbaik = None
+        for _, skor, j in process.extract(q, pilihan, scorer=fuzz.ratio,
+                                          score_cutoff=threshold - 0.5, limit=None):
+            kunci = (int(round(skor)), -(j if kandidat is None else kandidat[j]))
+            if kunci[0] >= threshold and (terbaik is None or kunci > terbaik):
+                terbaik = kunci
+        return (-terbaik[1], terbaik[0]) if terbaik else None
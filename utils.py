@@ -3,7 +3,6 @@ import json
 import re
 from typing import List, Dict, Union
 import unicodedata
-from fuzzywuzzy import fuzz
 
 def normalize_text(text: str) -> str:
     text = unicodedata.normalize('NFKD', text.lower())
@@ -19,6 +18,7 @@ def load_json_files(folder_path: str) -> List[Dict]:
     return data
 
 def fuzzy_match(query: str, choices: List[str], threshold: int = 70) -> List[str]:
+    from fuzzywuzzy import fuzz # diimpor saat dipakai agar import utils (startup) cepat
     normalized_query = normalize_text(query)
     matches = []
     for choice in choices:
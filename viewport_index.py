@@ -0,0 +1,150 @@
+# viewport_index.py
+import bisect
+from collections import Counter
+
+from filtered_store import get_filtered_store
+from cooperative import beri_giliran
+
+# Zoom <= CLUSTER_ZOOM_MAX dijawab dengan cluster grid; di atasnya dengan titik individual.
+CLUSTER_ZOOM_MAX = 11
+ZOOM_MAX = 22
+# Ukuran sel cluster kira-kira CELL_PX piksel layar (tile Web Mercator 256 px)
+CELL_PX = 60
+# Batas jumlah titik individual per respons (zoom tinggi)
+MAX_POINTS = 2000
+# Batas jumlah cluster per respons (bbox lebar di zoom rendah); cluster terbesar didahulukan
+MAX_CLUSTERS = 2000
+# Jika bbox mencakup lebih dari ini sel, iterasi sel terisi saja (bukan rentang bbox)
+MAX_CELL_SCAN = 5000
+
+def ukuran_sel(zoom):
+    """Lebar sel grid (derajat) untuk level zoom tertentu."""
+    return CELL_PX * 360.0 / (256 * (2 ** zoom))
+
+
+def _titik(data):
+    cuaca = data.get('cuaca_saat_ini') or {}
+    return {
+        "adm4": data.get('adm4'),
+        "desa": data.get('desa'),
+        "kecamatan": data.get('kecamatan'),
+        "kotkab": data.get('kotkab'),
+        "provinsi": data.get('provinsi'),
+        "lat": data['lat'],
+        "lon": data['lon'],
+        "suhu": cuaca.get('suhu'),
+        "kelembapan": cuaca.get('kelembapan'),
+        "cuaca": cuaca.get('cuaca'),
+    }
+
+
+class IndeksViewport:
+    """
+    Titik lokasi hasil filter terurut berdasarkan longitude (untuk query bbox) plus
+    cluster grid yang sudah dihitung untuk setiap zoom 0..CLUSTER_ZOOM_MAX.
+    """
+
+    def __init__(self, lokasi_list):
+        titik = [_titik(d) for d in lokasi_list
+                 if isinstance(d.get('lat'), (int, float)) and isinstance(d.get('lon'), (int, float))]
+        titik.sort(key=lambda t: t['lon'])
+        self.titik = titik
+        self.lons = [t['lon'] for t in titik]
+        self.lats = [t['lat'] for t in titik]
+        self.cluster = {zoom: self._bangun_cluster(zoom) for zoom in range(CLUSTER_ZOOM_MAX + 1)}
+
+    def _bangun_cluster(self, zoom):
+        sel = ukuran_sel(zoom)
+        agregat = {}
+        for i, t in enumerate(self.titik):
+            beri_giliran(i)
+            kunci = (int(t['lon'] // sel), int(t['lat'] // sel))
+            a = agregat.get(kunci)
+            if a is None:
+                a = agregat[kunci] = {"n": 0, "lat": 0.0, "lon": 0.0, "suhu": 0.0, "n_suhu": 0,
+                                      "cuaca": Counter(), "bbox": [t['lat'], t['lon'], t['lat'], t['lon']], "adm4": None}
+            a["n"] += 1
+            a["lat"] += t['lat']
+            a["lon"] += t['lon']
+            if isinstance(t['suhu'], (int, float)):
+                a["suhu"] += t['suhu']
+                a["n_suhu"] += 1
+            if t['cuaca']:
+                a["cuaca"][t['cuaca']] += 1
+            bbox = a["bbox"]
+            bbox[0] = min(bbox[0], t['lat'])
+            bbox[1] = min(bbox[1], t['lon'])
+            bbox[2] = max(bbox[2], t['lat'])
+            bbox[3] = max(bbox[3], t['lon'])
+            a["adm4"] = t['adm4']
+
+        cluster = {}
+        for kunci, a in agregat.items():
+            cluster[kunci] = {
+                "lat": round(a["lat"] / a["n"], 5),
+                "lon": round(a["lon"] / a["n"], 5),
+                "jumlah": a["n"],
+                "suhu_rata2": round(a["suhu"] / a["n_suhu"], 1) if a["n_suhu"] else None,
+                "cuaca_dominan": a["cuaca"].most_common(1)[0][0] if a["cuaca"] else None,
+                "bbox": a["bbox"], # [min_lat, min_lon, max_lat, max_lon]
+                # Cluster berisi satu lokasi: sertakan adm4 agar klien bisa langsung menampilkan marker
+                "adm4": a["adm4"] if a["n"] == 1 else None,
+            }
+        return cluster
+
+    def cluster_dalam(self, zoom, min_lat, min_lon, max_lat, max_lon):
+        """
+        Cluster pada zoom yang sel grid-nya berpotongan dengan bbox. Satu cluster = satu sel utuh:
+        jumlah, centroid dan bbox-nya mencakup semua lokasi di sel itu, termasuk yang di luar viewport.
+        """
+        sel = ukuran_sel(zoom)
+        cluster = self.cluster[zoom]
+        ix0, ix1 = int(min_lon // sel), int(max_lon // sel)
+        iy0, iy1 = int(min_lat // sel), int(max_lat // sel)
+        if (ix1 - ix0 + 1) * (iy1 - iy0 + 1) > MAX_CELL_SCAN:
+            kunci_list = sorted(k for k in cluster if ix0 <= k[0] <= ix1 and iy0 <= k[1] <= iy1)
+        else:
+            kunci_list = [(ix, iy) for iy in range(iy0, iy1 + 1) for ix in range(ix0, ix1 + 1) if (ix, iy) in cluster]
+        return [cluster[k] for k in kunci_list]
+
+    def jumlah_dalam(self, min_lat, min_lon, max_lat, max_lon):
+        """Jumlah lokasi di dalam bbox."""
+        awal = bisect.bisect_left(self.lons, min_lon)
+        akhir = bisect.bisect_right(self.lons, max_lon)
+        return sum(1 for lat in self.lats[awal:akhir] if min_lat <= lat <= max_lat)
+
+    def titik_dalam(self, min_lat, min_lon, max_lat, max_lon, batas=MAX_POINTS):
+        """Titik individual di dalam bbox; mengembalikan (list_titik maks. batas, jumlah total di bbox)."""
+        awal = bisect.bisect_left(self.lons, min_lon)
+        akhir = bisect.bisect_right(self.lons, max_lon)
+        hasil = []
+        total = 0
+        for i in range(awal, akhir):
+            t = self.titik[i]
+            if min_lat <= t['lat'] <= max_lat:
+                total += 1
+                if len(hasil) < batas:
+                    hasil.append(t)
+        return hasil, total
+
+    def query(self, zoom, min_lat, min_lon, max_lat, max_lon):
+        zoom = max(0, min(int(zoom), ZOOM_MAX))
+        if zoom <= CLUSTER_ZOOM_MAX:
+            cluster = self.cluster_dalam(zoom, min_lat, min_lon, max_lat, max_lon)
+            terpotong = len(cluster) > MAX_CLUSTERS
+            if terpotong:
+                cluster = sorted(cluster, key=lambda c: -c["jumlah"])[:MAX_CLUSTERS]
+            # jumlah_lokasi = lokasi di dalam bbox (sama dengan mode titik), bukan jumlah isi sel yang
+            # hanya sebagian masuk viewport
+            return {"mode": "cluster", "zoom": zoom,
+                    "jumlah_lokasi": self.jumlah_dalam(min_lat, min_lon, max_lat, max_lon),
+                    "terpotong": terpotong, "cluster": cluster}
+        # jumlah_lokasi = semua lokasi di bbox (sama artinya dengan mode cluster), meski daftar terpotong
+        titik, total = self.titik_dalam(min_lat, min_lon, max_lat, max_lon)
+        return {"mode": "titik", "zoom": zoom, "jumlah_lokasi": total, "terpotong": total > len(titik),
+                "lokasi": titik}
+
+
+def get_indeks_viewport():
+    """IndeksViewport untuk generasi data_filtered saat ini (dibangun ulang saat data berubah)."""
+    return get_filtered_store().turunan('viewport', IndeksViewport)